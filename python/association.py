@@ -0,0 +1,643 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+'''
+# File: association.py
+# Created Date: Sunday October 18th 2026
+# Author: Debora Antunes
+# -----
+# Last Modified: Sunday, October 18th 2026, 10:05:48 pm
+# -----
+'''
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from scipy import special
+from scipy import stats
+
+import genotypeStore
+
+MAX_VALUES = 256 # Columns with a wider range of integer values are tested one by one
+BLOCK_SIZE = 1 << 22 # Number of genotypes counted at once
+ITERATIONS = 25 # Maximum number of iterations of the logistic regressions
+TOLERANCE = 1e-8 # The logistic regressions stop when no coefficient changes more than this
+MEMORY = 1024 # Memory, in MB, used by the permutations of all the processes
+PERMUTATION_TESTS = ['chi2', 'trend']
+
+'''
+Association tests of all the variants of a dataset at once, used by geneSelection. The genotypes are \
+counted by value and label for a block of variants with a single bincount, giving one contingency \
+table per variant (variants x values x labels), and the statistics and p-values are computed over \
+the arrays of tables:
+
+	chiSquared		Pearson chi-squared test of independence, the same as stats.chi2_contingency \
+					(without correction) on pd.crosstab(data[c], data['labels'])
+
+The other tests do not use count tables; they are computed by blocks of columns of the matrix:
+
+	normality		D'Agostino and Pearson test (stats.normaltest) of the genotypes of each variant
+	trend			Cochran-Armitage trend test of the dosage (number of alternative alleles) \
+					with two labels
+	logistic		logistic regression of the labels on the dosage and on covariates (like \
+					principal components and sex), with a Wald test of the dosage; the models \
+					of all the variants of a block are fitted together by Newton's method (IRLS)
+
+The genotype codes are translated to dosages with genotypeStore.alleleTable, which leaves datasets \
+that are already dosages unchanged; columns with values that are not codes, like mean imputed \
+genotypes, are used as they are.
+
+As in pd.crosstab, missing genotypes are not counted and the values or labels that do not occur in \
+a variant are not part of its table. Columns that do not have integer values are tested one by one.
+
+With more than one process, the blocks are tested in parallel by workers that map one shared copy \
+of the matrix (see runTest).
+
+The chi2 and trend tests can also be repeated with permuted labels (see permutationTest). The \
+permuted labels are stacked in a matrix Y (samples x permutations), so the counts of the cases with \
+each genotype in all the permutations are one product (G == c).T @ Y per genotype value c; the other \
+counts do not change with the permutations. This gives an empirical p-value per variant and the \
+distribution of the smallest p-value of the genome in each permutation, from which come the \
+family-wise (max-statistic) adjusted p-values and the genome-wide significance threshold.
+'''
+
+
+def labelCodes(labels):
+	"""Translates the labels to the indexes 0 to L-1.
+
+	Arguments:
+		labels {array-like} -- Label of each sample.
+
+	Returns:
+		tuple -- Index of the label of each sample and the sorted labels.
+	"""
+	classes, codes = np.unique(np.asarray(labels), return_inverse=True)
+	return codes.ravel(), classes
+
+def integerColumns(block):
+	"""Finds the columns whose values (ignoring NaN) are integers in a range that can be counted.
+
+	Arguments:
+		block {numpy.ndarray} -- Genotypes (samples x variants).
+
+	Returns:
+		numpy.ndarray -- True for each column that can be counted.
+	"""
+	if block.dtype.kind in 'iub':
+		low, high = block.min(axis=0, initial=0), block.max(axis=0, initial=0)
+		return (high.astype(np.int64) - low) < MAX_VALUES
+	if block.dtype.kind != 'f': return np.zeros(block.shape[1], dtype=bool)
+	integral = np.all(np.isnan(block) | (block == np.round(block)), axis=0)
+	#fmax and fmin ignore NaN; columns without values have a NaN span and are counted
+	with np.errstate(invalid='ignore'):
+		span = np.fmax.reduce(block, axis=0) - np.fmin.reduce(block, axis=0)
+	return integral & ~(span >= MAX_VALUES)
+
+def countTables(block, codes, nLabels):
+	"""Counts the genotypes of each value and label of a block of variants.
+
+	Arguments:
+		block {numpy.ndarray} -- Integer genotypes (samples x variants), where NaN is missing.
+		codes {numpy.ndarray} -- Index of the label of each sample (see labelCodes).
+		nLabels {int} -- Number of labels.
+
+	Returns:
+		numpy.ndarray -- Counts (variants x values x labels), where the values of each variant \
+		start at its minimum.
+	"""
+	valid = ~np.isnan(block)
+	low = np.fmin.reduce(block, axis=0)
+	values = np.where(valid, block - np.where(np.isnan(low), 0, low), 0).astype(np.int64)
+	width = int(values.max(initial=0)) + 1
+	index = (np.arange(block.shape[1])[None, :] * width + values) * nLabels + codes[:, None]
+	counts = np.bincount(index[valid], minlength=block.shape[1] * width * nLabels)
+	return counts.reshape(block.shape[1], width, nLabels)
+
+def chiSquared(tables):
+	"""Pearson chi-squared test of independence of each contingency table, ignoring the rows and \
+		columns without counts.
+
+	Arguments:
+		tables {numpy.ndarray} -- Contingency tables (variants x values x labels).
+
+	Returns:
+		tuple -- Statistic, degrees of freedom and p-value of each table. Tables with no degrees \
+		of freedom have a statistic of 0 and a p-value of 1.
+	"""
+	tables = tables.astype(np.float64)
+	rows, cols = tables.sum(axis=2), tables.sum(axis=1)
+	total = rows.sum(axis=1)
+	expected = rows[:, :, None] * cols[:, None, :] / np.where(total > 0, total, 1)[:, None, None]
+	with np.errstate(divide='ignore', invalid='ignore'):
+		terms = np.where(expected > 0, (tables - expected) ** 2 / expected, 0)
+	dof = ((rows > 0).sum(axis=1) - 1).clip(0) * ((cols > 0).sum(axis=1) - 1).clip(0)
+	statistic = np.where(dof > 0, terms.sum(axis=(1, 2)), 0.0)
+	pvalue = np.ones(len(tables))
+	pvalue[dof > 0] = stats.chi2.sf(statistic[dof > 0], dof[dof > 0])
+	return statistic, dof, pvalue
+
+def chiSquaredBlock(block, codes, nLabels, covariates=None):
+	"""Chi-squared test of a block of variants. Columns without integer values are tested one \
+		by one with stats.chi2_contingency.
+
+	Arguments:
+		block {numpy.ndarray} -- Genotypes (samples x variants).
+		codes {numpy.ndarray} -- Index of the label of each sample (see labelCodes).
+		nLabels {int} -- Number of labels.
+
+	Returns:
+		tuple -- Statistic, degrees of freedom and p-value of each variant.
+	"""
+	statistic, dof, pvalue = np.zeros(block.shape[1]), np.zeros(block.shape[1], dtype=np.int64), np.ones(block.shape[1])
+	counted = integerColumns(block)
+	index = np.flatnonzero(counted)
+	if len(index):
+		result = chiSquared(countTables(block[:, index].astype(np.float64), codes, nLabels))
+		for array, values in zip([statistic, dof, pvalue], result): array[index] = values
+	for i in np.flatnonzero(~counted):
+		table = pd.crosstab(pd.Series(block[:, i]), pd.Series(codes)).values
+		statistic[i], pvalue[i], dof[i] = stats.chi2_contingency(table, correction=False)[0:3]
+	return statistic, dof, pvalue
+
+def normalityBlock(block, codes=None, nLabels=None, covariates=None):
+	"""Normality test (stats.normaltest) of a block of variants.
+
+	Arguments:
+		block {numpy.ndarray} -- Genotypes (samples x variants).
+
+	Returns:
+		tuple -- Statistic and p-value of each variant.
+	"""
+	return stats.normaltest(block.astype(np.float64), axis=0)
+
+def dosages(block):
+	"""Translates the genotype codes of a block of variants to dosages (number of alternative alleles).
+
+	Arguments:
+		block {numpy.ndarray} -- Genotypes (samples x variants), where NaN is missing.
+
+	Returns:
+		numpy.ndarray -- Dosages; the columns with values that are not genotype codes are not changed.
+	"""
+	alt = genotypeStore.alleleTable()[1].astype(np.float64)
+	block = block.astype(np.float64)
+	valid = ~np.isnan(block)
+	codes = np.all(~valid | ((block == np.round(block)) & (block >= 0) & (block < len(alt))), axis=0)
+	index = np.where(valid[:, codes], block[:, codes], 0).astype(np.int64)
+	block[:, codes] = np.where(valid[:, codes], alt[index], np.nan)
+	return block
+
+def trendBlock(block, codes, nLabels, covariates=None):
+	"""Cochran-Armitage trend test of a block of variants, with the dosages as scores. The statistic \
+		is N*r^2, where r is the correlation of the dosage with the label over the N samples with \
+		a genotype, and has one degree of freedom.
+
+	Arguments:
+		block {numpy.ndarray} -- Genotypes (samples x variants).
+		codes {numpy.ndarray} -- Index of the label of each sample (see labelCodes).
+		nLabels {int} -- Number of labels, which must be 2.
+
+	Returns:
+		tuple -- Statistic and p-value of each variant; variants without variation have a statistic \
+		of 0 and a p-value of 1.
+	"""
+	if nLabels != 2: raise ValueError('The trend test needs two labels, not {}'.format(nLabels))
+	x = dosages(block)
+	valid = ~np.isnan(x)
+	x = np.where(valid, x, 0)
+	y = codes.astype(np.float64)
+	n, sx, sy = valid.sum(axis=0), x.sum(axis=0), y @ valid
+	sxx, sxy = (x * x).sum(axis=0), y @ x
+	den = (n * sxx - sx ** 2) * (n * sy - sy ** 2)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		statistic = np.where(den > 0, n * (n * sxy - sx * sy) ** 2 / den, 0.0)
+	return statistic, np.where(den > 0, stats.chi2.sf(statistic, 1), 1.0)
+
+def designMatrix(covariates, rows):
+	"""Creates the design matrix of the covariates: an intercept and the standardized covariates, \
+		without the constant ones.
+
+	Arguments:
+		covariates {numpy.ndarray} -- Covariates (samples x covariates), or None.
+		rows {numpy.ndarray} -- Samples used.
+
+	Returns:
+		numpy.ndarray -- Design matrix (samples x (1 + covariates)).
+	"""
+	if covariates is None or not covariates.shape[1]: return np.ones((len(rows), 1))
+	values = covariates[rows]
+	std = values.std(axis=0)
+	values = (values[:, std > 0] - values[:, std > 0].mean(axis=0)) / std[std > 0]
+	return np.hstack([np.ones((len(rows), 1)), values])
+
+def fitLogistic(design, y, x, start=None, iterations=ITERATIONS, tolerance=TOLERANCE):
+	"""Fits one logistic regression per variant, y ~ design + x, by Newton's method. The models of \
+		all the variants are fitted together: the Hessians (variants x k x k) are built with matrix \
+		products over the samples and solved at once.
+
+	Arguments:
+		design {numpy.ndarray} -- Covariates shared by all the models (samples x k-1).
+		y {numpy.ndarray} -- Labels (0 or 1).
+		x {numpy.ndarray} -- Variable of each model (samples x variants).
+
+	Keyword Arguments:
+		start {numpy.ndarray} -- Initial coefficients of the covariates. (default: {None}, zeros)
+		iterations {int} -- Maximum number of iterations. (default: {ITERATIONS})
+		tolerance {float} -- Largest change of the coefficients at convergence. (default: {TOLERANCE})
+
+	Returns:
+		tuple -- Coefficients (variants x k), the last coefficient being the one of x, and their \
+		covariance matrices (variants x k x k).
+	"""
+	k = design.shape[1]
+	beta = np.zeros((x.shape[1], k + 1))
+	if start is not None: beta[:, :k] = start
+	outer = (design[:, :, None] * design[:, None, :]).reshape(len(design), k * k)
+	for _ in range(iterations):
+		p = special.expit(design @ beta[:, :k].T + x * beta[:, k])
+		w = p * (1 - p)
+		r = y[:, None] - p
+		hessian = np.empty((x.shape[1], k + 1, k + 1))
+		hessian[:, :k, :k] = (outer.T @ w).T.reshape(-1, k, k)
+		hessian[:, :k, k] = hessian[:, k, :k] = (design.T @ (w * x)).T
+		hessian[:, k, k] = (w * x * x).sum(axis=0)
+		#Variables without variation keep a coefficient of 0
+		hessian[:, k, k] = np.where(hessian[:, k, k] > 0, hessian[:, k, k], 1)
+		score = np.hstack([(design.T @ r).T, (x * r).sum(axis=0)[:, None]])
+		try: step = np.linalg.solve(hessian, score[..., None])[..., 0]
+		except np.linalg.LinAlgError: step = (np.linalg.pinv(hessian) @ score[..., None])[..., 0]
+		beta += step
+		if not np.isfinite(step).all() or np.abs(step).max() < tolerance: break
+	try: covariance = np.linalg.inv(hessian)
+	except np.linalg.LinAlgError: covariance = np.linalg.pinv(hessian)
+	return beta, covariance
+
+def logisticBlock(block, codes, nLabels, covariates=None):
+	"""Logistic regression of the labels on the dosage of each variant of a block and on the \
+		covariates, with a Wald test of the dosage. Samples with missing covariates are not used \
+		and missing dosages are replaced by the mean dosage of the variant.
+
+	Arguments:
+		block {numpy.ndarray} -- Genotypes (samples x variants).
+		codes {numpy.ndarray} -- Index of the label of each sample (see labelCodes).
+		nLabels {int} -- Number of labels, which must be 2.
+
+	Keyword Arguments:
+		covariates {numpy.ndarray} -- Covariates (samples x covariates). (default: {None}, only an intercept)
+
+	Returns:
+		tuple -- Coefficient (log odds ratio per alternative allele), its standard error and the \
+		p-value of each variant; variants without variation have a p-value of 1.
+	"""
+	if nLabels != 2: raise ValueError('The logistic regression needs two labels, not {}'.format(nLabels))
+	rows = np.arange(len(block)) if covariates is None else np.flatnonzero(~np.isnan(covariates).any(axis=1))
+	design = designMatrix(covariates, rows)
+	y = codes[rows].astype(np.float64)
+	x = dosages(block[rows])
+	with np.errstate(invalid='ignore'):
+		mean = np.nanmean(np.where(np.isnan(x).all(axis=0), 0, x), axis=0)
+	x = np.where(np.isnan(x), mean, x)
+	constant = x.std(axis=0) == 0
+
+	#The model without the variants is fitted once and used as the start of all the models
+	null = fitLogistic(design, y, np.zeros((len(rows), 1)))[0][0, :-1]
+	beta, covariance = fitLogistic(design, y, x, null)
+	with np.errstate(invalid='ignore'):
+		se = np.sqrt(covariance[:, -1, -1])
+		pvalue = stats.chi2.sf((beta[:, -1] / se) ** 2, 1)
+	return np.where(constant, 0.0, beta[:, -1]), np.where(constant, np.nan, se), np.where(constant, 1.0, pvalue)
+
+TESTS = {'chi2': (chiSquaredBlock, ['chi2', 'dof', 'pval']), 'normality': (normalityBlock, ['k2', 'pval']),
+	'trend': (trendBlock, ['chi2', 'pval']), 'logistic': (logisticBlock, ['beta', 'se', 'pval'])}
+WORKER = {} # Matrix, labels and test of the worker processes (see attachMatrix)
+
+
+def sharedMatrix(data, position, chunksize=1000):
+	"""Copies the variants of a dataset to a matrix in a temporary .npy file, with one variant per \
+		row, so that the workers map the same pages and each block of variants is contiguous. The \
+		file is created in /dev/shm when it has space for it.
+
+	Arguments:
+		data {pandas.Dataframe} -- Numeric dataset.
+		position {numpy.ndarray} -- Positions of the columns of the variants.
+
+	Keyword Arguments:
+		chunksize {int} -- Number of variants copied at once. (default: {1000})
+
+	Returns:
+		string -- Path to the matrix (variants x samples).
+	"""
+	size = 8 * len(data) * len(position)
+	shm = '/dev/shm' if os.path.isdir('/dev/shm') else None
+	if shm:
+		stat = os.statvfs(shm)
+		if stat.f_bavail * stat.f_frsize < 2 * size: shm = None
+	folder = tempfile.mkdtemp(prefix='association_', dir=shm)
+	path = os.path.join(folder, 'matrix.npy')
+	matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(len(position), len(data)))
+	for start in range(0, len(position), chunksize):
+		matrix[start:start+chunksize] = data.iloc[:, position[start:start+chunksize]].to_numpy(dtype=np.float64).T
+	matrix.flush()
+	del matrix
+	return path
+
+def attachMatrix(path, codes, nLabels, test, covariates=None):
+	"""Initializer of the worker processes: maps the shared matrix.
+
+	Arguments:
+		path {string} -- Path to the matrix (see sharedMatrix).
+		codes {numpy.ndarray} -- Index of the label of each sample.
+		nLabels {int} -- Number of labels.
+		test {string} -- Name of the test in TESTS.
+
+	Keyword Arguments:
+		covariates {numpy.ndarray} -- Covariates of the samples. (default: {None})
+	"""
+	WORKER.update({'matrix': np.load(path, mmap_mode='r'), 'codes': codes, 'nLabels': nLabels, 'test': test,
+		'covariates': covariates})
+
+def testBlock(job):
+	"""Worker that tests a block of rows of the shared matrix.
+
+	Arguments:
+		job {tuple} -- First and last (exclusive) variant of the block.
+
+	Returns:
+		tuple -- First variant of the block and the results of the test.
+	"""
+	start, end = job
+	block = np.ascontiguousarray(WORKER['matrix'][start:end].T)
+	return start, TESTS[WORKER['test']][0](block, WORKER['codes'], WORKER['nLabels'], WORKER['covariates'])
+
+def runTest(data, test, processes=None, blockSize=BLOCK_SIZE, covariates=None):
+	"""Runs a test over all the variants of a dataset, by blocks of variants. With more than one \
+		process, numeric datasets are copied once to a shared memory-mapped matrix and the blocks \
+		are tested by a pool of processes that map it, instead of receiving pickled slices.
+
+	Arguments:
+		data {pandas.Dataframe} -- Dataset with the variants in the columns and the labels in a \
+		column called labels.
+		test {string} -- Name of the test in TESTS (chi2, normality, trend or logistic).
+
+	Keyword Arguments:
+		processes {int} -- Number of processes. (default: {None}, one per CPU)
+		blockSize {int} -- Number of genotypes tested at once. (default: {BLOCK_SIZE})
+		covariates {numpy.ndarray} -- Covariates of the samples, used by the logistic regression \
+		(see readCovariates). (default: {None})
+
+	Returns:
+		pandas.Dataframe -- Variant and results of each variant, in the order of the columns.
+	"""
+	function, names = TESTS[test]
+	position = np.flatnonzero(data.columns != 'labels')
+	codes, classes = labelCodes(data['labels'].values) if 'labels' in data else (None, [])
+	results = [np.zeros(len(position), dtype=np.int64 if n == 'dof' else np.float64) for n in names]
+	step = max(1, blockSize // max(len(data), 1))
+	jobs = [(start, min(start + step, len(position))) for start in range(0, len(position), step)]
+	numeric = all([pd.api.types.is_numeric_dtype(t) for t in data.dtypes.iloc[position]])
+	if not processes: processes = os.cpu_count() or 1
+	processes = min(processes, len(jobs))
+
+	if processes > 1 and numeric:
+		path = sharedMatrix(data, position)
+		try:
+			with multiprocessing.Pool(processes, attachMatrix, (path, codes, len(classes), test, covariates)) as pool:
+				for start, result in pool.imap_unordered(testBlock, jobs):
+					for array, values in zip(results, result): array[start:start+len(values)] = values
+		finally:
+			shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+	else:
+		for start, end in jobs:
+			block = data.iloc[:, position[start:end]].to_numpy()
+			for array, values in zip(results, function(block, codes, len(classes), covariates)): array[start:end] = values
+
+	table = pd.DataFrame(dict(zip(names, results)))
+	table.insert(0, 'Variant', list(data.columns[position]))
+	return table
+
+def chiSquaredTest(data, processes=None, blockSize=BLOCK_SIZE):
+	"""Tests the association of each variant with the labels (see runTest).
+
+	Returns:
+		pandas.Dataframe -- Variant, chi2, dof and pval of each variant, in the order of the columns.
+	"""
+	return runTest(data, 'chi2', processes, blockSize)
+
+def normalityTest(data, processes=None, blockSize=BLOCK_SIZE):
+	"""Tests the normality of the genotypes of each variant (see runTest); the skewness and \
+		kurtosis of all the columns of a block are computed at once.
+
+	Returns:
+		pandas.Dataframe -- Variant, k2 and pval of each variant, in the order of the columns. \
+		Variants with missing values have a NaN p-value, as in stats.normaltest.
+	"""
+	return runTest(data, 'normality', processes, blockSize)
+
+def readCovariates(path, samples):
+	"""Reads the covariates of the samples, like principal components and sex, from a csv file with \
+		a header and one row per sample, in the order of the rows of the dataset. Columns that are \
+		not numeric, like the names of the samples, are not used.
+
+	Arguments:
+		path {string} -- Path to the csv file.
+		samples {int} -- Number of samples of the dataset.
+
+	Returns:
+		numpy.ndarray -- Covariates (samples x covariates).
+	"""
+	table = pd.read_csv(path).select_dtypes('number')
+	if len(table) != samples:
+		raise ValueError('The covariates file has {} rows but the dataset has {} samples'.format(len(table), samples))
+	print('>>> Covariates: {}'.format(', '.join([str(c) for c in table.columns])))
+	return table.to_numpy(dtype=np.float64)
+
+def permutedLabels(codes, permutations, seed=0):
+	"""Creates the permuted labels.
+
+	Arguments:
+		codes {numpy.ndarray} -- Index of the label of each sample (0 or 1).
+		permutations {int} -- Number of permutations.
+
+	Keyword Arguments:
+		seed {int} -- Seed of the permutations. (default: {0})
+
+	Returns:
+		numpy.ndarray -- Labels of each permutation (permutations x samples).
+	"""
+	rng = np.random.default_rng(seed)
+	labels = np.empty((permutations, len(codes)), dtype=np.uint8)
+	for i in range(permutations): labels[i] = rng.permutation(codes)
+	return labels
+
+def permutedStatistics(block, labels, test):
+	"""Computes the statistics and p-values of a block of variants for many label vectors at once. \
+		The statistics only depend on the counts of the cases, which are matrix products with the \
+		labels, and on counts that are the same in every permutation.
+
+	Arguments:
+		block {numpy.ndarray} -- Genotypes (samples x variants).
+		labels {numpy.ndarray} -- Labels (samples x permutations), 1 for the cases.
+		test {string} -- chi2 or trend.
+
+	Returns:
+		tuple -- Statistics and p-values (variants x permutations); the chi2 test of variants \
+		without integer values is NaN.
+	"""
+	block = block.astype(np.float64)
+	valid = ~np.isnan(block)
+	Y = labels.astype(np.float32)
+	n = valid.sum(axis=0).astype(np.float64)[:, None]
+	cases = (valid.T.astype(np.float32) @ Y).astype(np.float64)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		if test == 'chi2':
+			#Pearson statistic of a table with two labels: N^2/(R*S) * sum over the values of (O1 - E1)^2 / n_c
+			counted = integerColumns(block)
+			low = np.fmin.reduce(block, axis=0)
+			values = np.where(valid & counted, block - np.where(np.isnan(low), 0, low), -1).astype(np.int64)
+			total, rows = np.zeros(cases.shape), np.zeros((block.shape[1], 1))
+			for c in range(int(values.max(initial=-1)) + 1):
+				indicator = values == c
+				size = indicator.sum(axis=0).astype(np.float64)[:, None]
+				if not size.any(): continue
+				observed = (indicator.T.astype(np.float32) @ Y).astype(np.float64)
+				total += np.where(size > 0, (observed - size * cases / n) ** 2 / size, 0)
+				rows += size > 0
+			controls = n - cases
+			dof = np.where((cases > 0) & (controls > 0), rows - 1, 0)
+			statistic = np.where(dof > 0, n ** 2 / (cases * controls) * total, 0.0)
+			pvalue = np.where(dof > 0, stats.chi2.sf(statistic, np.maximum(dof, 1)), 1.0)
+			statistic[~counted], pvalue[~counted] = np.nan, np.nan
+		else:
+			x = np.where(valid, dosages(block), 0)
+			sx, sxx = x.sum(axis=0)[:, None], (x * x).sum(axis=0)[:, None]
+			sxy = (x.T.astype(np.float32) @ Y).astype(np.float64)
+			den = (n * sxx - sx ** 2) * (n * cases - cases ** 2)
+			statistic = np.where(den > 0, n * (n * sxy - sx * cases) ** 2 / den, 0.0)
+			pvalue = np.where(den > 0, stats.chi2.sf(statistic, 1), 1.0)
+	return statistic, pvalue
+
+def permutationBlock(block, codes, labels, test, batch):
+	"""Compares the statistics of a block of variants with the ones of the permuted labels.
+
+	Arguments:
+		block {numpy.ndarray} -- Genotypes (samples x variants).
+		codes {numpy.ndarray} -- Labels of the samples (0 or 1).
+		labels {numpy.ndarray} -- Permuted labels (permutations x samples).
+		test {string} -- chi2 or trend.
+		batch {int} -- Number of permutations computed at once.
+
+	Returns:
+		tuple -- p-value of each variant, number of permutations with a statistic at least as \
+		large as the observed one for each variant, and smallest p-value of the block in each \
+		permutation.
+	"""
+	statistic, pvalue = [v[:, 0] for v in permutedStatistics(block, codes[:, None], test)]
+	exceed = np.zeros(block.shape[1], dtype=np.int64)
+	smallest = np.ones(len(labels))
+	for start in range(0, len(labels), batch):
+		permuted, permutedP = permutedStatistics(block, labels[start:start+batch].T, test)
+		#Ties are common in discrete statistics, so a small tolerance avoids rounding differences
+		exceed += (permuted >= statistic[:, None] * (1 - 1e-9)).sum(axis=1)
+		smallest[start:start+batch] = np.fmin.reduce(np.vstack([permutedP, np.ones((1, permutedP.shape[1]))]), axis=0)
+	return pvalue, exceed, smallest
+
+def attachPermutations(path, codes, test, batch):
+	"""Initializer of the worker processes of the permutations: maps the shared matrix and the \
+		permuted labels saved next to it.
+
+	Arguments:
+		path {string} -- Path to the matrix (see sharedMatrix).
+		codes {numpy.ndarray} -- Labels of the samples (0 or 1).
+		test {string} -- chi2 or trend.
+		batch {int} -- Number of permutations computed at once.
+	"""
+	WORKER.update({'matrix': np.load(path, mmap_mode='r'), 'codes': codes, 'test': test, 'batch': batch,
+		'labels': np.load(os.path.join(os.path.dirname(path), 'labels.npy'), mmap_mode='r')})
+
+def permuteBlock(job):
+	"""Worker that runs the permutations of a block of rows of the shared matrix.
+
+	Arguments:
+		job {tuple} -- First and last (exclusive) variant of the block.
+
+	Returns:
+		tuple -- First variant of the block and the results of permutationBlock.
+	"""
+	start, end = job
+	block = np.ascontiguousarray(WORKER['matrix'][start:end].T)
+	return start, permutationBlock(block, WORKER['codes'], WORKER['labels'], WORKER['test'], WORKER['batch'])
+
+def permutationTest(data, test, permutations=1000, seed=0, processes=None, memory=MEMORY, blockSize=BLOCK_SIZE, alpha=0.05):
+	"""Repeats a test with permuted labels to compute empirical p-values. The variants are split \
+		in blocks, tested by a pool of processes that map one shared copy of the matrix and of the \
+		permuted labels, and the permutations of each block are computed in batches that fit in \
+		the memory given to each process.
+
+	Arguments:
+		data {pandas.Dataframe} -- Numeric dataset with the variants in the columns and two labels \
+		in a column called labels.
+		test {string} -- chi2 or trend.
+
+	Keyword Arguments:
+		permutations {int} -- Number of permutations. (default: {1000})
+		seed {int} -- Seed of the permutations. (default: {0})
+		processes {int} -- Number of processes. (default: {None}, one per CPU)
+		memory {int} -- Memory, in MB, used by the permutations of all the processes. (default: {MEMORY})
+		blockSize {int} -- Number of genotypes tested at once. (default: {BLOCK_SIZE})
+		alpha {float} -- Family-wise error rate of the threshold. (default: {0.05})
+
+	Returns:
+		tuple -- Table with the Variant, pval, empirical (permutation p-value of the variant) and \
+		adjusted (family-wise p-value, from the smallest p-value of each permutation) of each \
+		variant, and the genome-wide threshold: the p-value below which a variant is significant \
+		at alpha (the alpha quantile of the smallest p-values, i.e. the 1-alpha quantile of the \
+		maximum statistic).
+	"""
+	if test not in PERMUTATION_TESTS: raise ValueError('Permutations are not available for the {} test'.format(test))
+	position = np.flatnonzero(data.columns != 'labels')
+	codes, classes = labelCodes(data['labels'].values)
+	if len(classes) != 2: raise ValueError('Permutations need two labels, not {}'.format(len(classes)))
+	if not all([pd.api.types.is_numeric_dtype(t) for t in data.dtypes.iloc[position]]):
+		raise ValueError('Permutations need a numeric dataset')
+	codes = codes.astype(np.uint8)
+	labels = permutedLabels(codes, permutations, seed)
+
+	step = max(1, blockSize // max(len(data), 1))
+	jobs = [(start, min(start + step, len(position))) for start in range(0, len(position), step)]
+	if not processes: processes = os.cpu_count() or 1
+	processes = min(processes, len(jobs))
+	#Arrays of each permutation: about 8 variants x values matrices of 8 bytes, and the labels
+	batch = int(max(1, min(permutations, memory * 2**20 / processes // (64 * step + 4 * len(data)))))
+	print('>>> {} permutations in batches of {}, {} blocks of {} variants, {} processes'.format(
+		permutations, batch, len(jobs), step, processes))
+
+	pvalue, exceed = np.full(len(position), np.nan), np.zeros(len(position), dtype=np.int64)
+	smallest = np.ones(permutations)
+	def merge(start, result):
+		pvalue[start:start+len(result[0])], exceed[start:start+len(result[0])] = result[0], result[1]
+		np.minimum(smallest, result[2], out=smallest)
+
+	if processes > 1:
+		path = sharedMatrix(data, position)
+		np.save(os.path.join(os.path.dirname(path), 'labels.npy'), labels)
+		try:
+			with multiprocessing.Pool(processes, attachPermutations, (path, codes, test, batch)) as pool:
+				for start, result in pool.imap_unordered(permuteBlock, jobs): merge(start, result)
+		finally:
+			shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+	else:
+		for start, end in jobs:
+			merge(start, permutationBlock(data.iloc[:, position[start:end]].to_numpy(dtype=np.float64), codes, labels, test, batch))
+
+	ordered = np.sort(smallest)
+	tested = ~np.isnan(pvalue)
+	adjusted = np.full(len(position), np.nan)
+	adjusted[tested] = (1 + np.searchsorted(ordered, pvalue[tested] * (1 + 1e-9), side='right')) / (permutations + 1)
+	empirical = np.where(tested, (1 + exceed) / (permutations + 1), np.nan)
+	table = pd.DataFrame({'Variant': list(data.columns[position]), 'pval': pvalue, 'empirical': empirical,
+		'adjusted': adjusted})
+	return table, float(np.quantile(smallest, alpha))
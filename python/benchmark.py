@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+'''
+# File: benchmark.py
+# Created Date: Sunday October 18th 2026
+# Author: Debora Antunes
+# -----
+# Last Modified: Sunday, October 18th 2026, 6:40:12 pm
+# -----
+'''
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PYTHON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must not be loaded by the startup of the commands below
+HEAVY = ['rpy2', 'pyensembl', 'sklearn', 'matplotlib', 'seaborn', 'lightgbm']
+
+# Code run by each startup check and its budget, in seconds. 'main' is the cost paid by every call
+# of main.py before the options are used; the others add the modules of the VCF parsing and the merge.
+STARTUP = {
+	'main': ('import main', 1.5),
+	'vcf': ('import main, vcfParser', 1.5),
+	'merge': ('import main, variantSelection', 1.5),
+	'pipeline': ('import pipeline', 0.5)}
+
+# Synthetic cohorts of the stage benchmarks (see synthetic.generateCohort)
+SCALES = {
+	'small': {'cases': 50, 'controls': 200, 'variants': 5000},
+	'medium': {'cases': 200, 'controls': 1000, 'variants': 50000},
+	'large': {'cases': 500, 'controls': 2500, 'variants': 200000}}
+
+# Stages timed in each scale, in the order of the pipeline; each one uses the outputs of the previous ones
+STAGES = ['generate', 'readFile', 'translateGT', 'mainAll', 'loadData', 'mergeAll', 'doImputation',
+	'chiSquaredTest', 'addGenes', 'reduceFeatures', 'plotRocCurve']
+
+
+def timeStartup(code, repeat=5):
+	"""Runs python code in new interpreters, from the python folder, and measures the time until it ends.
+
+	Arguments:
+		code {string} -- Code to run.
+
+	Keyword Arguments:
+		repeat {int} -- Number of runs. (default: {5})
+
+	Returns:
+		dict -- Median and minimum time of the runs, in seconds, and the heavy modules that were loaded.
+	"""
+	check = code + '\nimport sys, json\nprint(json.dumps([m for m in {} if m in sys.modules]))'.format(HEAVY)
+	times, loaded = [], []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		result = subprocess.run([sys.executable, '-c', check], cwd=PYTHON_DIR, stdout=subprocess.PIPE,
+			stderr=subprocess.PIPE, universal_newlines=True)
+		times.append(time.perf_counter() - start)
+		if result.returncode != 0:
+			raise RuntimeError('{} failed:\n{}'.format(code, result.stderr))
+		loaded = json.loads(result.stdout.strip().splitlines()[-1])
+	return {'median': statistics.median(times), 'min': min(times), 'heavy': loaded}
+
+def startup(repeat=5, factor=1.0):
+	"""Measures the startup of main.py and of the commands that must start fast.
+
+	Keyword Arguments:
+		repeat {int} -- Number of runs of each check. (default: {5})
+		factor {float} -- Multiplies the budgets, for slower machines. (default: {1.0})
+
+	Returns:
+		dict -- Results of each check (see timeStartup), with its budget and if it passed.
+	"""
+	results = {}
+	for name, (code, budget) in STARTUP.items():
+		result = timeStartup(code, repeat)
+		result['budget'] = budget * factor
+		result['passed'] = result['median'] <= result['budget'] and not result['heavy']
+		results[name] = result
+	return results
+
+def makeTree():
+	"""Creates a temporary copy of the folders used by the pipeline, so that '../../data' is resolved \
+		from its src/python folder.
+
+	Returns:
+		string -- Path to the temporary tree.
+	"""
+	root = tempfile.mkdtemp(prefix='benchmark_')
+	os.makedirs(os.path.join(root, 'src', 'python', 'pickle'))
+	for folder in ['vcf/cases', 'vcf/controls', 'datasets/chr', 'variants', 'genes', 'figures/benchmark']:
+		os.makedirs(os.path.join(root, 'data', folder))
+	return root
+
+def stages(scale, seed=0, processes=None, keep=False):
+	"""Runs the stages of the pipeline on a synthetic cohort, in a temporary tree, and measures each \
+		one with the profiler (wall and CPU time, peak memory, rows and bytes read and written). The \
+		output of the stages is hidden; a stage that fails is recorded with its error and the \
+		following ones still run.
+
+	Arguments:
+		scale {string} -- Name of the cohort in SCALES.
+
+	Keyword Arguments:
+		seed {int} -- Seed of the cohort. (default: {0})
+		processes {int} -- Number of processes used to parse the VCF files. (default: {None}, one per CPU)
+		keep {bool} -- Keeps the temporary tree. (default: {False})
+
+	Returns:
+		dict -- Size of the cohort, records of the stages and records of the profiled functions.
+	"""
+	import pandas as pd
+	import profiler
+	import synthetic
+	import vcfParser
+	import variantSelection
+	import geneSelection
+	import featureExtraction
+	import plots
+
+	root = makeTree()
+	cwd = os.getcwd()
+	os.chdir(os.path.join(root, 'src', 'python'))
+	profiler.reset()
+	profiler.enable()
+	cohort, errors = None, {}
+
+	def measure(name, function, *args):
+		print('>>> [{}] {}...'.format(scale, name))
+		try:
+			with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null), contextlib.redirect_stderr(null):
+				with profiler.stage(name): return function(*args)
+		except Exception as e:
+			errors[name] = '{}: {}'.format(type(e).__name__, e)
+			print('>>> [{}] {} failed with {}'.format(scale, name, errors[name]))
+
+	try:
+		cohort = measure('generate', synthetic.generateCohort, '../../data', SCALES[scale]['cases'],
+			SCALES[scale]['controls'], SCALES[scale]['variants'], synthetic.CHROMOSOMES, seed)
+		cases = '../../data/' + synthetic.CASES
+		controls = '../../data/' + synthetic.CONTROLS
+		measure('readFile', vcfParser.readFile, None, cases.format('1'), 'cases', '1', False)
+		if os.path.isfile('../../data/vcf/cases/output_1.csv.gz'):
+			data = pd.read_csv('../../data/vcf/cases/output_1.csv.gz', sep='\t', dtype=str, quoting=3)
+			measure('translateGT', vcfParser.translateGT, data)
+
+		def parse():
+			vcfParser.mainAll('cases', cases, None, processes)
+			vcfParser.mainAll('controls', controls, '../../data/' + synthetic.SAMPLES, processes)
+		measure('mainAll', parse)
+		measure('loadData', lambda: [variantSelection.loadData(c, '../../data/vcf/cases/outputPandas_{}.csv.gz'.format(c),
+			'../../data/vcf/controls/outputPandas_{}.csv.gz'.format(c)) for c in synthetic.CHROMOSOMES])
+		measure('mergeAll', variantSelection.mergeAll)
+
+		data = None
+		if os.path.isfile('../../data/datasets/merged_dataset.csv.gz'):
+			data = measure('doImputation', variantSelection.doImputation,
+				pd.read_csv('../../data/datasets/merged_dataset.csv.gz', compression='gzip'), 'most_frequent')
+		if data is not None:
+			measure('chiSquaredTest', geneSelection.chiSquaredTest, data)
+			genes = pd.read_csv('../../data/genes/geneList.csv')
+			data = measure('addGenes', geneSelection.addGenes, data, genes[genes['Variants'].isin(data.columns)], 'Genes')
+		if data is not None:
+			measure('reduceFeatures', featureExtraction.reduceFeatures, data, 'risk')
+		if os.path.isfile('../../data/datasets/reduced_dataset_risk.csv.gz'):
+			data = pd.read_csv('../../data/datasets/reduced_dataset_risk.csv.gz', compression='gzip')
+			measure('plotRocCurve', plots.plotRocCurve, data.iloc[:,:-1].values,
+				pd.to_numeric(data.iloc[:,-1]).values.ravel(), 'nb', 'benchmark')
+	finally:
+		os.chdir(cwd)
+		profiler.ENABLED = False
+		if keep: print('>>> [{}] Files kept in {}'.format(scale, root))
+		else: shutil.rmtree(root, ignore_errors=True)
+
+	records = {}
+	for record in profiler.STAGES:
+		record = dict(record)
+		if record['name'] in errors: record['error'] = errors[record['name']]
+		records[record.pop('name')] = record
+	for name in STAGES:
+		if name not in records: records[name] = {'skipped': True}
+	return {'cohort': cohort or SCALES[scale], 'stages': records, 'functions': dict(profiler.FUNCTIONS)}
+
+def version():
+	"""Identifies the version of the code, to key the results of the benchmarks.
+
+	Returns:
+		string -- Output of git describe (with -dirty when there are changes), or 'unknown'.
+	"""
+	try:
+		result = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=PYTHON_DIR,
+			stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+		return result.stdout.strip() or 'unknown'
+	except OSError:
+		return 'unknown'
+
+def saveHistory(results, path, label):
+	"""Adds the results of a run to the results of the previous versions.
+
+	Arguments:
+		results {dict} -- Results of the run.
+		path {string} -- JSON file with the results of each version.
+		label {string} -- Version of the results; results with the same version are replaced.
+
+	Returns:
+		dict -- Results of each version, in the order they were first saved.
+	"""
+	history = {}
+	if os.path.isfile(path):
+		with open(path) as f: history = json.load(f)
+	history[label] = dict(results, date=datetime.datetime.now().isoformat(timespec='seconds'))
+	if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+	with open(path + '.part', 'w') as f: json.dump(history, f, indent=1)
+	os.replace(path + '.part', path)
+	return history
+
+def compare(current, baseline):
+	"""Prints the wall time of each stage against the one of a previous version.
+
+	Arguments:
+		current {dict} -- Results of the stage benchmarks of the run, by scale.
+		baseline {dict} -- Results of the stage benchmarks of the previous version, by scale.
+	"""
+	for scale, result in current.items():
+		previous = baseline.get(scale, {}).get('stages', {})
+		for name, record in result['stages'].items():
+			if 'wall' not in record: continue
+			line = '>>> {:<7} {:<15} {:8.3f}s'.format(scale, name, record['wall'])
+			if previous.get(name, {}).get('wall'):
+				line += ' ({:8.3f}s, x{:.2f})'.format(previous[name]['wall'], record['wall'] / previous[name]['wall'])
+			print(line + (' FAILED' if 'error' in record else ''))
+
+
+def main():
+	arg_parser = argparse.ArgumentParser(description = 'Benchmarks of the pipeline')
+	arg_parser.add_argument('-r','--repeat', type = int, default = 5,
+				help = 'Number of runs of each startup check')
+	arg_parser.add_argument('-f','--factor', type = float, default = 1.0,
+				help = 'Multiplies the time budgets, for slower machines')
+	arg_parser.add_argument('-o','--output', type = str,
+				help = 'Saves the results in a JSON file')
+	arg_parser.add_argument('-s','--scales', type = str, nargs='*', choices = list(SCALES),
+				help = 'Also times each stage of the pipeline on synthetic cohorts of these sizes')
+	arg_parser.add_argument('--seed', type = int, default = 0,
+				help = 'Seed of the synthetic cohorts')
+	arg_parser.add_argument('-j','--jobs', type = int,
+				help = 'Number of processes used to parse the VCF files (default: one per CPU)')
+	arg_parser.add_argument('--keep', action = 'store_true',
+				help = 'Keeps the temporary folders of the synthetic cohorts')
+	arg_parser.add_argument('--version', type = str,
+				help = 'Version of the results (default: git describe)')
+	arg_parser.add_argument('--history', type = str, default = '../../data/results/benchmark.json',
+				help = 'JSON file with the results of the stages of each version')
+	arg_parser.add_argument('-b','--baseline', type = str,
+				help = 'Version compared with the results of the stages (default: the last one saved before)')
+	args = arg_parser.parse_args()
+
+	results = {'startup': startup(args.repeat, args.factor)}
+	for name, r in results['startup'].items():
+		print('>>> {:<10} {:6.3f}s (min {:.3f}s, budget {:.2f}s){}{}'.format(name, r['median'], r['min'], r['budget'],
+			' loads ' + ', '.join(r['heavy']) if r['heavy'] else '', '' if r['passed'] else ' FAILED'))
+
+	if args.scales:
+		results['stages'] = {scale: stages(scale, args.seed, args.jobs, args.keep) for scale in args.scales}
+		label = args.version or version()
+		history = saveHistory(results, args.history, label)
+		previous = [v for v in history if v != label]
+		baseline = args.baseline or (previous[-1] if previous else None)
+		if baseline and baseline not in history: print('>>> Version {} not found in {}'.format(baseline, args.history))
+		print('>>> Stages of {}{}:'.format(label, ' against ' + baseline if baseline in history else ''))
+		compare(results['stages'], history.get(baseline, {}).get('stages', {}))
+
+	if args.output:
+		with open(args.output, 'w') as f: json.dump(results, f, indent=1)
+	if not all([r['passed'] for r in results['startup'].values()]):
+		print('>>> Startup over budget!')
+		sys.exit(1)
+
+if __name__ == '__main__':
+	main()
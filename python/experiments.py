@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+'''
+# File: experiments.py
+# Created Date: Sunday October 18th 2026
+# Author: Debora Antunes
+# -----
+# Last Modified: Sunday, October 18th 2026, 7:55:03 pm
+# -----
+'''
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import genotypeStore
+import workspace
+
+'''
+Runs the models of many datasets in one process (see bash/plots.sh). The experiments are described \
+in a JSON file:
+
+	{"folds": 5, "seed": 0, "featuresSel": true,
+	 "datasets": ["../../data/datasets/top_dataset_network.csv.gz", ...],
+	 "classifiers": {"svm": [["C:0.25", "kernel:linear", ...], ...], "nb": [[]], ...}}
+
+Each classifier has a list of hyperparameter sets, in the format of main.py -g; an empty set runs \
+the grid search of the model in each fold, like main.py -c without -g. A single set can also be given \
+as a list of strings.
+
+Each dataset is loaded once and split once in stratified folds, which are used by all the \
+classifiers, so their results are paired. The fits of every dataset, classifier, hyperparameters and \
+fold are independent and run in a pool of processes; the results are saved in one table with the \
+mean and standard deviation of the metrics of each experiment.
+'''
+
+DATASETS = {} # Datasets of the experiments (X, y, columns), shared with the processes of the pool
+
+
+def loadDataset(path):
+	"""Loads a dataset as main.py -d or -w: a csv.gz file, a genotype store or a workspace.
+
+	Arguments:
+		path {string} -- Path to the dataset.
+
+	Returns:
+		pandas.Dataframe -- Dataset, with the labels in the last column.
+	"""
+	if workspace.isWorkspace(path): return workspace.load(path)
+	if genotypeStore.isStore(path): return genotypeStore.GenotypeStore(path).toFrame()
+	return pd.read_csv(path, compression = 'gzip')
+
+def datasetName(path):
+	"""Name of the dataset used in the figures, as in main.py (top_dataset_pval is pval, \
+		reduced_dataset_pval is all_pval).
+
+	Arguments:
+		path {string} -- Path to the dataset.
+
+	Returns:
+		string -- Name of the dataset.
+	"""
+	name = os.path.basename(path.rstrip('/')).split('.')[0]
+	if name.startswith('top_dataset_'): return name[12:]
+	if name.startswith('reduced_dataset_'):
+		name = name[16:]
+		return 'all_' + name if name in ['pval', 'network'] else name
+	return name
+
+def readSpec(path):
+	"""Reads the JSON file of the experiments.
+
+	Arguments:
+		path {string} -- Path to the file.
+
+	Returns:
+		dict -- Folds, seed, featuresSel, datasets and the list of hyperparameter sets of each classifier.
+	"""
+	with open(path) as f: spec = json.load(f)
+	spec.setdefault('folds', 5)
+	spec.setdefault('seed', 0)
+	spec.setdefault('featuresSel', True)
+	for classifier, params in spec['classifiers'].items():
+		if not params or isinstance(params[0], str): spec['classifiers'][classifier] = [params]
+	return spec
+
+def selectFeatures(path):
+	"""Runs the feature selection of main.py -c in a dataset, saving the ranking of its features.
+
+	Arguments:
+		path {string} -- Path to the dataset.
+	"""
+	import models
+
+	X, y, columns = DATASETS[path]
+	models.featuresSel(pd.DataFrame(X, columns=columns, copy=False), pd.Series(y), datasetName(path))
+
+def fitFold(job):
+	"""Fits a model in one fold and evaluates it in the test samples.
+
+	Arguments:
+		job {tuple} -- Path to the dataset, classifier, hyperparameters, fold, train and test indexes.
+
+	Returns:
+		dict -- Experiment, fold, accuracy, F1 score (macro), ROC AUC and time of the fit.
+	"""
+	import models
+	from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+	path, classifier, params, fold, train, test = job
+	X, y, _ = DATASETS[path]
+	best = models.parseParameters(params) if params else False
+	start = time.time()
+	if classifier == 'svm': model, prev = models.trainSvm(X[train], y[train], X[test], y[test], best)
+	elif classifier == 'tree': model, prev = models.trainTree(X[train], y[train], X[test], y[test], best)
+	elif classifier == 'knn': model, prev = models.trainKnn(X[train], y[train], X[test], y[test], best)
+	elif classifier == 'log': model, prev = models.trainLog(X[train], y[train], X[test], y[test], best)
+	elif classifier == 'rf': model, prev = models.trainRf(X[train], y[train], X[test], y[test], best)
+	elif classifier == 'nb': model, prev = models.trainNb(X[train], y[train], X[test], y[test])
+	else: raise ValueError('The classifier chosen is not valid: {}'.format(classifier))
+	seconds = time.time() - start
+
+	# Same scores used by the ROC curves of plots.plotRocCurve
+	if hasattr(model, 'decision_function'): scores = model.decision_function(X[test])
+	else: scores = model.predict_proba(X[test])[:, 1]
+	return {'dataset': path, 'classifier': classifier, 'params': ' '.join(params), 'fold': fold,
+		'accuracy': accuracy_score(y[test], prev), 'f1': f1_score(y[test], prev, average='macro'),
+		'auc': roc_auc_score(y[test], scores), 'seconds': seconds}
+
+def runExperiments(spec, processes=None):
+	"""Runs the experiments: loads and splits each dataset once and, in a pool of processes, runs the \
+		feature selection of main.py -c once per dataset, when enabled, and fits every fold.
+
+	Arguments:
+		spec {dict} -- Experiments (see readSpec).
+
+	Keyword Arguments:
+		processes {int} -- Number of processes. (default: {None}, the number of CPUs)
+
+	Returns:
+		pandas.Dataframe -- Results of each fold.
+	"""
+	from sklearn.model_selection import StratifiedKFold
+
+	jobs = []
+	for path in spec['datasets']:
+		print('>>> Loading {}...'.format(path))
+		data = loadDataset(path)
+		X = np.ascontiguousarray(data.iloc[:,:-1].values, dtype=np.float64)
+		y = pd.to_numeric(data.iloc[:,-1]).values.ravel()
+		DATASETS[path] = (X, y, list(data.columns[:-1]))
+		del data
+
+		skf = StratifiedKFold(n_splits=spec['folds'], shuffle=True, random_state=spec['seed'])
+		folds = list(skf.split(X, y))
+		for classifier, sets in spec['classifiers'].items():
+			for params in sets:
+				jobs.extend([(path, classifier, params, i, train, test) for i, (train, test) in enumerate(folds)])
+
+	selected = spec['datasets'] if spec['featuresSel'] else []
+	print('>>> Fitting {} models...'.format(len(jobs)))
+	# The datasets are inherited by the processes of the pool instead of being sent with each job. The
+	# feature selection (LightGBM, with OpenMP threads) runs inside the pool, since forking a process
+	# that already started OpenMP threads can hang
+	context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+	if processes == 1 or context is None:
+		for path in selected: selectFeatures(path)
+		results = [fitFold(job) for job in jobs]
+	else:
+		with context.Pool(processes) as pool:
+			pool.map(selectFeatures, selected, chunksize=1)
+			results = pool.map(fitFold, jobs, chunksize=1)
+	return pd.DataFrame(results)
+
+def summarize(results):
+	"""Joins the results of the folds of each experiment.
+
+	Arguments:
+		results {pandas.Dataframe} -- Results of each fold (see runExperiments).
+
+	Returns:
+		pandas.Dataframe -- Mean and standard deviation of the metrics, and the total time, of each experiment.
+	"""
+	groups = results.groupby(['dataset', 'classifier', 'params'], sort=False)
+	table = groups[['accuracy', 'f1', 'auc']].agg(['mean', 'std'])
+	table.columns = ['{}_{}'.format(m, s) for m, s in table.columns]
+	table['folds'] = groups.size()
+	table['seconds'] = groups['seconds'].sum()
+	return table.reset_index()
+
+
+def main():
+	arg_parser = argparse.ArgumentParser(description = 'Runs the models of many datasets in one process')
+	arg_parser.add_argument('spec', type = str,
+				help = 'JSON file with the datasets, classifiers and hyperparameters')
+	arg_parser.add_argument('-j','--jobs', type = int,
+				help = 'Number of processes used to fit the models (default: number of CPUs)')
+	arg_parser.add_argument('-o','--output', type = str, default = '../../data/results/experiments.csv',
+				help = 'Path to the table with the results')
+	arg_parser.add_argument('--folds', action = 'store_true',
+				help = 'Saves the results of each fold instead of their mean and standard deviation')
+	args = arg_parser.parse_args()
+
+	results = runExperiments(readSpec(args.spec), args.jobs)
+	table = results if args.folds else summarize(results)
+	print(table)
+	print('>>> Writing csv...')
+	if os.path.dirname(args.output): os.makedirs(os.path.dirname(args.output), exist_ok=True)
+	table.to_csv(args.output, index=False)
+
+if __name__ == '__main__':
+	main()
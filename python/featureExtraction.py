@@ -13,10 +13,12 @@ import pandas as pd
 import numpy as np
 import pickle
 import csv
+import hashlib
 
 import geneSelection
 import models
 import plots
+import profiler
 
 from sklearn.model_selection import train_test_split
 from sklearn.decomposition import PCA
@@ -28,6 +30,7 @@ from sklearn.manifold import TSNE
 
 from progress.bar import Bar
 
+@profiler.profiled
 def reduceFeatures(data, parameter='pval'):
 	"""For \'pval\': Selects the averaged p value per gene minor than 0.05;
 	For \'risk\': Selects risk genes from a list that also are present in the data
@@ -39,11 +42,16 @@ def reduceFeatures(data, parameter='pval'):
 	"""
 	# Select genes by significance
 	if parameter=='pval':
+		key = pvalKey(data, '../../data/variants/sigVars.csv')
 		try:
 			data_simple = pickle.load(open('pickle/dataPval.p', 'rb'))
-
+			# The pickle is only reused when it was created from the same dataset and p-values
+			data_simple = data_simple['data'] if data_simple['key'] == key else None
 		except:
-			print('>>> File not found, creating file')
+			data_simple = None
+
+		if data_simple is None:
+			print('>>> File not found or outdated, creating file')
 			geneList = pd.read_csv('../../data/variants/sigVars.csv')
 			data_simple = geneSelection.addGenes(data.copy(), geneList, 'pval') #Add p-values
 			index = data_simple.iloc[:,:-1].T
@@ -57,14 +65,12 @@ def reduceFeatures(data, parameter='pval'):
 			data_simple = data_simple.astype({'Genes':str,'pval':float})
 
 			print('>>> Writting pickle...')
-			pickle.dump(data_simple, open('pickle/dataPval.p', 'wb'))
-
-		finally:
-			
-			#Calculates the average pvalue/ number of variants, per gene (if only average: aggfunc=np.mean)
-			# data_simple = data_simple[data_simple['pval']>=1e-19]
-			pvalues = data_simple.groupby('Genes')['pval'].apply(lambda x: x.mean())
-			par = list(pvalues.index[pvalues<=0.05]) #alpha choosen to reduce features
+			pickle.dump({'key': key, 'data': data_simple}, open('pickle/dataPval.p', 'wb'))
+
+		#Calculates the average pvalue/ number of variants, per gene (if only average: aggfunc=np.mean)
+		# data_simple = data_simple[data_simple['pval']>=1e-19]
+		pvalues = data_simple.groupby('Genes')['pval'].apply(lambda x: x.mean())
+		par = list(pvalues.index[pvalues<=0.05]) #alpha choosen to reduce features
 	
 	# Select genes by centrality
 	elif parameter == 'network':
@@ -110,6 +116,25 @@ def reduceFeatures(data, parameter='pval'):
 	print('>>> Writing csv...')
 	features.to_csv('../../data/datasets/reduced_dataset_{}.csv.gz'.format(parameter), index=False, compression = 'gzip')
 
+def pvalKey(data, path):
+	"""Hash of the inputs of the p-values per gene: the variants and genes of the dataset and the \
+		file with the p-values of the variants.
+
+	Arguments:
+		data {pandas.Dataframe} -- Dataset with genes
+		path {string} -- Path to the p-values of the variants
+
+	Returns:
+		string -- Hexadecimal hash
+	"""
+	key = hashlib.sha256()
+	key.update('\t'.join([str(c) for c in data.columns]).encode())
+	key.update('\t'.join([str(g) for g in data.iloc[-1]]).encode())
+	with open(path, 'rb') as f:
+		key.update(f.read())
+	return key.hexdigest()
+
+@profiler.profiled
 def extractFeatures(data, geneGroup, gene, features):
 	"""Creates new features (PDA, LDA, mean and variance) per gene
 	
@@ -140,6 +165,7 @@ def extractFeatures(data, geneGroup, gene, features):
 	features[str(gene) + '_var'] = var
 	return(features)
 	
+@profiler.profiled
 def selectTopFeatures(data, name, value):
 	"""Using the repetion of tree models, selects the top genes to be used in the models.
 	
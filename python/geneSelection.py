@@ -12,52 +12,42 @@ import pandas as pd
 import numpy as np 
 import pickle 
 import csv 
+import json
 
+import association
 import plots 
-
-import pyensembl
-
-from rpy2.robjects.packages import importr
-import rpy2.robjects as ro 
-
-from scipy import stats
+import profiler
 
 from progress.bar import Bar
 
 
-def normalityTest(data):
-	"""Test the normality of each variant; creates a plot
+@profiler.profiled
+def normalityTest(data, processes=None):
+	"""Test the normality of each variant; creates a plot. The columns are tested in blocks \
+	by association.normalityTest
 	
 	Arguments:
 		data {pandas.Dataframe} -- Dataset to test normality
+
+	Keyword Arguments:
+		processes {int} -- Number of processes testing the blocks (default: {None}, one per CPU)
 	"""	
 	print('>>> Testing Normality of Variants...')
-	notNormal = 0
-	Normal = 0
-	plotData = {'chrNo': [], 'posNo': [], 'val': []} #Creates a dataset for the plot
-
-	bar = Bar('Processing', max=len(data.columns[:-1]),suffix='%(percent)d%%')
-	notnormal=[[],[]]
-	for c in data.columns[:-1]:
-		k2, p = stats.normaltest(data[c]) #P-value of the test
-		
-		plotData, hA = createPlotData(plotData, c, p)
-		if hA: Normal += 1
-		else: 
-			notNormal +=1
-			notnormal[0].append(c)
-			notnormal[1].append(p)
-		bar.next()
-	bar.finish()
+	profiler.count(len(data.columns[:-1]))
+	result = association.normalityTest(data, processes)
+
+	plotData, hA = createPlotFrame(result['Variant'].values, result['pval'].values)
+	Normal = int(hA.sum())
+	notNormal = len(hA) - Normal
+	notnormal = result[~hA]
 
-	plotData = pd.DataFrame(data=plotData)
 	print('>>> Writting pickle...')
 	pickle.dump(plotData, open('pickle/plotData_normality.p', 'wb'))
 	plots.plotManhattan(plotData, '_normality')
 	print('Normal: ', Normal)
 	print('Not Normal: ', notNormal)
 	print('>>> Writing txt...')
-	result=zip(notnormal[0],notnormal[1])
+	result=zip(notnormal['Variant'].tolist(),notnormal['pval'].tolist())
 	with open('../../data/variants/notnormal.csv', mode='w', newline='') as f:
 		wr = csv.writer(f)
 		wr.writerow(("Variant", "pval"))
@@ -65,107 +55,131 @@ def normalityTest(data):
 			wr.writerow(item)
 
 
-def chiSquaredTest(data):
-	"""Test if there is no association with the disease; creates a plot
+@profiler.profiled
+def chiSquaredTest(data, processes=None):
+	"""Test if there is no association with the disease; creates a plot. The count tables of \
+	all the variants are built at once by association.chiSquaredTest
 	
 	Arguments:
 		data {pandas.Dataframe} -- Dataset to test
+
+	Keyword Arguments:
+		processes {int} -- Number of processes testing the blocks (default: {None}, one per CPU)
 	"""	
 	print('>>> Testing Significance of Variants...')
-	notSig = 0
-	Sig = 0
-	plotData = {'chrNo': [], 'posNo': [], 'val': []} #Creates a dataset for the plot
-	listSig=[[],[]]
-
-	bar = Bar('Processing', max=len(data.columns[:-1]),suffix='%(percent)d%%')	
-
-	for c in data.columns[:-1]:
-		table = pd.crosstab(data[c], data['labels'])
-		f_obs = np.array(table.values)
-		chi2, p = stats.chi2_contingency(f_obs, correction=False)[0:2]
-
-		listSig[0].append(c)
-		listSig[1].append(p)
-		plotData, hA = createPlotData(plotData, c, p)
-		if hA == True:
-			Sig += 1
-		else:
-			notSig +=1
-		bar.next()
-	bar.finish()
+	profiler.count(len(data.columns[:-1]))
+	result = association.chiSquaredTest(data, processes)
+
+	plotData, hA = createPlotFrame(result['Variant'].values, result['pval'].values)
+	Sig = int(hA.sum())
+	notSig = len(hA) - Sig
 
-	plotData = pd.DataFrame(data=plotData)
 	print('>>> Writting pickle...')
 	pickle.dump(plotData, open('pickle/plotData_chi2.p', 'wb'))
 	plots.plotManhattan(plotData, '_chi2')
 	print('Significant: ', Sig)
 	print('Not Significant: ', notSig)
 	print('>>> Writing txt...')
-	result=zip(listSig[1],listSig[0])
+	result=zip(result['pval'].tolist(),result['Variant'].tolist())
 	with open('../../data/variants/sigVars.csv', mode='w', newline='') as f:
 		wr = csv.writer(f)
 		wr.writerow(("pval", "Variants"))
 		for item in result:
 			wr.writerow(item)
 	
-def createPlotData(plotData, var, p):
-	"""Prepares data to use in the Manhattan plot
-
-	Args:
-		plotData (dict): Dictionary with the information
-		var (string): variant
-		p (float): p-value of the variant
+@profiler.profiled
+def associationTest(data, test, covariates=None, processes=None):
+	"""Test the association of the dosage of each variant with the disease; creates a plot. \
+	'trend' is the Cochran-Armitage trend test and 'logistic' a logistic regression adjusted \
+	by the covariates, both computed by blocks of variants by association.runTest
+	
+	Arguments:
+		data {pandas.Dataframe} -- Dataset to test
+		test {string} -- 'trend' or 'logistic'
 
-	Returns:
-		tuple: The updated dictionary, and the result for the alternative hypothesis
+	Keyword Arguments:
+		covariates {numpy.ndarray} -- Covariates of the samples, for the logistic regression (default: {None})
+		processes {int} -- Number of processes testing the blocks (default: {None}, one per CPU)
 	"""	
-	alpha = 0.05
-	if p <= 0:
-		p = 1e-40
-		hA = True
-	elif p < alpha:
-		hA = True
-	elif p >= alpha:
-		hA = False
-
-	chrNo, posNo = var.split(':') #To populate dataset
-	chrNoRes = makeInteger(chrNo[3:])
-	if not chrNoRes:
-		if chrNo[3:] == 'X':
-			plotData['chrNo'].append(23)
-			plotData['posNo'].append(int(float(posNo)))
-			plotData['val'].append(p)
-		elif chrNo[3:] == 'Y':
-			plotData['chrNo'].append(24)
-			plotData['posNo'].append(int(float(posNo)))
-			plotData['val'].append(p)
-	else: 
-		plotData['chrNo'].append(chrNoRes)
-		plotData['posNo'].append(int(float(posNo)))
-		plotData['val'].append(p)
+	print('>>> Testing Association of Variants ({})...'.format(test))
+	profiler.count(len(data.columns[:-1]))
+	result = association.runTest(data, test, processes, covariates=covariates)
 
-	return plotData, hA
+	plotData, hA = createPlotFrame(result['Variant'].values, result['pval'].values)
+	Sig = int(hA.sum())
+	notSig = len(hA) - Sig
+
+	print('>>> Writting pickle...')
+	pickle.dump(plotData, open('pickle/plotData_{}.p'.format(test), 'wb'))
+	plots.plotManhattan(plotData, '_' + test)
+	print('Significant: ', Sig)
+	print('Not Significant: ', notSig)
+	print('>>> Writing txt...')
+	# Same first columns as sigVars.csv, followed by the statistics of the test
+	result = result.rename(columns={'Variant': 'Variants'})
+	columns = ['pval', 'Variants'] + [c for c in result.columns if c not in ['pval', 'Variants']]
+	result[columns].to_csv('../../data/variants/sigVars_{}.csv'.format(test), index=False)
+
+@profiler.profiled
+def permutationTest(data, test, permutations, seed=0, processes=None, memory=association.MEMORY):
+	"""Repeats the 'chi2' or 'trend' test with permuted labels, computed by \
+	association.permutationTest; writes the empirical p-value of each variant, the family-wise \
+	adjusted one and the genome-wide threshold
 
-def makeInteger(num):
-	"""Tries to change the type of value to integer
-	
 	Arguments:
-		num {value} -- value to be changed
-	
+		data {pandas.Dataframe} -- Dataset to test
+		test {string} -- 'chi2' or 'trend'
+		permutations {int} -- Number of permutations
+
+	Keyword Arguments:
+		seed {int} -- Seed of the permutations (default: {0})
+		processes {int} -- Number of processes testing the blocks (default: {None}, one per CPU)
+		memory {int} -- Memory, in MB, used by the permutations (default: {association.MEMORY})
+	"""
+	print('>>> Permuting labels ({}, {} permutations)...'.format(test, permutations))
+	result, threshold = association.permutationTest(data, test, permutations, seed, processes, memory)
+	print('Genome-wide threshold: ', threshold)
+	print('Significant genome-wide: ', int((result['adjusted'] <= 0.05).sum()))
+	print('>>> Writing txt...')
+	# Same first columns as sigVars.csv, so it can replace it in addGenes
+	result = result.rename(columns={'Variant': 'Variants'})
+	result[['pval', 'Variants', 'empirical', 'adjusted']].to_csv('../../data/variants/permutations_{}.csv'.format(test), index=False)
+	with open('../../data/variants/permutations_{}.json'.format(test), 'w') as f:
+		json.dump({'test': test, 'permutations': permutations, 'seed': seed, 'alpha': 0.05, 'threshold': threshold}, f, indent=1)
+
+def createPlotFrame(variants, pvals, alpha=0.05):
+	"""Prepares the data of the Manhattan plot for all the variants at once
+
+	Args:
+		variants (array): variants, as 'chr<chromosome>:<position>'
+		pvals (array): p-value of each variant
+		alpha (float): significance level (default: 0.05)
+
 	Returns:
-		integer -- value changed
-		boolean -- warning that value type has not changed
+		tuple: The dataset of the plot (chrNo, posNo, val), without the variants of other \
+		chromosomes, and the result for the alternative hypothesis of each variant
 	"""	
-	try: return int(num)
-	except: return False
-	else: return False
+	pvals = np.asarray(pvals, dtype=np.float64)
+	hA = (pvals <= 0) | (pvals < alpha)
+	pvals = np.where(pvals <= 0, 1e-40, pvals)
+
+	parts = pd.Series(variants, dtype=str).str.split(':', n=1, expand=True)
+	chrom = parts[0].str[3:]
+	chrNo = pd.to_numeric(chrom, errors='coerce')
+	chrNo = chrNo.where((chrNo != 0) & (chrNo % 1 == 0)).fillna(chrom.map({'X': 23, 'Y': 24}))
+	keep = chrNo.notna().values
+	plotData = pd.DataFrame({'chrNo': chrNo[keep].astype(int).values, 
+		'posNo': pd.to_numeric(parts[1][keep]).astype(float).astype(int).values, 'val': pvals[keep]})
+	return plotData, hA
 
+@profiler.profiled
 def geneTranslation(var):
 	"""Translates variants to genes
 	
 	Arguments:
 		var {list} -- List of chromosome regions
 	"""	
+	import pyensembl
 	data = pyensembl.Genome(reference_name='GRCh37',
 				annotation_name='my_genome_features', 
 				gtf_path_or_url='../../data/datasets/Original/ensembl_v37.gtf')
@@ -196,6 +210,7 @@ def geneTranslation(var):
 			wr.writerow(list(row))
 
 
+@profiler.profiled
 def addGenes(data, genes, col):
 	"""[Creates a row with corresponding values]
 	
@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+'''
+# File: genotypeStore.py
+# Created Date: Sunday October 18th 2026
+# Author: Debora Antunes
+# -----
+# Last Modified: Sunday, October 18th 2026, 11:24:09 am
+# -----
+'''
+
+import gzip
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import profiler
+
+MISSING = -1 # Value of missing genotypes in int8 stores
+NCODES = 29 # Columns of the genotype counts: missing values and the codes 0 to 27
+VERSION = 1
+
+'''
+A genotype store is a directory with the genotypes of a dataset in a variant-major layout:
+
+	meta.json			shape, dtype, missing value and the list of chunks
+	samples.tsv			sample names and, when available, their labels
+	variants.tsv.gz		VAR, REF and ALT of each variant (without header), in the order of the chunks
+	chunk_000000.npy	genotypes of a block of variants (variants x samples), one file per chunk
+	counts_000000.npy	number of missing values and of each genotype code per variant of the chunk (variants x NCODES)
+	sampleMajor.npy		optional copy of the genotypes with the samples in the rows (samples x variants)
+
+The genotypes are int8 codes (or dosages) where MISSING is a missing value. Stores created from \
+datasets with non-integer values (like the imputed ones) use float32 and NaN instead. The chunks \
+are .npy files opened as memory maps, or .npz files when the store is compressed.
+
+The genotype counts of int8 stores are computed when each chunk is written, so the statistics of the \
+variants (call rate, allele counts, MAF, heterozygosity and number of distinct genotypes) are read \
+without loading the genotypes.
+'''
+
+
+def isStore(path):
+	"""Checks if a path is a genotype store.
+
+	Arguments:
+		path {string} -- Path to check.
+
+	Returns:
+		bool -- True when the path is a directory with a meta.json file.
+	"""
+	return os.path.isfile(os.path.join(path, 'meta.json'))
+
+def writeJson(data, path):
+	"""Writes a json file atomically: the data is synced to a temporary file that replaces the old one.
+
+	Arguments:
+		data {dict} -- Data to be saved.
+		path {string} -- Path to the json file.
+	"""
+	with open(path + '.tmp', 'w') as f:
+		json.dump(data, f)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(path + '.tmp', path)
+
+
+class GenotypeStore():
+	"""Reads a genotype store. Only meta.json and samples.tsv are read when the store is opened; \
+		the variant table is loaded the first time it is used and the chunks are memory mapped.
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		with open(os.path.join(path, 'meta.json')) as f: self.meta = json.load(f)
+		table = pd.read_csv(os.path.join(path, 'samples.tsv'), sep='\t', dtype={'sample': str})
+		self.samples = list(table['sample'])
+		self.labels = table['labels'].values if 'labels' in table else None
+		self.starts = np.cumsum([0] + [c['rows'] for c in self.meta['chunks']])
+		self._variants = None
+
+	@property
+	def shape(self):
+		"""Number of variants and number of samples."""
+		return int(self.starts[-1]), len(self.samples)
+
+	@property
+	def dtype(self):
+		return np.dtype(self.meta['dtype'])
+
+	@property
+	def missing(self):
+		"""Value of the missing genotypes (None when they are NaN)."""
+		return self.meta['missing']
+
+	@property
+	def variants(self):
+		"""Variant table with the VAR, REF and ALT columns."""
+		if self._variants is None:
+			if self.shape[0]:
+				self._variants = pd.read_csv(os.path.join(self.path, 'variants.tsv.gz'), sep='\t', quoting=3,
+					header=None, names=['VAR','REF','ALT'], dtype=str, keep_default_na=False)
+			else: self._variants = pd.DataFrame(columns=['VAR','REF','ALT'])
+		return self._variants
+
+	def chunk(self, i):
+		"""Opens one chunk.
+
+		Arguments:
+			i {int} -- Index of the chunk.
+
+		Returns:
+			numpy.ndarray -- Genotypes of the chunk (variants x samples), memory mapped when it is not compressed.
+		"""
+		path = os.path.join(self.path, self.meta['chunks'][i]['file'])
+		if self.meta['compressed']:
+			with np.load(path) as f: return f['genotypes']
+		return np.load(path, mmap_mode='r')
+
+	def iterChunks(self):
+		"""Iterates over the chunks in order.
+
+		Returns:
+			generator -- The index of the first variant and the genotypes of each chunk.
+		"""
+		for i in range(len(self.meta['chunks'])):
+			yield int(self.starts[i]), self.chunk(i)
+
+	def read(self):
+		"""Reads all the genotypes.
+
+		Returns:
+			numpy.ndarray -- Genotypes (variants x samples).
+		"""
+		if not self.meta['chunks']: return np.empty((0, len(self.samples)), dtype=self.dtype)
+		return np.concatenate([chunk for _, chunk in self.iterChunks()])
+
+	def iterBlocks(self):
+		"""Iterates over the chunks in order with their variants, reading the variant table in the \
+			same blocks instead of loading it.
+
+		Returns:
+			generator -- The VAR, REF and ALT (pandas.Dataframe) and the genotypes of each chunk.
+		"""
+		if not self.shape[0]: return
+		reader = pd.read_csv(os.path.join(self.path, 'variants.tsv.gz'), sep='\t', quoting=3, header=None, 
+			names=['VAR','REF','ALT'], dtype=str, keep_default_na=False, iterator=True)
+		for i, (_, chunk) in enumerate(self.iterChunks()):
+			yield reader.get_chunk(self.meta['chunks'][i]['rows']).reset_index(drop=True), chunk
+		reader.close()
+
+	def counts(self):
+		"""Reads the genotype counts of all the variants.
+
+		Returns:
+			numpy.ndarray -- Number of missing values and of each genotype code per variant (variants x NCODES), \
+			or None when the store has no counts.
+		"""
+		if any(['counts' not in c for c in self.meta['chunks']]): return None
+		counts = [np.load(os.path.join(self.path, c['counts'])) for c in self.meta['chunks']]
+		return np.concatenate(counts) if counts else np.zeros((0, NCODES), dtype=np.int32)
+
+	def chunkCounts(self, i, chunk=None):
+		"""Reads the genotype counts of one chunk, or counts them when the store has no counts.
+
+		Arguments:
+			i {int} -- Index of the chunk.
+
+		Keyword Arguments:
+			chunk {numpy.ndarray} -- Genotypes of the chunk, when they are already open. (default: {None})
+
+		Returns:
+			numpy.ndarray -- Number of missing values and of each genotype code per variant (variants x NCODES).
+		"""
+		if 'counts' in self.meta['chunks'][i]:
+			return np.load(os.path.join(self.path, self.meta['chunks'][i]['counts']))
+		return countGenotypes(self.chunk(i) if chunk is None else chunk)
+
+	def stats(self):
+		"""Computes the statistics of each variant from the genotype counts.
+
+		Returns:
+			pandas.Dataframe -- Statistics of each variant, in the order of the store (see variantStats), \
+			or None when the store has no counts.
+		"""
+		counts = self.counts()
+		if counts is None: return None
+		return variantStats(counts, self.meta['dosage'], self.variants['VAR'].values)
+
+	def take(self, rows):
+		"""Reads the genotypes of some variants, in any order.
+
+		Arguments:
+			rows {array-like} -- Index of the variants.
+
+		Returns:
+			numpy.ndarray -- Genotypes of the variants (variants x samples).
+		"""
+		rows = np.asarray(rows, dtype=np.int64)
+		out = np.empty((len(rows), len(self.samples)), dtype=self.dtype)
+		chunks = np.searchsorted(self.starts, rows, side='right') - 1
+		for i in np.unique(chunks):
+			mask = chunks == i
+			out[mask] = self.chunk(i)[rows[mask] - self.starts[i]]
+		return out
+
+	@profiler.profiled
+	def sampleMajor(self, block=512):
+		"""Genotypes with the samples in the rows. The first time it is used, the chunks are \
+			transposed by blocks into sampleMajor.npy, so only one chunk is in memory; then the file \
+			is memory mapped.
+
+		Keyword Arguments:
+			block {int} -- Size of the square blocks transposed at once. (default: {512})
+
+		Returns:
+			numpy.ndarray -- Memory-mapped genotypes (samples x variants).
+		"""
+		path = os.path.join(self.path, 'sampleMajor.npy')
+		if not os.path.isfile(path):
+			out = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=self.dtype, shape=self.shape[::-1])
+			for start, chunk in self.iterChunks():
+				transpose(chunk, out[:, start:start+chunk.shape[0]], block)
+			out.flush()
+			del out
+			os.replace(path + '.tmp', path)
+		return np.load(path, mmap_mode='r')
+
+	@profiler.profiled
+	def toFrame(self, block=512):
+		"""Loads the store as the datasets used by the models: samples in the rows, variants in \
+			the columns, missing values as NaN and the labels in the last column, when available. \
+			The chunks are transposed by blocks straight into the float matrix of the dataset.
+
+		Keyword Arguments:
+			block {int} -- Size of the square blocks transposed at once. (default: {512})
+
+		Returns:
+			pandas.Dataframe -- Dataset.
+		"""
+		matrix = np.empty(self.shape[::-1], dtype=np.float64)
+		for start, chunk in self.iterChunks():
+			transpose(chunk, matrix[:, start:start+chunk.shape[0]], block, self.missing)
+		data = pd.DataFrame(matrix, columns=list(self.variants['VAR']))
+		if self.labels is not None: data['labels'] = self.labels
+		return data
+
+
+class StoreWriter():
+	"""Writes a genotype store chunk by chunk. The store is written in <path>.part, where each \
+		committed chunk is recorded in meta.json after its data is synced, and only replaces <path> \
+		when close is called. When key is given and matches the one of an existing part, the \
+		committed chunks are kept, so it can be used as the Checkpoint of vcfParser.
+	"""
+
+	def __init__(self, path, samples, labels=None, dosage=False, compressed=False, dtype='int8', key=None):
+		self.path = path
+		self.part = path + '.part'
+		self.buffer = []
+		self.meta = None
+		try:
+			with open(os.path.join(self.part, 'meta.json')) as f: meta = json.load(f)
+			if key is not None and meta['key'] == key: self.meta = meta
+		except (OSError, ValueError): pass
+
+		if self.meta is None:
+			if os.path.isdir(self.part): shutil.rmtree(self.part)
+			os.makedirs(self.part)
+			table = pd.DataFrame({'sample': list(samples)})
+			if labels is not None: table['labels'] = list(labels)
+			table.to_csv(os.path.join(self.part, 'samples.tsv'), sep='\t', index=False)
+			self.meta = {'version': VERSION, 'key': key, 'samples': len(table), 'dtype': np.dtype(dtype).name,
+				'missing': MISSING if np.dtype(dtype).kind == 'i' else None, 'dosage': dosage,
+				'compressed': compressed, 'chunks': []}
+
+		#Removes the data of the chunks that were not committed
+		self.variants = open(os.path.join(self.part, 'variants.tsv.gz'), 'r+b' if self.chunks else 'wb')
+		self.variants.truncate(self.chunks[-1]['bytes'] if self.chunks else 0)
+		self.variants.seek(0, 2)
+		files = set([c['file'] for c in self.chunks] + [c.get('counts') for c in self.chunks])
+		for f in os.listdir(self.part):
+			if f.startswith(('chunk_', 'counts_')) and f not in files: os.remove(os.path.join(self.part, f))
+		if self.chunks: print('>>> Resuming after {} chunks ({} variants)...'.format(len(self.chunks), self.rows))
+
+	@property
+	def chunks(self):
+		return self.meta['chunks']
+
+	@property
+	def lines(self):
+		"""Number of input lines used by the committed chunks."""
+		return (self.chunks[-1].get('lines') or 0) if self.chunks else 0
+
+	@property
+	def offset(self):
+		"""Virtual offset of the input after the committed chunks, for bgzipped inputs."""
+		return self.chunks[-1].get('offset') if self.chunks else None
+
+	@property
+	def rows(self):
+		"""Number of variants in the committed chunks."""
+		return sum([c['rows'] for c in self.chunks])
+
+	def append(self, variants, matrix):
+		"""Adds a block of variants to the current chunk.
+
+		Arguments:
+			variants {list} -- VAR, REF and ALT of each variant.
+			matrix {numpy.ndarray} -- Genotypes of the variants (variants x samples).
+		"""
+		if len(variants): self.buffer.append((variants, matrix))
+
+	def commit(self, lines=None, offset=None, rows=None):
+		"""Writes the current chunk and records it in meta.json.
+
+		Keyword Arguments:
+			lines {int} -- Number of input lines used until the end of the chunk. (default: {None})
+			offset {int} -- Virtual offset of the input in the end of the chunk. (default: {None})
+			rows {int} -- Not used, the number of variants is counted by the writer. (default: {None})
+		"""
+		variants = [v for block in self.buffer for v in block[0]]
+		if variants:
+			matrix = np.concatenate([block[1] for block in self.buffer])
+			if matrix.dtype.kind == 'f' and self.meta['missing'] is not None:
+				matrix = np.where(np.isnan(matrix), self.meta['missing'], matrix)
+			chunk = self.writeChunk(matrix.astype(self.meta['dtype'], copy=False))
+			self.variants.write(gzip.compress(''.join(['\t'.join(v) + '\n' for v in variants]).encode()))
+			self.variants.flush()
+			os.fsync(self.variants.fileno())
+			chunk['bytes'] = self.variants.tell()
+			self.chunks.append(chunk)
+		if self.chunks and lines is not None:
+			self.chunks[-1]['lines'], self.chunks[-1]['offset'] = lines, offset
+		self.buffer = []
+		writeJson(self.meta, os.path.join(self.part, 'meta.json'))
+
+	def writeChunk(self, matrix, counts=None):
+		"""Saves the genotypes of the next chunk and, for int8 stores, their counts.
+
+		Arguments:
+			matrix {numpy.ndarray} -- Genotypes of the chunk (variants x samples), with the type of the store.
+
+		Keyword Arguments:
+			counts {numpy.ndarray} -- Genotype counts of the chunk, when they are known. (default: {None})
+
+		Returns:
+			dict -- Description of the chunk, to be added to the list of chunks.
+		"""
+		index = len(self.chunks)
+		chunk = {'file': 'chunk_{:06d}.{}'.format(index, 'npz' if self.meta['compressed'] else 'npy'), 'rows': len(matrix)}
+		with open(os.path.join(self.part, chunk['file']), 'wb') as f:
+			if self.meta['compressed']: np.savez_compressed(f, genotypes=matrix)
+			else: np.save(f, np.ascontiguousarray(matrix))
+			f.flush()
+			os.fsync(f.fileno())
+		if self.meta['missing'] is not None:
+			chunk['counts'] = 'counts_{:06d}.npy'.format(index)
+			np.save(os.path.join(self.part, chunk['counts']), countGenotypes(matrix) if counts is None else counts)
+		return chunk
+
+	def close(self):
+		"""Writes the remaining data and renames the store to its final name.
+
+		Returns:
+			GenotypeStore -- The store written.
+		"""
+		if self.buffer: self.commit(self.lines, self.offset)
+		self.variants.close()
+		writeJson(self.meta, os.path.join(self.part, 'meta.json'))
+		if os.path.isdir(self.path): shutil.rmtree(self.path)
+		os.replace(self.part, self.path)
+		return GenotypeStore(self.path)
+
+
+def transpose(matrix, out=None, block=512, missing=None):
+	"""Transposes a matrix by square blocks, so that the rows read and written by each block stay \
+		in the cache. The result can be written in an existing array, like a memory map or a block \
+		of columns of a bigger matrix.
+
+	Arguments:
+		matrix {numpy.ndarray} -- Matrix to transpose.
+
+	Keyword Arguments:
+		out {numpy.ndarray} -- Array where the result is written. (default: {None}, a new array)
+		block {int} -- Size of the square blocks. (default: {512})
+		missing {int} -- Value of the missing genotypes, converted to NaN when out is a float \
+		array. (default: {None})
+
+	Returns:
+		numpy.ndarray -- The transposed matrix.
+	"""
+	rows, cols = matrix.shape
+	if out is None: out = np.empty((cols, rows), dtype=matrix.dtype)
+	convert = missing is not None and out.dtype.kind == 'f'
+	for i in range(0, rows, block):
+		for j in range(0, cols, block):
+			data = matrix[i:i+block, j:j+block]
+			out[j:j+block, i:i+block] = (toFloat(data, missing) if convert else data).T
+	return out
+
+def countGenotypes(matrix):
+	"""Counts the missing values and each genotype code of every variant with a single bincount.
+
+	Arguments:
+		matrix {numpy.ndarray} -- int8 genotypes (variants x samples).
+
+	Returns:
+		numpy.ndarray -- Counts (variants x NCODES); the first column has the missing values.
+	"""
+	values = matrix.astype(np.int64) - MISSING
+	values[(values < 0) | (values >= NCODES)] = 0
+	values += NCODES * np.arange(len(matrix))[:,None]
+	return np.bincount(values.ravel(), minlength=len(matrix) * NCODES).reshape(len(matrix), NCODES).astype(np.int32)
+
+def alleleTable(dosage=False):
+	"""Number of reference and alternative alleles of each genotype code, and if it is heterozygous. \
+		The codes are the positions in vcfParser.GT1, so the code of the alleles hi >= lo is \
+		hi*(hi+1)/2 + lo; with dosage, the code is the number of alternative alleles.
+
+	Keyword Arguments:
+		dosage {bool} -- The codes are dosages. (default: {False})
+
+	Returns:
+		tuple -- Reference alleles, alternative alleles and heterozygous flag of each code.
+	"""
+	codes = np.arange(NCODES - 1)
+	if dosage:
+		alt = np.minimum(codes, 2)
+		return 2 - alt, alt, codes == 1
+	hi = ((np.sqrt(8 * codes + 1) - 1) // 2).astype(np.int64)
+	lo = codes - hi * (hi + 1) // 2
+	ref = (hi == 0).astype(np.int64) + (lo == 0)
+	return ref, 2 - ref, hi != lo
+
+def variantStats(counts, dosage=False, index=None):
+	"""Computes the statistics of each variant from its genotype counts. Counts are additive, so \
+		the statistics of merged datasets can be computed from the sum of the counts.
+
+	Arguments:
+		counts {numpy.ndarray} -- Genotype counts (variants x NCODES), as returned by countGenotypes.
+
+	Keyword Arguments:
+		dosage {bool} -- The codes are dosages. (default: {False})
+		index {list} -- Names of the variants. (default: {None})
+
+	Returns:
+		pandas.Dataframe -- Number of missing values, call rate, reference and alternative alleles, \
+		minor allele frequency, fraction of heterozygous samples and number of distinct genotypes.
+	"""
+	ref, alt, het = alleleTable(dosage)
+	called = counts[:,1:].astype(np.int64)
+	samples = called.sum(axis=1)
+	refAlleles, altAlleles = called @ ref, called @ alt
+	with np.errstate(divide='ignore', invalid='ignore'):
+		stats = pd.DataFrame({'missing': counts[:,0],
+			'callRate': samples / (samples + counts[:,0]),
+			'refAlleles': refAlleles,
+			'altAlleles': altAlleles,
+			'maf': np.minimum(refAlleles, altAlleles) / (refAlleles + altAlleles),
+			'heterozygosity': (called @ het) / samples,
+			'distinct': (called > 0).sum(axis=1)}, index=index)
+	return stats
+
+def fillValues(counts, strategy):
+	"""Computes the value used to impute the missing genotypes of each variant from its genotype \
+		counts, with the strategies of sklearn's SimpleImputer. The mean and the median are rounded \
+		to the nearest code, so the imputed genotypes are still int8.
+
+	Arguments:
+		counts {numpy.ndarray} -- Genotype counts (variants x NCODES), of variants with at least one call.
+		strategy {string} -- Imputation strategy: mean, median, most_frequent or constant (0).
+
+	Returns:
+		numpy.ndarray -- int8 value of each variant.
+	"""
+	called = counts[:,1:].astype(np.int64)
+	samples = called.sum(axis=1)
+	if strategy == 'mean':
+		values = np.floor(called @ np.arange(NCODES - 1) / samples + 0.5)
+	elif strategy == 'median':
+		cumulative = called.cumsum(axis=1)
+		low = (cumulative >= ((samples + 1) // 2)[:,None]).argmax(axis=1)
+		high = (cumulative >= (samples // 2 + 1)[:,None]).argmax(axis=1)
+		values = np.floor((low + high) / 2 + 0.5)
+	elif strategy == 'most_frequent':
+		values = called.argmax(axis=1)
+	elif strategy == 'constant':
+		values = np.zeros(len(called))
+	else: raise ValueError('Imputation strategy not valid: {}'.format(strategy))
+	return values.astype(np.int8)
+
+def toFloat(matrix, missing=MISSING):
+	"""Converts genotypes to float64, where the missing values are NaN.
+
+	Arguments:
+		matrix {numpy.ndarray} -- Genotypes.
+
+	Keyword Arguments:
+		missing {int} -- Value of the missing genotypes, or None when they are already NaN. (default: {MISSING})
+
+	Returns:
+		numpy.ndarray -- Genotypes as float64.
+	"""
+	result = matrix.astype(np.float64)
+	if missing is not None: result[matrix == missing] = np.nan
+	return result
+
+@profiler.profiled
+def fromFrame(path, data, variants=None, compressed=False, chunksize=10000):
+	"""Saves a dataset (samples in the rows, variants in the columns and the labels in a column \
+		called labels) as a genotype store. Integer datasets are saved as int8, where NaN is MISSING; \
+		the remaining ones as float32.
+
+	Arguments:
+		path {string} -- Path to the store.
+		data {pandas.Dataframe} -- Dataset.
+
+	Keyword Arguments:
+		variants {pandas.Dataframe} -- VAR, REF and ALT of each column. (default: {None}, the column \
+		names, without REF and ALT)
+		compressed {bool} -- Saves the chunks in compressed npz files. (default: {False})
+		chunksize {int} -- Number of variants in each chunk. (default: {10000})
+
+	Returns:
+		GenotypeStore -- The store written.
+	"""
+	labels = data['labels'].values if 'labels' in data else None
+	columns = [c for c in data.columns if c != 'labels']
+	if variants is None: variants = [(str(c), '', '') for c in columns]
+	else: variants = variants[['VAR','REF','ALT']].astype(str).values.tolist()
+	values = data.loc[:, data.columns != 'labels'].values
+	finite = values[~np.isnan(values)] if values.dtype.kind == 'f' else values
+	integer = values.dtype.kind in 'iub' or (values.dtype.kind == 'f' and np.array_equal(finite, np.round(finite)))
+	integer = integer and (not finite.size or (finite.min() >= 0 and finite.max() <= np.iinfo(np.int8).max))
+	writer = StoreWriter(path, [str(s) for s in data.index], labels, compressed=compressed,
+		dtype='int8' if integer else 'float32')
+	for start in range(0, len(columns), chunksize):
+		writer.append(variants[start:start+chunksize], values[:, start:start+chunksize].T)
+		writer.commit()
+	return writer.close()
+
+@profiler.profiled
+def concat(path, parts, samples=None, labels=None, move=False):
+	"""Joins genotype stores, keeping the order of the variants. The chunks of the stores with the \
+		final samples are copied (or moved) without being read; the remaining ones are reordered \
+		and the absent samples are saved as missing.
+
+	Arguments:
+		path {string} -- Path to the joined store.
+		parts {list} -- Paths to the stores, in order.
+
+	Keyword Arguments:
+		samples {list} -- Samples of the joined store. (default: {None}, all the samples, in order of appearance)
+		labels {list} -- Labels of the samples. (default: {None}, the labels of the first store, if any)
+		move {bool} -- Moves the chunks and removes the stores. (default: {False})
+
+	Returns:
+		GenotypeStore -- The store written.
+	"""
+	stores = [GenotypeStore(p) for p in parts]
+	if samples is None:
+		samples = list(dict.fromkeys([s for store in stores for s in store.samples]))
+	if labels is None and stores and stores[0].labels is not None and stores[0].samples == samples:
+		labels = stores[0].labels
+	meta = stores[0].meta if stores else {'dtype': 'int8', 'dosage': False, 'compressed': False}
+	writer = StoreWriter(path, samples, labels, meta['dosage'], meta['compressed'], meta['dtype'])
+
+	for store in stores:
+		index = np.array([store.samples.index(s) if s in store.samples else -1 for s in samples], dtype=np.int64)
+		for i, chunk in enumerate(store.meta['chunks']):
+			if store.samples == samples and store.dtype == writer.meta['dtype']:
+				copy = {'file': 'chunk_{:06d}.{}'.format(len(writer.chunks), chunk['file'].split('.')[-1]), 'rows': chunk['rows']}
+				if 'counts' in chunk: copy['counts'] = 'counts_{:06d}.npy'.format(len(writer.chunks))
+				for key in [k for k in ['file', 'counts'] if k in copy]:
+					source, target = os.path.join(store.path, chunk[key]), os.path.join(writer.part, copy[key])
+					if move: os.replace(source, target)
+					else: shutil.copyfile(source, target)
+				writer.chunks.append(copy)
+			else:
+				data = np.full((chunk['rows'], len(samples)), MISSING if writer.meta['missing'] is not None else np.nan, 
+					dtype=writer.meta['dtype'])
+				data[:, index >= 0] = store.chunk(i)[:, index[index >= 0]]
+				writer.chunks.append(writer.writeChunk(data))
+
+		#The variants of each store are gzip members that are copied without decompressing them
+		with open(os.path.join(store.path, 'variants.tsv.gz'), 'rb') as f:
+			shutil.copyfileobj(f, writer.variants)
+		if writer.chunks: writer.chunks[-1]['bytes'] = writer.variants.tell()
+	result = writer.close()
+	if move:
+		for p in parts: shutil.rmtree(p)
+	return result
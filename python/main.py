@@ -13,13 +13,13 @@ import pandas as pd
 import argparse
 import pickle
 
-import vcfParser
-import variantSelection
-import geneSelection
-import featureExtraction
-import models
-import plots
-import network
+import vcfIndex
+import genotypeStore
+import workspace
+import profiler
+
+# The remaining modules are imported by the options that use them, so parsing VCF files or merging
+# datasets does not load R (rpy2), pyensembl, the models and the plotting libraries
 
 
 
@@ -29,6 +29,28 @@ def main():
 				help = 'First argument must be \'cases\' or \'controls\'; Second argument must be the \
 					number of the chromosome (1 to 22) or \'X\'; \
 					Third argument is the path to the VCF file to be processed')
+	arg_parser.add_argument('-vA','--vcfAll', type = str, nargs=2, 
+				help = 'Parses all chromosomes (1 to 22 and X) in parallel; First argument must be \'cases\' or \'controls\'; \
+					Second argument is the path to the VCF files, where \'{}\' is replaced by the chromosome')
+	arg_parser.add_argument('-j','--jobs', type = int, 
+				help = 'Number of processes used to parse VCF files and to run the tests per variant \
+					(default: one per CPU with --vcfAll and --test, one with --vcf)')
+	arg_parser.add_argument('--shardSize', type = float, 
+				help = 'Size in MB of the shards of bgzipped VCF files parsed in parallel (default: 1/4 of the size \
+					per process; 0 parses one chromosome per process)')
+	arg_parser.add_argument('--debug', action = 'store_true', 
+				help = 'Keeps the intermediate output_<chromosome>.csv.gz file when parsing VCF files')
+	arg_parser.add_argument('--dosage', action = 'store_true', 
+				help = 'Translates the genotypes to the number of alternative alleles when parsing VCF files')
+	arg_parser.add_argument('-fI','--filterInfo', type = str, nargs='*', 
+				help = 'Filters applied to the INFO column when parsing VCF files, like \'VT=SNP,INDEL\' or \'AF>=0.01\' \
+					(default: \'VT=SNP,INDEL\' for controls and none for cases)')
+	arg_parser.add_argument('-r','--regions', type = str, nargs='*', 
+				help = 'Parses only the regions (\'chr:start-end\') of bgzipped VCF files, using their tabix index; \
+					Each argument can be a region or a file with one region per line')
+	arg_parser.add_argument('--store', action = 'store_true', 
+				help = 'Saves the outputs of the VCF parsing, merge, cleaning and imputation in genotype stores \
+					(directories with chunked int8 genotypes) instead of csv.gz files')
 	arg_parser.add_argument('-s','--samples', type = str, 
 				help = 'TSV samples file from 1000 Genome')			
 	arg_parser.add_argument('-m','--merge', type = str, nargs='*',
@@ -37,9 +59,12 @@ def main():
 					dataset, and Third is the controls dataset. If the argument \'all\' is provided, merges all \
 					choromosome datasets in one but all need to be available.')
 	arg_parser.add_argument('-w','--workspace', type = str, 
-				help = 'Saved workspace')
+				help = 'Saved workspace (directory written by main.py, or a pickle)')
 	arg_parser.add_argument('-d','--dataset', type = str, 
 				help = 'Input file')
+	arg_parser.add_argument('--noWorkspace', action = 'store_true', 
+				help = 'Does not save the dataset of --dataset in the pickle/data workspace (used by the pipeline, \
+					where several stages read datasets at the same time)')
 	arg_parser.add_argument('-cV','--cleanVar', type = float, 
 				help = 'Selects the columns to delete according to a percentage')
 	arg_parser.add_argument('-iV','--imputeVar', type = str, 
@@ -49,7 +74,18 @@ def main():
 	arg_parser.add_argument('-g','--grid_search', type = str, nargs='*', 
 				help = 'Chosen hyperparameters in format \'parameter:value\'')
 	arg_parser.add_argument('-t','--test', type = str, 
-				help = 'Apply test per variant: \'normality\', \'chi2\'')
+				help = 'Apply test per variant: \'normality\', \'chi2\', \'trend\' (Cochran-Armitage) or \
+					\'logistic\' (logistic regression with the covariates of --covariates)')
+	arg_parser.add_argument('-cO','--covariates', type = str, 
+				help = 'CSV file with the covariates of the logistic test (like principal components and sex), \
+					with a header and one row per sample in the order of the dataset')
+	arg_parser.add_argument('-pN','--permutations', type = int, 
+				help = 'With the \'chi2\' or \'trend\' test, also repeats it with <value> permutations of the labels \
+					for empirical and family-wise adjusted p-values and a genome-wide threshold')
+	arg_parser.add_argument('--seed', type = int, default = 0, 
+				help = 'Seed of the permutations (default: 0)')
+	arg_parser.add_argument('--memory', type = int, default = 1024, 
+				help = 'Memory in MB used by the permutations of all the processes (default: 1024)')
 	arg_parser.add_argument('-tG','--translation_genes', type = str, 
 				help = 'Path to list of variants to translate into genes')
 	arg_parser.add_argument('-aG','--add_genes', type = str, 
@@ -61,120 +97,211 @@ def main():
 	arg_parser.add_argument('-n','--network', type = str, nargs='*', 
 				help = 'Performs the integration into the network: the first argument is the path to the interactions file;\
 					the second argument is the path to a Rdata file with the network saved')
+	arg_parser.add_argument('-P','--profile', type = str, nargs='?', const = '../../data/profile.json', 
+				help = 'Saves the wall time, CPU time, peak memory, rows and bytes read and written of each stage \
+					and hot function in a JSON file (default: ../../data/profile.json)')
+	arg_parser.add_argument('--sampling', type = float, 
+				help = 'With --profile, also samples the stack every <value> milliseconds and saves it for flame graphs')
 	args = arg_parser.parse_args()
+	if args.profile:
+		profiler.enable(args.profile, args.sampling)
+	stats = None
+	store = None
+	dataset = None
+
+	if args.regions: 
+		args.regions = vcfIndex.listRegions(args.regions)
+	shardSize = int(args.shardSize * 1e6) if args.shardSize is not None else None
 
 	if args.vcf:
-		if args.samples: 
-			flag = vcfParser.main(args.vcf, args.samples)
-		else: 
-			flag = vcfParser.main(args.vcf)
-		if flag == 'ERROR1':
-			print('>>> First argument is not \'cases\' or \'controls\', please add a correct label.')
-		elif flag =='ERROR2':
-			print('>>> No mode provided.')
-		elif flag =='ERROR2':
-			print('>>> Mode not valid, make sure is \'region\' or one chromossome (1 to 22, or X)')
-		elif flag == 'ERROR4':
-			print('>>> No VCF file provided.')
+		with profiler.stage('vcf'):
+			import vcfParser
+			flag = vcfParser.main(args.vcf, args.samples, debug=args.debug, dosage=args.dosage, filters=args.filterInfo, 
+				regions=args.regions, processes=args.jobs, shardSize=shardSize, store=args.store)
+			if flag == 'ERROR1':
+				print('>>> First argument is not \'cases\' or \'controls\', please add a correct label.')
+			elif flag =='ERROR2':
+				print('>>> No mode provided.')
+			elif flag =='ERROR3':
+				print('>>> Mode not valid, make sure is \'region\' or one chromossome (1 to 22, or X)')
+			elif flag == 'ERROR4':
+				print('>>> No VCF file provided.')
+			elif flag == 'ERROR6':
+				print('>>> Regions can not be used in debug mode.')
+
+	elif args.vcfAll:
+		with profiler.stage('vcfAll'):
+			import vcfParser
+			flag = vcfParser.mainAll(args.vcfAll[0], args.vcfAll[1], args.samples, args.jobs, 
+				debug=args.debug, dosage=args.dosage, filters=args.filterInfo, regions=args.regions, shardSize=shardSize, 
+				store=args.store)
+			if flag == 'ERROR1':
+				print('>>> First argument is not \'cases\' or \'controls\', please add a correct label.')
+			elif flag == 'ERROR4':
+				print('>>> Each chromosome must match exactly one VCF file.')
+			elif flag == 'ERROR5':
+				print('>>> The path must contain \'{}\' in the place of the chromosome name.')
+			elif flag == 'ERROR6':
+				print('>>> Regions can not be used in debug mode.')
 
 	elif args.merge:
-		if args.merge[0] == 'all':
-			variantSelection.mergeAll()
-		else:
-			variantSelection.loadData(args.merge[0],args.merge[1],args.merge[2])
+		with profiler.stage('merge'):
+			import variantSelection
+			if args.merge[0] == 'all':
+				variantSelection.mergeAll(args.store)
+			else:
+				variantSelection.loadData(args.merge[0],args.merge[1],args.merge[2], args.store)
 
 	elif args.workspace:
-		print('>>> Loading workspace...')
-		dataset = pickle.load(open(args.workspace, 'rb'))
-		print(dataset)
-		name = args.workspace[7:]
+		with profiler.stage('load'):
+			print('>>> Loading workspace...')
+			if workspace.isWorkspace(args.workspace):
+				dataset = workspace.load(args.workspace)
+			else:
+				dataset = pickle.load(open(args.workspace, 'rb'))
+			print(dataset)
+			name = args.workspace[7:]
 
 	elif args.dataset:
-		print('>>> Loading dataset...')
-		dataset = pd.read_csv(args.dataset, compression = 'gzip')#.iloc[:,1:]
-		print('>>> Writting pickle...')
-		pickle.dump(dataset, open('pickle/data.p', 'wb'))
-		print(dataset)
-		name = args.dataset[20:]
+		with profiler.stage('load'):
+			print('>>> Loading dataset...')
+			if genotypeStore.isStore(args.dataset):
+				store = genotypeStore.GenotypeStore(args.dataset)
+				stats = store.stats()
+				# The imputation of int8 stores is done by chunks, without loading the dataset
+				if not (args.store and args.imputeVar and not args.cleanVar and store.missing is not None):
+					dataset = store.toFrame()
+			else:
+				dataset = pd.read_csv(args.dataset, compression = 'gzip')#.iloc[:,1:]
+			if dataset is not None:
+				# The workspace is only written again when the dataset changed
+				if not args.noWorkspace and not workspace.isCurrent('pickle/data', args.dataset):
+					print('>>> Writing workspace...')
+					workspace.save(dataset, 'pickle/data', args.dataset)
+				print(dataset)
+			name = args.dataset[20:]
 	
 	else:
 		print('>>> No dataset or workspace provided!')
 
 	if args.cleanVar:
-		print('>>> Cleaning dataset...')
-		dataset=variantSelection.cleanMissing(dataset, args.cleanVar)
-		print('>>> Writing csv...')
-		dataset.to_csv('../../data/datasets/cleaned_dataset.csv.gz', index=False, compression = 'gzip')
-		print('>>> Writting pickle...')
-		pickle.dump(dataset, open('pickle/dataCln.p', 'wb'))
+		with profiler.stage('clean'):
+			print('>>> Cleaning dataset...')
+			import variantSelection
+			dataset=variantSelection.cleanMissing(dataset, args.cleanVar, stats)
+			if args.store:
+				print('>>> Writing store...')
+				genotypeStore.fromFrame('../../data/datasets/cleaned_dataset', dataset)
+			else:
+				print('>>> Writing csv...')
+				dataset.to_csv('../../data/datasets/cleaned_dataset.csv.gz', index=False, compression = 'gzip')
+			print('>>> Writing workspace...')
+			workspace.save(dataset, 'pickle/dataCln')
 	
 	if args.imputeVar:
-		print('>>> Imputation...')
-		dataset=variantSelection.doImputation(dataset, args.imputeVar)
-		print('>>> Writing csv...')
-		dataset.to_csv('../../data/datasets/imputed_dataset.csv.gz', index=False, compression = 'gzip')
-		print('>>> Writting pickle...')
-		pickle.dump(dataset, open('pickle/dataImp.p', 'wb'))
+		with profiler.stage('impute'):
+			print('>>> Imputation...')
+			import variantSelection
+			if dataset is None:
+				print('>>> Writing store...')
+				store=variantSelection.doImputation(store, args.imputeVar, '../../data/datasets/imputed_dataset')
+				if any([args.classifier, args.test, args.add_genes, args.new_features, args.top_features]):
+					dataset = store.toFrame()
+			else:
+				dataset=variantSelection.doImputation(dataset, args.imputeVar)
+				if args.store:
+					print('>>> Writing store...')
+					genotypeStore.fromFrame('../../data/datasets/imputed_dataset', dataset)
+				else:
+					print('>>> Writing csv...')
+					dataset.to_csv('../../data/datasets/imputed_dataset.csv.gz', index=False, compression = 'gzip')
+			if dataset is not None:
+				print('>>> Writing workspace...')
+				workspace.save(dataset, 'pickle/dataImp')
 
 	if args.classifier:
-		X=dataset.iloc[:,:-1].values
-		y=pd.to_numeric(dataset.iloc[:,-1].values.ravel())
-
-		# Use correct tag
-		name = name[12:-7]
-		if name != 'pval' and name != 'network':
-			name = name[4:]
-			if name == 'pval':
-				name = 'all_pval'
-			elif name == 'network':
-				name = 'all_network'
+		with profiler.stage('classify'):
+			import models
+			import plots
+			X=dataset.iloc[:,:-1].values
+			y=pd.to_numeric(dataset.iloc[:,-1].values.ravel())
+
+			# Use correct tag
+			name = name[12:-7]
+			if name != 'pval' and name != 'network':
+				name = name[4:]
+				if name == 'pval':
+					name = 'all_pval'
+				elif name == 'network':
+					name = 'all_network'
 				
-		models.featuresSel(dataset.iloc[:,:-1],pd.to_numeric(dataset.iloc[:,-1]),name)
-		if args.classifier[0] == 'svm': plots.plotRocCurve(X, y, 'svm', name, args.grid_search)
-		elif args.classifier[0] == 'tree': plots.plotRocCurve(X, y, 'tree', name, args.grid_search)
-		elif args.classifier[0] == 'knn': plots.plotRocCurve(X, y, 'knn', name, args.grid_search)
-		elif args.classifier[0] == 'log': plots.plotRocCurve(X, y, 'log', name, args.grid_search)
-		elif args.classifier[0] == 'rf': plots.plotRocCurve(X, y, 'rf', name, args.grid_search)
-		elif args.classifier[0] == 'nb': plots.plotRocCurve(X, y, 'nb', name)
-		else: print('>>> The classifier chosen is not valid!')
+			models.featuresSel(dataset.iloc[:,:-1],pd.to_numeric(dataset.iloc[:,-1]),name)
+			if args.classifier[0] == 'svm': plots.plotRocCurve(X, y, 'svm', name, args.grid_search)
+			elif args.classifier[0] == 'tree': plots.plotRocCurve(X, y, 'tree', name, args.grid_search)
+			elif args.classifier[0] == 'knn': plots.plotRocCurve(X, y, 'knn', name, args.grid_search)
+			elif args.classifier[0] == 'log': plots.plotRocCurve(X, y, 'log', name, args.grid_search)
+			elif args.classifier[0] == 'rf': plots.plotRocCurve(X, y, 'rf', name, args.grid_search)
+			elif args.classifier[0] == 'nb': plots.plotRocCurve(X, y, 'nb', name)
+			else: print('>>> The classifier chosen is not valid!')
 
 	if args.test:
-		if args.test == 'normality': geneSelection.normalityTest(dataset)
-		elif args.test == 'chi2': geneSelection.chiSquaredTest(dataset)
-		else: print('>>> The test chosen is not valid!')
+		with profiler.stage('test'):
+			import geneSelection
+			if args.test == 'normality': geneSelection.normalityTest(dataset, args.jobs)
+			elif args.test == 'chi2': geneSelection.chiSquaredTest(dataset, args.jobs)
+			elif args.test in ['trend', 'logistic']:
+				import association
+				covariates = None
+				if args.covariates: covariates = association.readCovariates(args.covariates, len(dataset))
+				geneSelection.associationTest(dataset, args.test, covariates, args.jobs)
+			else: print('>>> The test chosen is not valid!')
+			if args.permutations:
+				if args.test in ['chi2', 'trend']:
+					geneSelection.permutationTest(dataset, args.test, args.permutations, args.seed, args.jobs, args.memory)
+				else: print('>>> Permutations are only available for the chi2 and trend tests!')
 
 
 	if args.translation_genes:
-		with open(args.translation_genes, 'r') as f:
-			f = f.read().replace('\n', ', ').split(',')
-			varList = [i for i in f if i.startswith('chr')]
-		geneSelection.geneTranslation(varList)
+		with profiler.stage('translate'):
+			import geneSelection
+			with open(args.translation_genes, 'r') as f:
+				f = f.read().replace('\n', ', ').split(',')
+				varList = [i for i in f if i.startswith('chr')]
+			geneSelection.geneTranslation(varList)
 
 	elif args.add_genes:
-		geneList = pd.read_csv(args.add_genes)
-		print(geneList)
-		data = geneSelection.addGenes(dataset, geneList, 'Genes')
-		print('>>> Writing csv...')
-		data.to_csv('../../data/datasets/dataset_with_genes.csv.gz', index=False, compression = 'gzip')
-		print('>>> Writting pickle...')
-		pickle.dump(data, open('pickle/dataGenes.p', 'wb'))
+		with profiler.stage('genes'):
+			import geneSelection
+			geneList = pd.read_csv(args.add_genes)
+			print(geneList)
+			data = geneSelection.addGenes(dataset, geneList, 'Genes')
+			print('>>> Writing csv...')
+			data.to_csv('../../data/datasets/dataset_with_genes.csv.gz', index=False, compression = 'gzip')
+			print('>>> Writing workspace...')
+			workspace.save(data, 'pickle/dataGenes')
 
 	if args.new_features: 
-		featureExtraction.reduceFeatures(dataset, args.new_features)
+		with profiler.stage('reduce'):
+			import featureExtraction
+			featureExtraction.reduceFeatures(dataset, args.new_features)
 
 	if args.top_features:
-		name = name[16:-7]
-		if args.top_features <= 100 and args.top_features >= 0: 
-			featureExtraction.selectTopFeatures(dataset, name, args.top_features)
-		else: 
-			print('>>> The value must be between 0 and 100!')
+		with profiler.stage('top'):
+			import featureExtraction
+			name = name[16:-7]
+			if args.top_features <= 100 and args.top_features >= 0: 
+				featureExtraction.selectTopFeatures(dataset, name, args.top_features)
+			else: 
+				print('>>> The value must be between 0 and 100!')
 	
 	if args.network:
-		network.editGenesFile()
-		if len(args.network) == 1:
-			rData = False
-		else: rData = args.network[1]
-		network.createNetwork(args.network[0], rData)
+		with profiler.stage('network'):
+			import network
+			network.editGenesFile()
+			if len(args.network) == 1:
+				rData = False
+			else: rData = args.network[1]
+			network.createNetwork(args.network[0], rData)
 
 
 
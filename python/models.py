@@ -14,6 +14,7 @@ import numpy as np
 import csv
 
 import plots
+import profiler
 import collections
 
 from sklearn.model_selection import GridSearchCV
@@ -31,6 +32,26 @@ from matplotlib import pyplot as plt
 
 from progress.bar import Bar
 
+def parseParameters(values):
+	"""Parses hyperparameters in the format 'parameter:value'
+	
+	Arguments:
+		values {list} -- Hyperparameters
+	
+	Returns:
+		dictionary -- Hyperparameters, with the numbers converted to int or float
+	"""
+	hyper = {}
+	for i in values:
+		key, val = i.split(':')[0], i.split(':')[1]
+		try: 
+			if val == str(float(val)):  val = float(val)
+			else: val = int(float(val))
+		except: pass
+		finally: hyper[key]=val
+	return hyper
+
+@profiler.profiled
 def trainSvm(train_X,train_y,test_X,test_y,best_params):
 	"""Uses a SVM model to fit the data.
 	
@@ -65,6 +86,7 @@ def trainSvm(train_X,train_y,test_X,test_y,best_params):
 	print(f1_score(test_y,prev, average='macro'))
 	return svm_model, list(prev)
 
+@profiler.profiled
 def trainKnn(train_X,train_y,test_X,test_y,best_params):
 	"""Uses a KNN model to fit the data.
 	
@@ -95,6 +117,7 @@ def trainKnn(train_X,train_y,test_X,test_y,best_params):
 	print(f1_score(test_y,prev, average='macro'))
 	return knn_model, list(prev)
 
+@profiler.profiled
 def trainLog(train_X,train_y,test_X,test_y,best_params):
 	"""Uses a Logarithmic model to fit the data.
 	
@@ -127,6 +150,7 @@ def trainLog(train_X,train_y,test_X,test_y,best_params):
 	print(f1_score(test_y,prev, average='macro'))
 	return log_model, list(prev)
 
+@profiler.profiled
 def trainNb(train_X,train_y,test_X, test_y):
 	"""
 	Arguments:
@@ -143,6 +167,7 @@ def trainNb(train_X,train_y,test_X, test_y):
 	print(f1_score(test_y,prev, average='macro'))
 	return nb_model, list(prev)
 
+@profiler.profiled
 def trainRf(train_X,train_y,test_X,test_y,best_params):
 	"""Uses a Random forest model to fit the data.
 	
@@ -178,6 +203,7 @@ def trainRf(train_X,train_y,test_X,test_y,best_params):
 	return rf_model, list(prev)
 
 
+@profiler.profiled
 def trainTree(train_X,train_y,test_X,test_y,best_params):
 	"""Uses a tree model to fit the data.
 	
@@ -213,6 +239,7 @@ def trainTree(train_X,train_y,test_X,test_y,best_params):
 	return tree_model, list(prev)
 
 
+@profiler.profiled
 def useTree(data,train_X,train_y):
 	"""Uses an Extremely Randomized Trees ensemble to fit the data.
 	
@@ -231,6 +258,7 @@ def useTree(data,train_X,train_y):
 	dataset_sel = data.iloc[:, select]
 	return list(dataset_sel.columns)
 
+@profiler.profiled
 def featuresSel(train, train_labels, name):
 	"""Plots the curve for the importantant features
 	
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+'''
+# File: pipeline.py
+# Created Date: Sunday October 18th 2026
+# Author: Debora Antunes
+# -----
+# Last Modified: Sunday, October 18th 2026, 4:02:31 pm
+# -----
+'''
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+CHROMOSOMES = [str(i) for i in range(1, 23)] + ['X']
+CASES = '../../data/vcf/cases/All_PT_{}.vcf.gz'
+CONTROLS = '../../data/vcf/controls/ALL.chr{}.phase3_shapeit2_mvncall_integrated_v*.20130502.genotypes.vcf.gz'
+SAMPLES = '../../data/vcf/igsr_samples.tsv'
+CACHE = '../../data/cache'
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+# Classifiers and grid parameters used for each dataset (see bash/plots.sh)
+CLASSIFIERS = {
+	'svm': ['C:0.25', 'degree:1', 'gamma:25', 'kernel:linear', 'tol:0.001'],
+	'tree': ['criterion:entropy', 'max_leaf_nodes:50', 'min_samples_leaf:3', 'min_samples_split:5', 'n_estimators:50'],
+	'log': ['C:0.4', 'penalty:l1', 'solver:liblinear', 'tol:0.001']}
+# Datasets of the models and the name of their figures (see the classifier option of main.py)
+MODEL_DATASETS = {'top_dataset_network': 'network', 'reduced_dataset_risk': 'risk', 'top_dataset_pval': 'pval',
+	'reduced_dataset_pval': 'all_pval', 'reduced_dataset_network': 'all_network'}
+
+'''
+The pipeline runs the steps of bash/runCases.sh, runControls.sh, runMerge.sh, runMain.sh and plots.sh as \
+stages of a DAG. Each stage is one call of main.py, with the files it reads and writes; a stage depends \
+on the stages that write its inputs. Files produced outside the pipeline (VCF files, gene lists, the \
+results of the R scripts, like r_genes.csv) are inputs without a stage. Files written by more than one \
+stage, like the feature ranking of a dataset written by each of its classifiers, are shared by those \
+stages, which never run at the same time. The datasets read with -d are not saved in the pickle/data \
+workspace, which every one of those stages would write.
+
+The key of a stage is the hash of its arguments and of the content of its inputs. A stage only runs \
+when its key changed or its outputs are missing, so a stage whose inputs were rewritten with the same \
+content is not repeated. The outputs of each run are linked in the cache, in {CACHE}/<stage>/<key>, and \
+restored from there when an older key is used again. The content hash of each file is kept with its \
+size and modification time, so unchanged files are not read again.
+
+	{CACHE}/state.json		hashes of the files and the last key of each stage
+	{CACHE}/<stage>/<key>	outputs of the stage for that key (hard links)
+	{CACHE}/logs			output of the last run of each stage
+'''
+
+
+class Stage():
+	"""One call of main.py, with its inputs and outputs.
+
+	Arguments:
+		name {string} -- Name of the stage.
+		args {list} -- Arguments of main.py.
+
+	Keyword Arguments:
+		inputs {list} -- Files (or directories) read by the stage; glob patterns are allowed. (default: {None})
+		outputs {list} -- Files (or directories) written by the stage. (default: {None})
+		shared {list} -- Files also written by other stages; stages sharing a file do not run at \
+		the same time. (default: {None})
+	"""
+
+	def __init__(self, name, args, inputs=None, outputs=None, shared=None):
+		self.name = name
+		self.args = [str(a) for a in args]
+		self.inputs = inputs or []
+		self.outputs = outputs or []
+		self.shared = shared or []
+		self.deps = []
+
+
+def buildStages(clean=10, impute='most_frequent', top=25, classifiers=CLASSIFIERS):
+	"""Creates the stages of the pipeline and links each one to the stages that write its inputs.
+
+	Keyword Arguments:
+		clean {int} -- Maximum percentage of missing values of the variants. (default: {10})
+		impute {string} -- Imputation strategy. (default: {'most_frequent'})
+		top {int} -- Number of top features. (default: {25})
+		classifiers {dict} -- Grid parameters of each classifier. (default: {CLASSIFIERS})
+
+	Returns:
+		list -- Stages, in an order where the dependencies of each stage come first.
+	"""
+	datasets = '../../data/datasets/{}.csv.gz'
+	stages = []
+	for name, pattern, options in [('cases', CASES, []), ('controls', CONTROLS, ['-s', SAMPLES])]:
+		stages.append(Stage('ingest_' + name, options + ['-vA', name, pattern],
+			[pattern.format(c) for c in CHROMOSOMES] + options[1:],
+			['../../data/vcf/{}/outputPandas_{}.csv.gz'.format(name, c) for c in CHROMOSOMES]))
+
+	for c in CHROMOSOMES:
+		cases, controls = ['../../data/vcf/{}/outputPandas_{}.csv.gz'.format(n, c) for n in ['cases', 'controls']]
+		stages.append(Stage('merge_' + c, ['-m', c, cases, controls], [cases, controls],
+			['../../data/datasets/chr/chr{}.csv.gz'.format(c), '../../data/datasets/chr/INFO_chr{}.csv'.format(c)]))
+	stages.append(Stage('merge', ['-m', 'all'], ['../../data/datasets/chr/chr{}.csv.gz'.format(c) for c in CHROMOSOMES],
+		[datasets.format('merged_dataset')]))
+
+	stages.append(Stage('clean', ['-d', datasets.format('merged_dataset'), '--noWorkspace', '-cV', clean],
+		[datasets.format('merged_dataset')], [datasets.format('cleaned_dataset'), 'pickle/dataCln']))
+	stages.append(Stage('impute', ['-d', datasets.format('cleaned_dataset'), '--noWorkspace', '-iV', impute],
+		[datasets.format('cleaned_dataset')], [datasets.format('imputed_dataset'), 'pickle/dataImp']))
+
+	stages.append(Stage('test_normality', ['-w', 'pickle/dataImp', '-t', 'normality'], ['pickle/dataImp'],
+		['../../data/variants/notnormal.csv', 'pickle/plotData_normality.p']))
+	stages.append(Stage('test_chi2', ['-w', 'pickle/dataImp', '-t', 'chi2'], ['pickle/dataImp'],
+		['../../data/variants/sigVars.csv', 'pickle/plotData_chi2.p']))
+	stages.append(Stage('test_trend', ['-w', 'pickle/dataImp', '-t', 'trend'], ['pickle/dataImp'],
+		['../../data/variants/sigVars_trend.csv', 'pickle/plotData_trend.p']))
+	stages.append(Stage('translate', ['-tG', '../../data/variants/sigVars.csv'],
+		['../../data/variants/sigVars.csv', '../../data/datasets/Original/ensembl_v37.gtf'],
+		['../../data/genes/geneList.csv']))
+	stages.append(Stage('genes', ['-w', 'pickle/dataImp', '-aG', '../../data/genes/geneList.csv'],
+		['pickle/dataImp', '../../data/genes/geneList.csv'],
+		[datasets.format('dataset_with_genes'), 'pickle/dataGenes']))
+	stages.append(Stage('network', ['-n', '../../data/proteins/interactions_simple.csv'],
+		['../../data/proteins/interactions_simple.csv', '../../data/genes/geneList.csv', '../../data/variants/sigVars.csv'],
+		['../../data/proteins/genes.csv']))
+
+	reduceInputs = {'pval': ['../../data/variants/sigVars.csv'], 'risk': [],
+		'network': ['../../data/proteins/r_genes.csv']}
+	for name, inputs in reduceInputs.items():
+		stages.append(Stage('reduce_' + name, ['-w', 'pickle/dataGenes', '-nF', name],
+			['pickle/dataGenes', '../../data/genes/riskGenes.csv'] + inputs,
+			[datasets.format('reduced_dataset_' + name), '../../data/genes/{}.csv'.format(name)]))
+
+	for name in ['pval', 'network']:
+		stages.append(Stage('top_' + name, ['-d', datasets.format('reduced_dataset_' + name), '--noWorkspace', '-tF', top],
+			[datasets.format('reduced_dataset_' + name)],
+			[datasets.format('top_dataset_' + name), '../../data/features/top100_{}.csv'.format(name),
+			'../../data/genes/top100_{}.csv'.format(name)]))
+
+	for dataset, name in MODEL_DATASETS.items():
+		for classifier, grid in classifiers.items():
+			stages.append(Stage('classify_{}_{}'.format(dataset, classifier),
+				['-d', datasets.format(dataset), '--noWorkspace', '-c', classifier, '-g'] + grid, [datasets.format(dataset)],
+				['../../data/figures/{}/{}_{}.png'.format(name, f, classifier) for f in ['roc_auc', 'matrix']],
+				['../../data/figures/{}_{}.png'.format(f, name) for f in ['rank', 'curve']]))
+
+	writers = {output: stage for stage in stages for output in stage.outputs}
+	for stage in stages:
+		stage.deps = list(dict.fromkeys([writers[i] for i in stage.inputs if i in writers and writers[i] is not stage]))
+	return stages
+
+def selectStages(stages, targets=None):
+	"""Selects the stages needed to run some targets: the targets and all their dependencies.
+
+	Arguments:
+		stages {list} -- Stages of the pipeline.
+
+	Keyword Arguments:
+		targets {list} -- Names of the stages; a name ending in '_' selects all the stages starting \
+		with it, like merge_ or classify_. (default: {None}, all the stages)
+
+	Returns:
+		list -- Selected stages, in the order of stages.
+	"""
+	if not targets: return stages
+	selected = set()
+	pending = [s for s in stages if any([s.name == t or (t.endswith('_') and s.name.startswith(t)) for t in targets])]
+	while pending:
+		stage = pending.pop()
+		if stage.name not in selected:
+			selected.add(stage.name)
+			pending.extend(stage.deps)
+	return [s for s in stages if s.name in selected]
+
+def hashPath(path, hashes):
+	"""Hashes the content of a file, or of all the files of a directory, like genotype stores. The hash \
+		of each file is kept in hashes with its size and modification time, and reused while they are \
+		the same.
+
+	Arguments:
+		path {string} -- Path to the file or directory.
+		hashes {dict} -- Known hashes, updated with the new ones.
+
+	Returns:
+		string -- Hexadecimal hash.
+	"""
+	if os.path.isdir(path):
+		h = hashlib.sha256()
+		for root, dirs, files in os.walk(path):
+			dirs.sort()
+			for f in sorted(files):
+				name = os.path.join(root, f)
+				h.update('{}\t{}\n'.format(os.path.relpath(name, path), hashPath(name, hashes)).encode())
+		return h.hexdigest()
+
+	stat = os.stat(path)
+	signature = [stat.st_size, stat.st_mtime_ns]
+	known = hashes.get(os.path.abspath(path))
+	if known and known[0] == signature: return known[1]
+	h = hashlib.sha256()
+	with open(path, 'rb') as f:
+		block = f.read(1 << 20)
+		#The modification time in the gzip header changes every time a file is written
+		if block[:2] == b'\x1f\x8b': block = block[:4] + bytes(4) + block[8:]
+		while block:
+			h.update(block)
+			block = f.read(1 << 20)
+	hashes[os.path.abspath(path)] = [signature, h.hexdigest()]
+	return h.hexdigest()
+
+def stageKey(stage, hashes):
+	"""Computes the key of a stage from its arguments, its outputs and the content of its inputs.
+
+	Arguments:
+		stage {Stage} -- Stage.
+		hashes {dict} -- Known hashes of the files (see hashPath).
+
+	Returns:
+		string -- Hexadecimal key, or None when an input is missing.
+	"""
+	inputs = []
+	for pattern in stage.inputs:
+		paths = sorted(glob.glob(pattern))
+		if not paths: return None
+		inputs.extend([[p, hashPath(p, hashes)] for p in paths])
+	data = json.dumps({'args': stage.args, 'inputs': inputs, 'outputs': stage.outputs}, sort_keys=True)
+	return hashlib.sha256(data.encode()).hexdigest()
+
+def removePath(path):
+	"""Removes a file or a directory, if it exists."""
+	if os.path.isdir(path): shutil.rmtree(path)
+	elif os.path.lexists(path): os.remove(path)
+
+def linkPath(source, target):
+	"""Hard links a file, or the files of a directory, copying them when links are not possible."""
+	removePath(target)
+	os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+	def link(src, dst):
+		try: os.link(src, dst)
+		except OSError: shutil.copy2(src, dst)
+	if os.path.isdir(source): shutil.copytree(source, target, copy_function=link)
+	else: link(source, target)
+
+def runStage(stage, key, cache, restore=True):
+	"""Runs a stage, or restores its outputs when they are in the cache. The outputs are removed \
+		before main.py is called, so files written in place never change the cached ones.
+
+	Arguments:
+		stage {Stage} -- Stage.
+		key {string} -- Key of the stage.
+		cache {string} -- Directory of the cache.
+
+	Keyword Arguments:
+		restore {bool} -- Restores the outputs from the cache, instead of running the stage. (default: {True})
+
+	Returns:
+		string -- 'restored', 'done' or 'failed'.
+	"""
+	folder = os.path.join(cache, stage.name, key)
+	if restore and os.path.isfile(os.path.join(folder, 'done')):
+		for i, output in enumerate(stage.outputs):
+			linkPath(os.path.join(folder, str(i)), output)
+		return 'restored'
+
+	print('>>> Running {}...'.format(stage.name))
+	for output in stage.outputs: removePath(output)
+	os.makedirs(os.path.join(cache, 'logs'), exist_ok=True)
+	with open(os.path.join(cache, 'logs', stage.name + '.log'), 'w') as log:
+		code = subprocess.call([sys.executable, MAIN] + stage.args, stdout=log, stderr=subprocess.STDOUT)
+	if code != 0 or any([not os.path.exists(o) for o in stage.outputs]): return 'failed'
+
+	removePath(folder)
+	os.makedirs(folder)
+	for i, output in enumerate(stage.outputs):
+		linkPath(output, os.path.join(folder, str(i)))
+	open(os.path.join(folder, 'done'), 'w').close()
+	return 'done'
+
+def run(stages, jobs=1, force=None, dryRun=False, cache=CACHE):
+	"""Runs the stages whose key changed, in parallel when they do not depend on each other. The keys \
+		are computed when all the dependencies of a stage finished, so a stage that rewrote its outputs \
+		with the same content does not invalidate the next ones.
+
+	Arguments:
+		stages {list} -- Stages to run, with their dependencies first (see selectStages).
+
+	Keyword Arguments:
+		jobs {int} -- Number of stages running at the same time. (default: {1})
+		force {list} -- Names of stages that run even when their key did not change. (default: {None})
+		dryRun {bool} -- Only lists the stages that would run. (default: {False})
+		cache {string} -- Directory of the cache. (default: {CACHE})
+
+	Returns:
+		dict -- Status of each stage: 'cached', 'restored', 'done', 'failed', 'missing' (an input does \
+		not exist), 'skipped' (a dependency failed) or, in dry runs, 'run'.
+	"""
+	force = set(force or [])
+	try:
+		with open(os.path.join(cache, 'state.json')) as f: state = json.load(f)
+	except (OSError, ValueError):
+		state = {'hashes': {}, 'stages': {}}
+	os.makedirs(cache, exist_ok=True)
+
+	names = set([s.name for s in stages])
+	status, keys, running = {}, {}, {}
+	pending = list(stages)
+	start = time.time()
+	with ThreadPoolExecutor(max(1, jobs)) as pool:
+		while pending or running:
+			for stage in list(pending):
+				deps = [status.get(d.name) for d in stage.deps if d.name in names]
+				if None in deps or 'running' in deps: continue
+				if set(stage.shared) & set([f for s in running.values() for f in s.shared]): continue
+				pending.remove(stage)
+				if any([d in ['failed', 'missing', 'skipped'] for d in deps]):
+					status[stage.name] = 'skipped'
+					print('>>> {}: {}'.format(stage.name, status[stage.name]))
+					continue
+				if dryRun and 'run' in deps:
+					status[stage.name] = 'run'
+					print('>>> {}: {}'.format(stage.name, status[stage.name]))
+					continue
+				key = stageKey(stage, state['hashes'])
+				if key is None:
+					status[stage.name] = 'missing'
+				elif (key == state['stages'].get(stage.name) and stage.name not in force
+						and all([os.path.exists(o) for o in stage.outputs])):
+					status[stage.name] = 'cached'
+				elif dryRun:
+					status[stage.name] = 'run'
+				else:
+					status[stage.name], keys[stage.name] = 'running', key
+					running[pool.submit(runStage, stage, key, cache, stage.name not in force)] = stage
+				if status[stage.name] != 'running': print('>>> {}: {}'.format(stage.name, status[stage.name]))
+
+			if running:
+				finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+				for future in finished:
+					stage = running.pop(future)
+					status[stage.name] = future.result()
+					if status[stage.name] != 'failed': state['stages'][stage.name] = keys[stage.name]
+					else: state['stages'].pop(stage.name, None)
+					print('>>> {}: {} ({:.0f}s)'.format(stage.name, status[stage.name], time.time() - start))
+				with open(os.path.join(cache, 'state.json.tmp'), 'w') as f: json.dump(state, f)
+				os.replace(os.path.join(cache, 'state.json.tmp'), os.path.join(cache, 'state.json'))
+
+	if not dryRun:
+		with open(os.path.join(cache, 'state.json.tmp'), 'w') as f: json.dump(state, f)
+		os.replace(os.path.join(cache, 'state.json.tmp'), os.path.join(cache, 'state.json'))
+	return status
+
+
+def main():
+	arg_parser = argparse.ArgumentParser(description = 'Runs the stages of the pipeline that are not up to date')
+	arg_parser.add_argument('targets', nargs='*',
+				help = 'Stages to run, with their dependencies (default: all). A name ending in _ selects all \
+					the stages starting with it, like merge_ or classify_')
+	arg_parser.add_argument('-j','--jobs', type = int, default = 1,
+				help = 'Number of stages running in parallel')
+	arg_parser.add_argument('-f','--force', type = str, nargs='+', default = [],
+				help = 'Stages that run even if they are up to date')
+	arg_parser.add_argument('-n','--dry-run', action = 'store_true',
+				help = 'Only lists the stages that would run')
+	arg_parser.add_argument('-l','--list', action = 'store_true',
+				help = 'Lists the stages and their dependencies')
+	arg_parser.add_argument('-cV','--cleanVar', type = int, default = 10,
+				help = 'Maximum percentage of missing values of the variants')
+	arg_parser.add_argument('-iV','--imputeVar', type = str, default = 'most_frequent',
+				help = 'Imputation strategy')
+	arg_parser.add_argument('-tF','--top_features', type = int, default = 25,
+				help = 'Number of top features')
+	args = arg_parser.parse_args()
+
+	stages = selectStages(buildStages(args.cleanVar, args.imputeVar, args.top_features), args.targets)
+	if args.list:
+		for stage in stages:
+			print('{}: {}'.format(stage.name, ', '.join([d.name for d in stage.deps])))
+		return
+
+	status = run(stages, args.jobs, args.force, args.dry_run)
+	counts = {}
+	for s in status.values(): counts[s] = counts.get(s, 0) + 1
+	print('>>> ' + ', '.join(['{} {}'.format(n, s) for s, n in sorted(counts.items())]))
+	if any([s in ['failed', 'missing', 'skipped'] for s in status.values()]): sys.exit(1)
+
+if __name__ == '__main__':
+	main()
@@ -13,12 +13,7 @@ import pandas as pd
 
 import models
 
-from rpy2.robjects.packages import importr
-import rpy2.robjects as ro
-from rpy2.robjects import pandas2ri
-from rpy2.rinterface_lib.callbacks import logger as rpy2_logger
 import logging
-rpy2_logger.setLevel(logging.ERROR)
 
 from sklearn.model_selection import StratifiedKFold
 from sklearn.metrics import confusion_matrix, roc_curve, auc, plot_roc_curve
@@ -37,6 +32,11 @@ def plotManhattan(data, name):
 		name {string} -- Sufix for plot file
 	"""	
 	print('>>> Creating figure...')
+	# rpy2 starts R when it is imported, so it is only loaded by the R plots
+	import rpy2.robjects as ro
+	from rpy2.robjects import pandas2ri
+	from rpy2.rinterface_lib.callbacks import logger as rpy2_logger
+	rpy2_logger.setLevel(logging.ERROR)
 	pandas2ri.activate()
 	r_script = ro.r
 	r_script['source'](r'../R/plotManhattan.R')
@@ -93,15 +93,7 @@ def plotRocCurve(X,y, name, dir, best=False):
 
 	# Parse hyperparameters if provided
 	if best:
-		hyper = {}
-		for i in best:
-			key, val = i.split(':')[0], i.split(':')[1]
-			try: 
-				if val == str(float(val)):  val = float(val)
-				else: val = int(float(val))
-			except: pass
-			finally: hyper[key]=val
-		best = hyper
+		best = models.parseParameters(best)
 		print(best)
 
 	# Cross-Validation
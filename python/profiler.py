@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+'''
+# File: profiler.py
+# Created Date: Sunday October 18th 2026
+# Author: Debora Antunes
+# -----
+# Last Modified: Sunday, October 18th 2026, 8:47:26 pm
+# -----
+'''
+
+import atexit
+import collections
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+try: import resource
+except ImportError: resource = None
+
+'''
+Records where the time and the memory of main.py go (main.py --profile). Each option of main.py is \
+a stage and the hot functions of the modules are decorated with profiled. For each stage, and for \
+each function (added over all its calls), the profile has:
+
+	wall, cpu		elapsed and CPU time, in seconds; childrenCpu is the CPU time of the finished \
+					child processes, like the pools of vcfParser
+	peakRss			peak resident memory, in bytes, while it ran (the peak is reset in the start \
+					of each stage and function when /proc/self/clear_refs is available, otherwise \
+					it is the peak of the process until its end)
+	rows			rows (variants or samples) processed, counted by the functions with count \
+					or taken from the shape of the result
+	read, written	bytes read and written (rchar and wchar of /proc/self/io); diskRead and \
+					diskWritten only count the bytes that reached the disk
+
+With sampling, a thread records the stack of the main thread at that interval and the stacks are \
+saved next to the profile in the collapsed format of flame graphs (<profile>.folded).
+
+When profiling is not enabled, profiled functions only check a flag before being called.
+'''
+
+ENABLED = False
+STACK = [] # Stages and functions running, the innermost in the end
+STAGES = []
+FUNCTIONS = collections.OrderedDict()
+STATE = {'start': None, 'path': None, 'sampler': None, 'peak': 0}
+IO_FIELDS = {'rchar': 'read', 'wchar': 'written', 'read_bytes': 'diskRead', 'write_bytes': 'diskWritten'}
+
+
+def readIo():
+	"""Reads the bytes read and written by the process.
+
+	Returns:
+		dict -- read, written, diskRead and diskWritten, or an empty dict when /proc/self/io is not available.
+	"""
+	try:
+		with open('/proc/self/io') as f:
+			fields = dict([line.split(':') for line in f if ':' in line])
+		return {name: int(fields[key]) for key, name in IO_FIELDS.items() if key in fields}
+	except (OSError, ValueError):
+		return {}
+
+def peakRss():
+	"""Reads the peak resident memory of the process, in bytes."""
+	try:
+		with open('/proc/self/status') as f:
+			for line in f:
+				if line.startswith('VmHWM:'): return int(line.split()[1]) * 1024
+	except OSError: pass
+	return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else 0
+
+def resetPeak():
+	"""Resets the peak resident memory of the process to the current one, when the system allows it."""
+	try:
+		with open('/proc/self/clear_refs', 'w') as f: f.write('5')
+	except OSError: pass
+
+def childrenCpu():
+	"""CPU time of the child processes that finished, in seconds."""
+	if not resource: return 0.0
+	usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+	return usage.ru_utime + usage.ru_stime
+
+def begin(name):
+	"""Starts the record of a stage or function.
+
+	Arguments:
+		name {string} -- Name of the stage or function.
+
+	Returns:
+		dict -- Record, to be closed by end.
+	"""
+	#The peak of the running records is saved before it is reset for the new one
+	peak = peakRss()
+	for record in STACK: record['peakRss'] = max(record['peakRss'], peak)
+	STATE['peak'] = max(STATE['peak'], peak)
+	resetPeak()
+	record = {'name': name, 'start': time.perf_counter() - STATE['start'], 'wall': time.perf_counter(),
+		'cpu': time.process_time(), 'childrenCpu': childrenCpu(), 'peakRss': 0, 'rows': 0, 'io': readIo()}
+	STACK.append(record)
+	return record
+
+def end(record, result=None):
+	"""Closes a record, measuring the resources used since begin.
+
+	Arguments:
+		record {dict} -- Record returned by begin.
+
+	Keyword Arguments:
+		result {object} -- Result of the function; its number of rows is used when nothing was counted. (default: {None})
+
+	Returns:
+		dict -- Record with wall, cpu, childrenCpu, peakRss, rows and the bytes read and written.
+	"""
+	STACK.remove(record)
+	record['wall'] = time.perf_counter() - record['wall']
+	record['cpu'] = time.process_time() - record['cpu']
+	record['childrenCpu'] = childrenCpu() - record['childrenCpu']
+	peak = peakRss()
+	for r in STACK + [record]: r['peakRss'] = max(r['peakRss'], peak)
+	STATE['peak'] = max(STATE['peak'], peak)
+	io = readIo()
+	for key, value in record.pop('io').items(): record[key] = io[key] - value
+	if not record['rows'] and hasattr(result, 'shape') and len(result.shape):
+		#The records that enclose it take the largest result when they counted nothing
+		record['rows'] = int(result.shape[0])
+		for r in STACK: r['rows'] = max(r['rows'], record['rows'])
+	return record
+
+def count(rows):
+	"""Adds processed rows to the running stages and functions.
+
+	Arguments:
+		rows {int} -- Number of rows.
+	"""
+	if ENABLED:
+		for record in STACK: record['rows'] += int(rows)
+
+@contextlib.contextmanager
+def stage(name):
+	"""Records a stage of main.py.
+
+	Arguments:
+		name {string} -- Name of the stage.
+	"""
+	if not ENABLED:
+		yield
+		return
+	record = begin(name)
+	try:
+		yield
+	except BaseException:
+		record['failed'] = True
+		raise
+	finally:
+		STAGES.append(end(record))
+
+def profiled(function):
+	"""Decorator that adds the resources used by each call of a function to its record."""
+	name = '{}.{}'.format(function.__module__, function.__qualname__)
+
+	@functools.wraps(function)
+	def wrapper(*args, **kwargs):
+		if not ENABLED: return function(*args, **kwargs)
+		record = begin(name)
+		result = None
+		try:
+			result = function(*args, **kwargs)
+			return result
+		finally:
+			end(record, result)
+			total = FUNCTIONS.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'childrenCpu': 0.0, 'peakRss': 0, 'rows': 0})
+			total['calls'] += 1
+			for key, value in record.items():
+				if key == 'peakRss': total[key] = max(total[key], value)
+				elif key not in ['name', 'start']: total[key] = total.get(key, 0) + value
+	return wrapper
+
+
+class Sampler(threading.Thread):
+	"""Samples the stack of a thread at a fixed interval and counts the collapsed stacks.
+
+	Arguments:
+		interval {float} -- Interval between samples, in seconds.
+
+	Keyword Arguments:
+		thread {int} -- Identifier of the sampled thread. (default: {None}, the main thread)
+	"""
+
+	def __init__(self, interval, thread=None):
+		super().__init__(daemon=True)
+		self.interval = interval
+		self.thread = thread or threading.main_thread().ident
+		self.stacks = collections.Counter()
+		self.running = threading.Event()
+
+	def run(self):
+		while not self.running.wait(self.interval):
+			frame = sys._current_frames().get(self.thread)
+			stack = []
+			while frame is not None:
+				code = frame.f_code
+				stack.append('{}:{}'.format(os.path.basename(code.co_filename), code.co_name))
+				frame = frame.f_back
+			if stack: self.stacks[';'.join(reversed(stack))] += 1
+
+	def stop(self):
+		self.running.set()
+		self.join()
+
+	def write(self, path):
+		"""Saves the stacks in the collapsed format (one 'stack count' per line)."""
+		with open(path, 'w') as f:
+			for stack, n in self.stacks.most_common(): f.write('{} {}\n'.format(stack, n))
+
+
+def enable(path=None, sampling=None):
+	"""Starts profiling; the profile is saved when the process ends.
+
+	Keyword Arguments:
+		path {string} -- Path to the JSON file with the profile. (default: {None}, the records are only \
+		kept in STAGES and FUNCTIONS)
+		sampling {float} -- Interval of the sampling profiler, in milliseconds. (default: {None}, no sampling)
+	"""
+	global ENABLED
+	ENABLED = True
+	STATE['start'], STATE['path'] = time.perf_counter(), path
+	if sampling:
+		STATE['sampler'] = Sampler(sampling / 1000)
+		STATE['sampler'].start()
+	if path: atexit.register(write)
+
+def reset():
+	"""Clears the records of the stages and functions."""
+	del STAGES[:]
+	FUNCTIONS.clear()
+	STATE['peak'] = 0
+
+def write():
+	"""Saves the profile in STATE['path'] and, with sampling, the stacks in <path>.folded."""
+	if not STATE['path']: return
+	profile = {'command': sys.argv, 'pid': os.getpid(), 'wall': time.perf_counter() - STATE['start'],
+		'cpu': time.process_time(), 'childrenCpu': childrenCpu(), 'peakRss': max(STATE['peak'], peakRss()),
+		'stages': STAGES, 'functions': FUNCTIONS, 'folded': None}
+	if os.path.dirname(STATE['path']): os.makedirs(os.path.dirname(STATE['path']), exist_ok=True)
+	if STATE['sampler']:
+		STATE['sampler'].stop()
+		STATE['sampler'].write(STATE['path'] + '.folded')
+		profile['folded'] = STATE['path'] + '.folded'
+	with open(STATE['path'], 'w') as f: json.dump(profile, f, indent=1)
+	print('>>> Profile saved in {}'.format(STATE['path']))
+	STATE['path'] = None
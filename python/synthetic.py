@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+'''
+# File: synthetic.py
+# Created Date: Sunday October 18th 2026
+# Author: Debora Antunes
+# -----
+# Last Modified: Sunday, October 18th 2026, 9:31:05 pm
+# -----
+'''
+
+import argparse
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import vcfIndex
+
+CHROMOSOMES = [str(i) for i in range(1, 23)] + ['X']
+CASES = 'vcf/cases/All_PT_{}.vcf.gz'
+CONTROLS = 'vcf/controls/ALL.chr{}.phase3_shapeit2_mvncall_integrated_v5a.20130502.genotypes.vcf.gz'
+SAMPLES = 'vcf/igsr_samples.tsv'
+BASES = np.array(list('ACGT'))
+TYPES = (['SNP', 'INDEL', 'SV'], [0.9, 0.08, 0.02]) # Types of variant (VT) and their frequency
+
+'''
+Creates a synthetic cohort with the layout of the data folder, so that the pipeline can be run and \
+benchmarked without the real VCF files:
+
+	vcf/cases/All_PT_<chr>.vcf.gz			cases (samples Ex<n>), bgzipped and indexed
+	vcf/controls/ALL.chr<chr>.phase3_...vcf.gz	controls (samples HG<n>), like the 1000 Genomes files
+	vcf/igsr_samples.tsv				samples file of the controls
+	genes/geneList.csv				genes of the variants, as created by geneSelection.geneTranslation
+	genes/riskGenes.csv				genes with variants associated with the disease
+
+The variants of each chromosome are shared by cases and controls; the cases only have part of them \
+(overlap), like the exomes against the genomes of the controls. The allele frequencies follow a \
+spectrum with many rare variants, some variants are multi-allelic and, in a fraction of them \
+(causal), the frequency of the alternative alleles in the cases is multiplied by odds. The genotypes \
+are drawn in Hardy-Weinberg equilibrium, with a rate of missing genotypes.
+
+The cohort only depends on the arguments: the same seed always creates the same files.
+'''
+
+
+def generator(seed, *keys):
+	"""Creates a random generator that only depends on the seed and on the keys.
+
+	Arguments:
+		seed {int} -- Seed of the cohort.
+		keys {string} -- Names of what is generated, like the chromosome.
+
+	Returns:
+		numpy.random.Generator -- Random generator.
+	"""
+	return np.random.default_rng([seed] + [zlib.crc32(str(k).encode()) for k in keys])
+
+def makeSites(chrom, n, seed=0, multiallelic=0.02, causal=0.01, odds=2.0, overlap=0.8):
+	"""Creates the variants of a chromosome.
+
+	Arguments:
+		chrom {string} -- Name of the chromosome.
+		n {int} -- Number of variants.
+
+	Keyword Arguments:
+		seed {int} -- Seed of the cohort. (default: {0})
+		multiallelic {float} -- Fraction of variants with 2 or 3 alternative alleles. (default: {0.02})
+		causal {float} -- Fraction of variants associated with the disease. (default: {0.01})
+		odds {float} -- Factor of the frequency of the alternative alleles of the causal variants \
+		in the cases. (default: {2.0})
+		overlap {float} -- Fraction of variants present in the cases. (default: {0.8})
+
+	Returns:
+		pandas.Dataframe -- POS, REF, ALT, INFO, the frequency of each allele in the controls \
+		and in the cases (lists, starting by REF), causal and inCases of each variant.
+	"""
+	rng = generator(seed, 'sites', chrom)
+	pos = np.cumsum(rng.integers(1, 200, n))
+	vt = rng.choice(TYPES[0], size=n, p=TYPES[1])
+	alts = np.where(rng.random(n) < multiallelic, rng.integers(2, 4, n), 1)
+	alts[vt == 'SV'] = 1
+	total = np.clip(rng.beta(0.5, 3, n), 0.005, 0.95)
+	isCausal = rng.random(n) < causal
+	inCases = rng.random(n) < overlap
+
+	ref = rng.integers(0, 4, n)
+	#Alternative bases of the SNPs are distinct shifts of the reference base
+	shifts = rng.permuted(np.tile([1, 2, 3], (n, 1)), axis=1)
+	inserted = rng.integers(0, 4, (n, 3))
+	split = rng.dirichlet(np.ones(3), n)
+	alt, info, controls, cases = [], [], [], []
+	for i in range(n):
+		k = alts[i]
+		if vt[i] == 'SV': a = ['<DEL>']
+		elif vt[i] == 'INDEL': a = [BASES[ref[i]] + ''.join(BASES[inserted[i, :j+1]]) for j in range(k)]
+		else: a = list(BASES[(ref[i] + shifts[i, :k]) % 4])
+		freq = total[i] * (split[i, :k] / split[i, :k].sum())
+		caseFreq = freq * odds if isCausal[i] else freq
+		caseFreq = caseFreq * min(1.0, 0.95 / caseFreq.sum())
+		alt.append(','.join(a))
+		info.append('VT={};AF={}{}'.format(vt[i], ','.join(['{:.4f}'.format(f) for f in freq]),
+			';MULTI_ALLELIC' if k > 1 else ''))
+		controls.append([1 - freq.sum()] + list(freq))
+		cases.append([1 - caseFreq.sum()] + list(caseFreq))
+	return pd.DataFrame({'POS': pos, 'REF': BASES[ref], 'ALT': alt, 'INFO': info, 'controls': controls,
+		'cases': cases, 'causal': isCausal, 'inCases': inCases})
+
+def drawGenotypes(rng, freqs, samples, missing=0.0, phased=True):
+	"""Draws the genotypes of a block of variants and formats them as the samples columns of a VCF file.
+
+	Arguments:
+		rng {numpy.random.Generator} -- Random generator.
+		freqs {list} -- Frequency of each allele (starting by REF) of each variant.
+		samples {int} -- Number of samples.
+
+	Keyword Arguments:
+		missing {float} -- Rate of missing genotypes. (default: {0.0})
+		phased {bool} -- Separates the alleles by '|' instead of '/'. (default: {True})
+
+	Returns:
+		list -- Samples columns (bytes, ending by a new line) of each variant.
+	"""
+	width = max([len(f) for f in freqs])
+	cum = np.ones((len(freqs), width))
+	for i, f in enumerate(freqs): cum[i, :len(f)] = np.cumsum(f)
+	cum[:, -1] = 1.0
+
+	#Each allele is the first one whose cumulative frequency is above a uniform value
+	u = rng.random((len(freqs), samples, 2))
+	alleles = (u[..., None] >= cum[:, None, None, :-1]).sum(-1)
+	char = np.empty((len(freqs), samples, 4), dtype=np.uint8)
+	char[..., 0] = alleles[..., 0] + ord('0')
+	char[..., 1] = ord('|') if phased else ord('/')
+	char[..., 2] = alleles[..., 1] + ord('0')
+	char[..., 3] = ord('\t')
+	char[:, -1, 3] = ord('\n')
+	if missing:
+		gaps = rng.random((len(freqs), samples)) < missing
+		char[gaps, 0] = ord('.')
+		char[gaps, 2] = ord('.')
+	return [row.tobytes() for row in char]
+
+def writeVcf(path, chrom, sites, samples, name, seed=0, missing=0.0, phased=True, chunksize=2000, index=True):
+	"""Writes the genotypes of a group of samples in a bgzipped VCF file.
+
+	Arguments:
+		path {string} -- Path to the VCF file.
+		chrom {string} -- Name of the chromosome.
+		sites {pandas.Dataframe} -- Variants of the file (see makeSites).
+		samples {list} -- Names of the samples.
+		name {string} -- Type of dataset (cases or controls), used to select the allele frequencies.
+
+	Keyword Arguments:
+		seed {int} -- Seed of the cohort. (default: {0})
+		missing {float} -- Rate of missing genotypes. (default: {0.0})
+		phased {bool} -- Writes phased genotypes. (default: {True})
+		chunksize {int} -- Number of variants drawn at once. (default: {2000})
+		index {bool} -- Creates the tabix index of the file. (default: {True})
+	"""
+	rng = generator(seed, name, chrom)
+	os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+	writer = vcfIndex.BgzfWriter(path + '.part')
+	writer.write('##fileformat=VCFv4.1\n')
+	writer.write('##INFO=<ID=VT,Number=.,Type=String,Description="Type of variant">\n')
+	writer.write('##INFO=<ID=AF,Number=A,Type=Float,Description="Allele frequency">\n')
+	writer.write('##INFO=<ID=MULTI_ALLELIC,Number=0,Type=Flag,Description="Multi-allelic site">\n')
+	writer.write('##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">\n')
+	writer.write('##contig=<ID={}>\n'.format(chrom))
+	writer.write('\t'.join(['#CHROM','POS','ID','REF','ALT','QUAL','FILTER','INFO','FORMAT'] + list(samples)) + '\n')
+	for start in range(0, len(sites), chunksize):
+		block = sites.iloc[start:start+chunksize]
+		genotypes = drawGenotypes(rng, list(block[name]), len(samples), missing, phased)
+		for row, gt in zip(block.itertuples(index=False), genotypes):
+			writer.write('{}\t{}\t.\t{}\t{}\t.\tPASS\t{}\tGT\t'.format(chrom, row.POS, row.REF, row.ALT, row.INFO).encode() + gt)
+	writer.close()
+	os.replace(path + '.part', path)
+	if index: vcfIndex.buildIndex(path)
+
+def geneList(sites, chrom, seed=0):
+	"""Assigns the variants of a chromosome to genes: runs of consecutive variants belong to the \
+		same gene and about one third of the runs are intergenic (None).
+
+	Arguments:
+		sites {pandas.Dataframe} -- Variants of the chromosome (see makeSites).
+		chrom {string} -- Name of the chromosome.
+
+	Keyword Arguments:
+		seed {int} -- Seed of the cohort. (default: {0})
+
+	Returns:
+		pandas.Dataframe -- Genes and Variants, and causal for each variant.
+	"""
+	rng = generator(seed, 'genes', chrom)
+	sizes = rng.integers(5, 40, len(sites) // 5 + 1)
+	run = np.repeat(np.arange(len(sizes)), sizes)[:len(sites)]
+	names = np.where(rng.random(len(sizes)) < 0.3, 'None', ['G{}_{}'.format(chrom, i) for i in range(len(sizes))])
+	return pd.DataFrame({'Genes': names[run], 'Variants': ['chr{}:{}'.format(chrom, p) for p in sites['POS']],
+		'causal': sites['causal'].values})
+
+def generateCohort(root='../../data', cases=100, controls=500, variants=10000, chromosomes=CHROMOSOMES, seed=0,
+		multiallelic=0.02, missing=0.01, phased=True, overlap=0.8, causal=0.01, odds=2.0):
+	"""Creates the VCF files of a synthetic cohort, its samples file and the lists of genes.
+
+	Keyword Arguments:
+		root {string} -- Data folder. (default: {'../../data'})
+		cases {int} -- Number of cases. (default: {100})
+		controls {int} -- Number of controls. (default: {500})
+		variants {int} -- Total number of variants, split by the chromosomes. (default: {10000})
+		chromosomes {list} -- Chromosomes created. (default: {CHROMOSOMES})
+		seed {int} -- Seed of the cohort. (default: {0})
+		multiallelic {float} -- Fraction of multi-allelic variants. (default: {0.02})
+		missing {float} -- Rate of missing genotypes. (default: {0.01})
+		phased {bool} -- Writes phased genotypes. (default: {True})
+		overlap {float} -- Fraction of variants present in the cases. (default: {0.8})
+		causal {float} -- Fraction of variants associated with the disease. (default: {0.01})
+		odds {float} -- Factor of the frequency of the alternative alleles of the causal variants \
+		in the cases. (default: {2.0})
+
+	Returns:
+		dict -- Number of samples and variants, and the size in bytes of the VCF files.
+	"""
+	caseSamples = ['Ex{}'.format(i) for i in range(cases)]
+	controlSamples = ['HG{:05d}'.format(i) for i in range(controls)]
+	os.makedirs(os.path.join(root, 'genes'), exist_ok=True)
+	os.makedirs(os.path.dirname(os.path.join(root, SAMPLES)), exist_ok=True)
+	pd.DataFrame({'Sample name': controlSamples, 'Population code': 'IBS'}).to_csv(os.path.join(root, SAMPLES),
+		sep='\t', index=False)
+
+	genes, size = [], 0
+	counts = np.full(len(chromosomes), variants // len(chromosomes))
+	counts[:variants % len(chromosomes)] += 1
+	for chrom, n in zip(chromosomes, counts):
+		print('>>> Creating chromosome {} ({} variants)...'.format(chrom, n))
+		sites = makeSites(chrom, int(n), seed, multiallelic, causal, odds, overlap)
+		writeVcf(os.path.join(root, CASES.format(chrom)), chrom, sites[sites['inCases']], caseSamples, 'cases',
+			seed, missing, phased)
+		writeVcf(os.path.join(root, CONTROLS.format(chrom)), chrom, sites, controlSamples, 'controls',
+			seed, missing, phased)
+		size += os.path.getsize(os.path.join(root, CASES.format(chrom))) + \
+			os.path.getsize(os.path.join(root, CONTROLS.format(chrom)))
+		genes.append(geneList(sites, chrom, seed))
+
+	genes = pd.concat(genes, ignore_index=True)
+	genes[['Genes', 'Variants']].to_csv(os.path.join(root, 'genes/geneList.csv'), index=False)
+	risk = sorted(set(genes['Genes'][genes['causal']]) - set(['None']))
+	pd.DataFrame({'Locus': risk}).to_csv(os.path.join(root, 'genes/riskGenes.csv'), sep=';', index=False)
+	return {'cases': cases, 'controls': controls, 'variants': int(variants), 'bytes': size}
+
+
+def main():
+	arg_parser = argparse.ArgumentParser(description = 'Creates a synthetic cohort of cases and controls')
+	arg_parser.add_argument('-o','--output', type = str, default = '../../data',
+				help = 'Data folder where the files are created')
+	arg_parser.add_argument('--cases', type = int, default = 100,
+				help = 'Number of cases')
+	arg_parser.add_argument('--controls', type = int, default = 500,
+				help = 'Number of controls')
+	arg_parser.add_argument('--variants', type = int, default = 10000,
+				help = 'Total number of variants, split by the chromosomes')
+	arg_parser.add_argument('--chromosomes', type = str, nargs='*', default = CHROMOSOMES,
+				help = 'Chromosomes created (default: 1 to 22 and X)')
+	arg_parser.add_argument('--seed', type = int, default = 0,
+				help = 'Seed of the cohort; the same seed always creates the same files')
+	arg_parser.add_argument('--multiallelic', type = float, default = 0.02,
+				help = 'Fraction of variants with more than one alternative allele')
+	arg_parser.add_argument('--missing', type = float, default = 0.01,
+				help = 'Rate of missing genotypes')
+	arg_parser.add_argument('--unphased', action = 'store_true',
+				help = 'Writes unphased genotypes (\'0/1\' instead of \'0|1\')')
+	arg_parser.add_argument('--overlap', type = float, default = 0.8,
+				help = 'Fraction of the variants present in the cases')
+	arg_parser.add_argument('--causal', type = float, default = 0.01,
+				help = 'Fraction of the variants associated with the disease')
+	arg_parser.add_argument('--odds', type = float, default = 2.0,
+				help = 'Factor of the frequency of the alternative alleles of the causal variants in the cases')
+	args = arg_parser.parse_args()
+
+	cohort = generateCohort(args.output, args.cases, args.controls, args.variants, args.chromosomes, args.seed,
+		args.multiallelic, args.missing, not args.unphased, args.overlap, args.causal, args.odds)
+	print('>>> {cases} cases, {controls} controls, {variants} variants ({bytes} bytes)'.format(**cohort))
+
+if __name__ == '__main__':
+	main()
@@ -12,10 +12,13 @@
 import numpy as np
 import pandas as pd
 import gzip
-from sklearn.impute import SimpleImputer
-from sklearn.feature_selection import VarianceThreshold
+import os
 
-def loadData(name, case, control):
+import genotypeStore
+import profiler
+
+@profiler.profiled
+def loadData(name, case, control, store=False):
 	"""Merges the data between the case and control datasets according to the variant, REF and ALT.
 	Changes the format of the dataset to
 
@@ -27,72 +30,168 @@ def loadData(name, case, control):
 
 	Also creates a file INFO that provides the position, REF and ALT info for each variant.
 
+	Both datasets (csv.gz files or genotype stores) are read in blocks and joined by mergeJoin. When \
+	both are genotype stores, the merged dataset is also saved in a genotype store, without the \
+	transposition. Otherwise, the matched blocks are appended to a temporary file, transposed to a \
+	matrix of samples x variants preallocated in a memory-mapped file and written in the csv.gz file \
+	by blocks of samples, so the memory used does not depend on the size of the chromosome.
+
 	Arguments:
 		name {string} -- Name of the chromosome.
 		case {string} -- Path to the Cases dataset.
 		control {string} -- Path to the Controls dataset.
+
+	Keyword Arguments:
+		store {bool} -- Saves the merged dataset in a genotype store. (default: {False})
 	"""	
 	print('>>> Loading datasets...')
-	case = pd.read_csv(case, compression = 'gzip', sep='\t')
-	var=list(case['VAR'])
-	control = filterControls(control, var)
-	dataset, info = mergeData(case,control)
-	saveData(dataset, info, name)
-	
+	store = store or (genotypeStore.isStore(case) and genotypeStore.isStore(control))
+	caseSamples, caseBlocks = readBlocks(case, nan=not store)
+	controlSamples, controlBlocks = readBlocks(control, nan=not store)
+	print('>>> Merging...')
+	if store:
+		dosage = genotypeStore.isStore(case) and genotypeStore.GenotypeStore(case).meta['dosage']
+		writer = genotypeStore.StoreWriter('../../data/datasets/chr/chr{}'.format(name), caseSamples + controlSamples, 
+			dosage=dosage)
+	else:
+		output = '../../data/datasets/chr/chr{}.csv.gz'.format(name)
+		buffer = open(output + '.variants', 'wb')
+	info = []
+	for variants, caseGT, controlGT in mergeJoin(caseBlocks, controlBlocks):
+		info.append(variants)
+		if store:
+			writer.append(variants.values.tolist(), np.hstack([caseGT, controlGT]))
+			writer.commit()
+		else: buffer.write(np.hstack([caseGT, controlGT]).astype(np.float64).tobytes())
+	info = pd.concat(info, ignore_index=True) if info else pd.DataFrame(columns=['VAR','REF','ALT'])
 
-def filterControls(control, var):
-	"""Filters the variants of the controls dataset with the list of variants that exist in the cases dataset.
+	if store:
+		writer.close()
+		info.to_csv('../../data/datasets/chr/INFO_chr{}.csv'.format(name), header=True, index=False)
+		return
+	buffer.close()
+	samples = caseSamples + controlSamples
+	shape = (len(info), len(samples))
+	matrix = np.lib.format.open_memmap(output + '.npy', mode='w+', dtype=np.float64, shape=shape[::-1])
+	if len(info):
+		genotypeStore.transpose(np.memmap(output + '.variants', dtype=np.float64, mode='r', shape=shape), out=matrix)
+		matrix.flush()
+	os.remove(output + '.variants')
+	saveData(pd.DataFrame(matrix, index=samples, columns=info['VAR'].values, copy=False), info, name)
+	del matrix
+	os.remove(output + '.npy')
+
+def readBlocks(path, nan=True, chunksize=100000):
+	"""Reads the dataset of a chromosome, a csv.gz file or a genotype store, in blocks of variants.
 
 	Arguments:
-		control {string} -- Path to controls dataset.
-		var {list} -- List of variants in the cases dataset.
+		path {string} -- Path to the dataset.
+
+	Keyword Arguments:
+		nan {bool} -- Returns the genotypes as floats where missing values are NaN, like the csv.gz \
+		files. Otherwise, the genotypes of stores keep their type. (default: {True})
+		chunksize {int} -- Number of variants in each block of csv.gz files. (default: {100000})
 
 	Returns:
-		pandas.Dataframe -- Filtered controls dataset.
-	"""	
-	df = pd.DataFrame()
-	chunks=[]
-	for chunk in pd.read_csv(control, quoting=3, sep='\t', chunksize=250000):
-		chunks.append(chunk[chunk['VAR'].isin(var)].copy())
-		data = pd.concat(chunks)
-		df = pd.concat([df, data], ignore_index=True)
-	return (df)
-
-def mergeData(case,control):
-	"""Merges the two dataset based in the position and ref and alt alleles. Only saves rows where these three \
-		are the same.
+		tuple -- The samples and a generator of blocks, each with the VAR, REF and ALT of the \
+		variants (pandas.Dataframe) and their genotypes (numpy.ndarray).
+	"""
+	if genotypeStore.isStore(path):
+		store = genotypeStore.GenotypeStore(path)
+		blocks = ((variants, genotypeStore.toFloat(matrix, store.missing) if nan else matrix) 
+			for variants, matrix in store.iterBlocks())
+		return store.samples, blocks
+
+	samples = list(pd.read_csv(path, quoting=3, sep='\t', nrows=0).columns[3:])
+	reader = pd.read_csv(path, quoting=3, sep='\t', chunksize=chunksize, dtype={'VAR': str, 'REF': str, 'ALT': str})
+	blocks = ((chunk[['VAR','REF','ALT']].reset_index(drop=True), chunk.iloc[:,3:].values.astype(np.float64)) 
+		for chunk in reader)
+	return samples, blocks
+
+def mergeJoin(left, right):
+	"""Joins two datasets of a chromosome sorted by position, like the VCF files, keeping the variants \
+		with the same position, REF and ALT in both. The blocks are read alternately and the variants \
+		before the last position read in both datasets are joined and returned, so the memory used \
+		depends on the size of the blocks and not on the size of the chromosome. Variants repeated in \
+		a dataset are only returned once.
 
 	Arguments:
-		case {pandas.Dataframe} -- Dataset for cases.
-		control {pandas.Dataframe} -- Dataset for controls.
+		left {iterable} -- Blocks of the first dataset, as returned by readBlocks.
+		right {iterable} -- Blocks of the second dataset, as returned by readBlocks.
 
 	Returns:
-		tuple of pandas.Dataframe -- The merged dataset and the info for each variant saved.
-	"""	
-	print('>>> Merging...')
-	dataset = pd.merge(case, control, on = ['VAR','REF','ALT'], how = 'inner')
-	dataset = dataset.drop_duplicates()
-	info = dataset[['VAR','REF','ALT']]
-	dataset = dataset.drop(['REF','ALT'], axis=1).set_index('VAR')
-	dataset.index.name = None
-	dataset = dataset.T
-	return (dataset, info)
+		generator -- For each block of matched variants, their VAR, REF and ALT (pandas.Dataframe) and \
+		their genotypes in the first and in the second dataset (numpy.ndarray).
+	"""
+	sources = [iter(left), iter(right)]
+	buffers = [None, None]
+	done = [False, False]
+	last = [-1, -1]
+
+	def pull(i):
+		variants, matrix = next(sources[i], (None, None))
+		if variants is None:
+			done[i] = True
+			return
+		pos = variants['VAR'].str.rsplit(':', n=1).str[1].astype(np.int64).values
+		if len(pos) and (pos[0] < last[i] or (np.diff(pos) < 0).any()):
+			raise ValueError('The datasets must be sorted by position.')
+		if len(pos): last[i] = pos[-1]
+		if buffers[i] is not None:
+			variants = pd.concat([buffers[i][0], variants], ignore_index=True)
+			matrix = np.concatenate([buffers[i][1], matrix])
+			pos = np.concatenate([buffers[i][2], pos])
+		buffers[i] = (variants, matrix, pos)
+
+	while True:
+		for i in (0, 1):
+			while not done[i] and (buffers[i] is None or not len(buffers[i][2])): pull(i)
+		ends = [np.inf if done[i] else buffers[i][2][-1] for i in (0, 1)]
+		boundary = min(ends)
+
+		#Variants before the boundary can not match the variants of the next blocks
+		ready = []
+		for i in (0, 1):
+			if buffers[i] is None:
+				ready.append(None)
+				continue
+			variants, matrix, pos = buffers[i]
+			cut = np.searchsorted(pos, boundary, side='left') if boundary != np.inf else len(pos)
+			ready.append((variants.iloc[:cut], matrix[:cut]))
+			buffers[i] = (variants.iloc[cut:].reset_index(drop=True), matrix[cut:], pos[cut:])
 
-def saveData(data, info, name):
-	"""Saves the merged dataset in a csv.gz file. Also saves the info for each variant ina csv file.
+		if ready[0] is not None and ready[1] is not None and len(ready[0][0]) and len(ready[1][0]):
+			matched = pd.merge(ready[0][0].assign(left=np.arange(len(ready[0][0]))), 
+				ready[1][0].assign(right=np.arange(len(ready[1][0]))), on = ['VAR','REF','ALT'], how = 'inner')
+			matched = matched.sort_values(['left','right']).drop_duplicates(['VAR','REF','ALT'])
+			if matched.shape[0]:
+				profiler.count(len(matched))
+				yield (matched[['VAR','REF','ALT']].reset_index(drop=True), ready[0][1][matched['left'].values], 
+					ready[1][1][matched['right'].values])
+
+		if done[0] and done[1]: return
+		for i in (0, 1):
+			if not done[i] and ends[i] == boundary: pull(i)
+
+def saveData(data, info, name, chunksize=100):
+	"""Saves the merged dataset in a csv.gz file, by blocks of samples. Also saves the info for each variant ina csv file.
 
 	Arguments:
 		data {pandas.Dataframe} -- Merged dataset
 		name {string} -- The chromosome name
 		info {pandas.Dataframe} -- The info dataset
+
+	Keyword Arguments:
+		chunksize {int} -- Number of samples written at once in the csv.gz file. (default: {100})
 	"""	
-	df = data.to_csv(header=True, index=True, index_label='Samples')
 	with gzip.open('../../data/datasets/chr/chr{}.csv.gz'.format(name), 'wt') as f:
-		f.write(df)
+		for i in range(0, max(len(data), 1), chunksize):
+			data.iloc[i:i+chunksize].to_csv(f, header=i == 0, index=True, index_label='Samples')
 		
 	info.to_csv('../../data/datasets/chr/INFO_chr{}.csv'.format(name), header=True, index=False)
 	
-def mergeAll():
+@profiler.profiled
+def mergeAll(store=False, chunksize=100):
 	"""Merges all chromosomes files in one, adds the label for cases and controls and saves a final merged csv.gz file.
 	Changes the format of the dataset to
 
@@ -102,51 +201,113 @@ def mergeAll():
 
 	where rows are samples and columns are variants, with the exception of the last one, labels, that
 	characterizes the samples by case (1) and control (0).
+
+	The chromosomes are assembled out of core: the samples and the variants of each file are listed \
+	first, then each chromosome is loaded in turn and copied to its block of columns in a matrix \
+	preallocated in a memory-mapped file, which is written in the csv.gz file by blocks of samples. \
+	Samples absent from a chromosome have missing values in its variants.
+
+	Keyword Arguments:
+		store {bool} -- Merges the genotype stores of the chromosomes in the merged_dataset genotype \
+		store, where the labels are saved in the samples table. (default: {False})
+		chunksize {int} -- Number of samples written at once in the csv.gz file. (default: {100})
 	"""	
 	region = [str(i) for i in range(1, 23)]
 	region.extend(['X'])
-	df = pd.DataFrame()
-	for f in region:
-		data = pd.read_csv('../../data/datasets/chr/chr{}.csv.gz'.format(f), compression = 'gzip')
-		data = data.set_index('Samples')
-		df = pd.concat([df, data], axis=1)
-
-	for i in list(df.index):
-		df.loc[i,'labels'] = '1' if i.startswith('Ex') else '0'
-	df = df.reset_index().drop(['Samples'], axis=1)
-	print(df)
-	df.to_csv('../../data/datasets/merged_dataset.csv.gz', header=True, index=False, compression = 'gzip')
-
-def cleanMissing(data, perc):
+	if store:
+		parts = ['../../data/datasets/chr/chr{}'.format(f) for f in region]
+		samples = list(dict.fromkeys([s for p in parts for s in genotypeStore.GenotypeStore(p).samples]))
+		print(genotypeStore.concat('../../data/datasets/merged_dataset', parts, samples, sampleLabels(samples)).shape)
+		return
+
+	#Lists the samples and the variants of all chromosomes
+	paths = ['../../data/datasets/chr/chr{}.csv.gz'.format(f) for f in region]
+	columns, blocks, samples = [], [], {}
+	for path in paths:
+		variants = list(pd.read_csv(path, compression = 'gzip', nrows=0).columns[1:])
+		blocks.append((len(columns), len(columns) + len(variants)))
+		columns.extend(variants)
+		for s in pd.read_csv(path, compression = 'gzip', usecols=['Samples'], dtype=str)['Samples']: 
+			samples.setdefault(s, len(samples))
+
+	print('>>> Assembling {} samples and {} variants...'.format(len(samples), len(columns)))
+	output = '../../data/datasets/merged_dataset.csv.gz'
+	matrix = np.lib.format.open_memmap(output + '.npy', mode='w+', dtype=np.float64, shape=(len(samples), len(columns)))
+	for path, (start, end) in zip(paths, blocks):
+		data = pd.read_csv(path, compression = 'gzip', dtype={'Samples': str}).set_index('Samples')
+		rows = np.array([samples[s] for s in data.index])
+		if len(rows) < len(samples): matrix[:, start:end] = np.nan
+		if np.array_equal(rows, np.arange(len(samples))): matrix[:, start:end] = data.values
+		else: matrix[rows, start:end] = data.values
+		matrix.flush()
+		del data
+
+	labels = sampleLabels(list(samples))
+	with gzip.open(output + '.part', 'wt') as f:
+		for i in range(0, len(samples), chunksize):
+			block = pd.DataFrame(matrix[i:i+chunksize], columns=columns)
+			block['labels'] = labels[i:i+chunksize]
+			block.to_csv(f, header=i == 0, index=False)
+	os.replace(output + '.part', output)
+	del matrix
+	os.remove(output + '.npy')
+	print('>>> Merged dataset with {} samples ({} cases) and {} variants'.format(len(samples), labels.sum(), len(columns)))
+
+def sampleLabels(samples):
+	"""Labels the samples by case (1) and control (0); cases are the samples starting by Ex.
+
+	Arguments:
+		samples {list} -- Sample names.
+
+	Returns:
+		numpy.ndarray -- Label of each sample.
+	"""
+	return np.where(pd.Series(samples, dtype=str).str.startswith('Ex').values, 1, 0)
+
+@profiler.profiled
+def cleanMissing(data, perc, stats=None):
 	"""Removes the columns that have more than a given percentage of missing data.
 
 	Arguments:
 		data {pandas.Dataframe} -- Dataset with no pre-processing.
 		perc {float} -- Percentage of missing data chosen.
 
+	Keyword Arguments:
+		stats {pandas.Dataframe} -- Statistics of the variants in the order of the columns, like the \
+		ones of a genotype store, used instead of counting the missing values. (default: {None})
+
 	Returns:
 		pandas.Dataframe -- Cleaned dataset
 	"""	
-	cols = []
-	for c in range(data.shape[1]-1):
-		if data.iloc[:,c].isna().sum() / data.shape[0] * 100 > perc:
-			cols.append(c)
+	if stats is not None and stats.shape[0] == data.shape[1]-1:
+		missing = stats['missing'].values / data.shape[0] * 100
+	else:
+		missing = data.iloc[:,:-1].isna().sum().values / data.shape[0] * 100
+	cols = np.flatnonzero(missing > perc)
 	print('Number of deleted columns: ', len(cols))
-	data = data.drop(data.columns[cols], axis=1)
+	#The columns are kept by position, since variants of multi-allelic sites repeat their names
+	data = data.iloc[:, np.setdiff1d(np.arange(data.shape[1]), cols)]
 	print(data)
 	return data
 
 
-def doImputation(data, strat):
+@profiler.profiled
+def doImputation(data, strat, path=None):
 	"""Imputation of NaN values using different stratagies
 
 	Arguments:
-		data {pandas.Dataframe} -- Dataset to impute
+		data {pandas.Dataframe} -- Dataset to impute, or an int8 genotype store (see imputeStore)
 		strat {string} -- Imputation strategy
 
+	Keyword Arguments:
+		path {string} -- Path to the imputed store, when data is a store. (default: {None})
+
 	Returns:
-		pandas.Dataframe -- Imputated dataset
+		pandas.Dataframe -- Imputated dataset (GenotypeStore when data is a store)
 	"""	
+	if isinstance(data, genotypeStore.GenotypeStore):
+		return imputeStore(data, strat, path)
+	from sklearn.impute import SimpleImputer
 	dataCol = np.array(data.columns)
 	imp = SimpleImputer(missing_values=np.nan, strategy=strat)
 	data=imp.fit_transform(data)
@@ -154,3 +315,34 @@ def doImputation(data, strat):
 	print(data)
 	return data
 
+@profiler.profiled
+def imputeStore(store, strat, path):
+	"""Imputation of the missing genotypes of an int8 genotype store, chunk by chunk. The value of \
+		each variant is computed from its genotype counts (see genotypeStore.fillValues) and filled \
+		in a copy of the chunk that is written to the new store, so only one chunk is in memory. \
+		Like SimpleImputer, the variants without any call are removed.
+
+	Arguments:
+		store {GenotypeStore} -- Store to impute.
+		strat {string} -- Imputation strategy
+		path {string} -- Path to the imputed store.
+
+	Returns:
+		GenotypeStore -- Imputed store
+	"""
+	if store.missing is None: raise ValueError('Only int8 stores can be imputed by chunks.')
+	writer = genotypeStore.StoreWriter(path, store.samples, store.labels, store.meta['dosage'], store.meta['compressed'])
+	removed = 0
+	for i, (variants, chunk) in enumerate(store.iterBlocks()):
+		counts = store.chunkCounts(i, chunk)
+		keep = counts[:,0] < chunk.shape[1]
+		block = np.array(chunk[keep])
+		values = genotypeStore.fillValues(counts[keep], strat)
+		np.copyto(block, values[:,None], where=block == store.missing)
+		writer.append(variants[keep].values.tolist(), block)
+		writer.commit()
+		profiler.count(len(block))
+		removed += int((~keep).sum())
+	print('Number of deleted columns: ', removed)
+	return writer.close()
+
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+'''
+# File: vcfIndex.py
+# Created Date: Sunday October 18th 2026
+# Author: Debora Antunes
+# -----
+# Last Modified: Sunday, October 18th 2026, 10:12:41 am
+# -----
+'''
+
+import gzip
+import os
+import re
+import struct
+import zlib
+
+BLOCK_SIZE = 0xff00 # Maximum uncompressed size of a BGZF block
+EOF_BLOCK = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+LINEAR_SHIFT = 14 # Size (2^14) of the windows of the linear index
+
+
+class BgzfReader():
+	"""Reads a BGZF file block by block, allowing random access through virtual offsets \
+		(compressed offset of the block << 16 | offset inside the uncompressed block).
+	"""
+
+	def __init__(self, path):
+		self.handle = open(path, 'rb')
+		self.blockStart = 0
+		self.blockSize = 0
+		self.buffer = b''
+		self.within = 0
+		self.loadBlock(0)
+
+	def loadBlock(self, offset):
+		"""Loads the block that starts in the given compressed offset.
+
+		Arguments:
+			offset {int} -- Compressed offset of the block.
+
+		Returns:
+			bool -- False when the end of the file was reached.
+		"""
+		self.handle.seek(offset)
+		block = readBlock(self.handle)
+		if block is None:
+			self.blockStart, self.blockSize, self.buffer, self.within = offset, 0, b'', 0
+			return False
+		self.blockStart, self.blockSize = offset, block[1]
+		self.buffer, self.within = block[0], 0
+		return True
+
+	def seek(self, virtual):
+		"""Moves to a virtual offset.
+
+		Arguments:
+			virtual {int} -- Virtual offset.
+		"""
+		if virtual >> 16 != self.blockStart or not self.blockSize:
+			self.loadBlock(virtual >> 16)
+		self.within = virtual & 0xffff
+
+	def tell(self):
+		"""Returns the virtual offset of the next byte to be read.
+
+		Returns:
+			int -- Virtual offset.
+		"""
+		if self.blockSize and self.within >= len(self.buffer):
+			return (self.blockStart + self.blockSize) << 16
+		return (self.blockStart << 16) | self.within
+
+	def readline(self):
+		"""Reads the next line, even when it is split between blocks.
+
+		Returns:
+			bytes -- The line, with the new line character, or b'' in the end of the file.
+		"""
+		parts = []
+		while True:
+			if self.within >= len(self.buffer):
+				if not self.blockSize or not self.loadBlock(self.blockStart + self.blockSize): break
+				continue
+			end = self.buffer.find(b'\n', self.within)
+			if end < 0:
+				parts.append(self.buffer[self.within:])
+				self.within = len(self.buffer)
+				continue
+			parts.append(self.buffer[self.within:end+1])
+			self.within = end + 1
+			break
+		return b''.join(parts)
+
+	def __iter__(self):
+		line = self.readline()
+		while line:
+			yield line
+			line = self.readline()
+
+	def close(self):
+		self.handle.close()
+
+
+class BgzfWriter():
+	"""Writes a BGZF file, so that it can be indexed and read by BgzfReader, tabix or bcftools.
+	"""
+
+	def __init__(self, path, level=6):
+		self.handle = open(path, 'wb')
+		self.level = level
+		self.buffer = bytearray()
+		self.offset = 0
+
+	def write(self, data):
+		"""Adds data to the file, writing the full blocks.
+
+		Arguments:
+			data {bytes or string} -- Data to be written.
+		"""
+		if isinstance(data, str): data = data.encode()
+		self.buffer += data
+		while len(self.buffer) >= BLOCK_SIZE:
+			self.writeBlock(bytes(self.buffer[:BLOCK_SIZE]))
+			del self.buffer[:BLOCK_SIZE]
+
+	def tell(self):
+		"""Returns the virtual offset of the next byte to be written.
+
+		Returns:
+			int -- Virtual offset.
+		"""
+		return (self.offset << 16) | len(self.buffer)
+
+	def flush(self):
+		"""Closes the current block, so that the next data starts a new block.
+		"""
+		if self.buffer:
+			self.writeBlock(bytes(self.buffer))
+			self.buffer = bytearray()
+
+	def writeBlock(self, data):
+		compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+		cdata = compressor.compress(data) + compressor.flush()
+		header = struct.pack('<4BI2BH2BHH', 31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, len(cdata) + 25)
+		trailer = struct.pack('<II', zlib.crc32(data) & 0xffffffff, len(data))
+		self.handle.write(header + cdata + trailer)
+		self.offset += len(cdata) + 26
+
+	def close(self):
+		self.flush()
+		self.handle.write(EOF_BLOCK)
+		self.handle.close()
+
+
+def readHeader(handle):
+	"""Reads the header of the BGZF block in the current position of the file.
+
+	Arguments:
+		handle {file} -- File opened in binary mode.
+
+	Returns:
+		tuple -- The size of the extra field and the compressed size of the block minus 1 (BSIZE), \
+		or None in the end of the file.
+	"""
+	header = handle.read(12)
+	if len(header) < 12: return None
+	if header[:4] != b'\x1f\x8b\x08\x04': raise ValueError('Not a BGZF block')
+	xlen = struct.unpack('<H', header[10:12])[0]
+	extra = handle.read(xlen)
+	bsize, i = None, 0
+	while i < xlen:
+		slen = struct.unpack('<H', extra[i+2:i+4])[0]
+		if extra[i:i+2] == b'BC': bsize = struct.unpack('<H', extra[i+4:i+6])[0]
+		i += 4 + slen
+	if bsize is None: raise ValueError('Not a BGZF block')
+	return xlen, bsize
+
+def readBlock(handle):
+	"""Reads and decompresses the BGZF block in the current position of the file.
+
+	Arguments:
+		handle {file} -- File opened in binary mode.
+
+	Returns:
+		tuple -- The uncompressed data and the compressed size of the block, or None in the end of the file.
+	"""
+	header = readHeader(handle)
+	if header is None: return None
+	xlen, bsize = header
+	cdata = handle.read(bsize - xlen - 19)
+	handle.read(8)
+	return zlib.decompress(cdata, -15), bsize + 1
+
+def blockOffsets(path):
+	"""Lists the blocks of a BGZF file, reading only their headers and trailers.
+
+	Arguments:
+		path {string} -- Path to the BGZF file.
+
+	Returns:
+		list -- The compressed offset and the uncompressed size of each block.
+	"""
+	blocks = []
+	offset = 0
+	with open(path, 'rb') as f:
+		header = readHeader(f)
+		while header is not None:
+			f.seek(offset + header[1] - 3)
+			blocks.append((offset, struct.unpack('<I', f.read(4))[0]))
+			offset += header[1] + 1
+			header = readHeader(f)
+	return blocks
+
+def splitBlocks(path, size):
+	"""Splits a BGZF file in shards of about the given compressed size. The shards start in \
+		non-empty blocks, so that readShard can check if the previous block ends a line.
+
+	Arguments:
+		path {string} -- Path to the BGZF file.
+		size {int} -- Compressed size of each shard, in bytes.
+
+	Returns:
+		list -- For each shard, the offset of its first block, the offset where it ends and the \
+		offset of the previous non-empty block (None for the first shard).
+	"""
+	blocks = blockOffsets(path)
+	end = os.path.getsize(path)
+	starts, previous = [0], [None]
+	last = None
+	for offset, isize in blocks:
+		if not isize: continue
+		if last is not None and offset - starts[-1] >= size:
+			starts.append(offset)
+			previous.append(last)
+		last = offset
+	return [(s, e, p) for s, e, p in zip(starts, starts[1:] + [end], previous)]
+
+def readShard(path, start, end, previous):
+	"""Reads the lines of a BGZF file that start between two block offsets. A line split between \
+		two shards belongs to the shard where it starts.
+
+	Arguments:
+		path {string} -- Path to the BGZF file.
+		start {int} -- Offset of the first block of the shard.
+		end {int} -- Offset where the shard ends.
+		previous {int} -- Offset of the non-empty block before the shard, or None.
+
+	Yields:
+		string -- Lines of the shard, without the header lines.
+	"""
+	reader = BgzfReader(path)
+	partial = False
+	if previous is not None:
+		reader.seek(previous << 16)
+		partial = not reader.buffer.endswith(b'\n')
+	reader.seek(start << 16)
+	if partial: reader.readline()
+	while reader.tell() < end << 16:
+		line = reader.readline()
+		if not line: break
+		if not line.startswith(b'#'): yield line.decode()
+	reader.close()
+
+def isBgzf(path):
+	"""Checks if the file is BGZF compressed.
+
+	Arguments:
+		path {string} -- Path to the file.
+
+	Returns:
+		bool -- True for BGZF files.
+	"""
+	with open(path, 'rb') as f:
+		header = f.read(16)
+	return len(header) == 16 and header[:4] == b'\x1f\x8b\x08\x04' and header[12:14] == b'BC'
+
+def reg2bin(beg, end):
+	"""Computes the smallest bin that contains the 0-based interval [beg, end).
+	"""
+	end -= 1
+	for shift, offset in ((14, 4681), (17, 585), (20, 73), (23, 9), (26, 1)):
+		if beg >> shift == end >> shift: return offset + (beg >> shift)
+	return 0
+
+def reg2bins(beg, end):
+	"""Lists all the bins that can overlap the 0-based interval [beg, end).
+	"""
+	end -= 1
+	bins = [0]
+	for shift, offset in ((26, 1), (23, 9), (20, 73), (17, 585), (14, 4681)):
+		bins.extend(range(offset + (beg >> shift), offset + (end >> shift) + 1))
+	return bins
+
+def buildIndex(path, save=True):
+	"""Scans a bgzipped VCF file and creates its tabix index, saved as <path>.tbi.
+
+	Arguments:
+		path {string} -- Path to the bgzipped VCF file.
+
+	Keyword Arguments:
+		save {bool} -- Writes the index next to the VCF file. (default: {True})
+
+	Returns:
+		dict -- The names of the chromosomes and, for each one, the bins and the linear index.
+	"""
+	print('>>> Building index of {}...'.format(path))
+	reader = BgzfReader(path)
+	index = {'names': [], 'refs': []}
+	current = None
+	start = reader.tell()
+	line = reader.readline()
+	while line:
+		end = reader.tell()
+		if not line.startswith(b'#'):
+			chrom, pos, _, ref = line.split(b'\t', 4)[:4]
+			if chrom != current:
+				current = chrom
+				index['names'].append(chrom.decode())
+				index['refs'].append({'bins': {}, 'linear': []})
+				bins, linear = index['refs'][-1]['bins'], index['refs'][-1]['linear']
+			beg = int(pos) - 1
+			stop = beg + max(len(ref), 1)
+			chunks = bins.setdefault(reg2bin(beg, stop), [])
+			if chunks and chunks[-1][1] == start: chunks[-1] = (chunks[-1][0], end)
+			else: chunks.append((start, end))
+			for w in range(beg >> LINEAR_SHIFT, ((stop - 1) >> LINEAR_SHIFT) + 1):
+				if w >= len(linear): linear.extend([0] * (w + 1 - len(linear)))
+				if not linear[w]: linear[w] = start
+		start = end
+		line = reader.readline()
+	reader.close()
+
+	for ref in index['refs']:
+		linear = ref['linear']
+		for w in range(1, len(linear)):
+			if not linear[w]: linear[w] = linear[w-1]
+
+	if save:
+		try: writeIndex(index, path + '.tbi')
+		except OSError: print('>>> Could not save the index, it will be used only in this run.')
+	return index
+
+def writeIndex(index, path):
+	"""Writes the index in the tabix format (VCF preset).
+
+	Arguments:
+		index {dict} -- Index created by buildIndex.
+		path {string} -- Path to the .tbi file.
+	"""
+	names = b''.join([n.encode() + b'\0' for n in index['names']])
+	data = [struct.pack('<4s8i', b'TBI\x01', len(index['names']), 2, 1, 2, 0, ord('#'), 0, len(names)), names]
+	for ref in index['refs']:
+		data.append(struct.pack('<i', len(ref['bins'])))
+		for bin, chunks in sorted(ref['bins'].items()):
+			data.append(struct.pack('<Ii', bin, len(chunks)))
+			data.extend([struct.pack('<QQ', beg, end) for beg, end in chunks])
+		data.append(struct.pack('<i', len(ref['linear'])))
+		data.append(struct.pack('<{}Q'.format(len(ref['linear'])), *ref['linear']))
+	writer = BgzfWriter(path)
+	writer.write(b''.join(data))
+	writer.close()
+
+def readIndex(path):
+	"""Reads a tabix index.
+
+	Arguments:
+		path {string} -- Path to the .tbi file.
+
+	Returns:
+		dict -- The names of the chromosomes and, for each one, the bins and the linear index.
+	"""
+	with gzip.open(path, 'rb') as f:
+		data = f.read()
+	if data[:4] != b'TBI\x01': raise ValueError('Not a tabix index')
+	n_ref = struct.unpack_from('<i', data, 4)[0]
+	l_nm = struct.unpack_from('<i', data, 32)[0]
+	names = [n.decode() for n in data[36:36+l_nm].split(b'\0')[:n_ref]]
+	index = {'names': names, 'refs': []}
+	i = 36 + l_nm
+	for _ in range(n_ref):
+		bins = {}
+		n_bin = struct.unpack_from('<i', data, i)[0]
+		i += 4
+		for _ in range(n_bin):
+			bin, n_chunk = struct.unpack_from('<Ii', data, i)
+			i += 8
+			chunks = struct.unpack_from('<{}Q'.format(2 * n_chunk), data, i)
+			bins[bin] = list(zip(chunks[0::2], chunks[1::2]))
+			i += 16 * n_chunk
+		n_intv = struct.unpack_from('<i', data, i)[0]
+		linear = list(struct.unpack_from('<{}Q'.format(n_intv), data, i + 4))
+		i += 4 + 8 * n_intv
+		index['refs'].append({'bins': bins, 'linear': linear})
+	return index
+
+def loadIndex(path):
+	"""Reads the tabix index of a bgzipped VCF file, building it when it does not exist or is \
+		older than the VCF file.
+
+	Arguments:
+		path {string} -- Path to the bgzipped VCF file.
+
+	Returns:
+		dict -- The index.
+	"""
+	tbi = path + '.tbi'
+	if os.path.isfile(tbi) and os.path.getmtime(tbi) >= os.path.getmtime(path):
+		return readIndex(tbi)
+	return buildIndex(path)
+
+def parseRegion(region):
+	"""Parses a region like \'chr1:1000-2000\', \'1:1,000\' or \'X\' (1-based and inclusive).
+
+	Arguments:
+		region {string} -- Region.
+
+	Returns:
+		tuple -- The chromosome and the 0-based [beg, end) interval.
+	"""
+	match = re.match(r'^([^:]+)(?::([\d,]+)(?:-([\d,]+))?)?$', region.strip())
+	if not match: raise ValueError('Region not valid: {}'.format(region))
+	chrom, beg, end = match.groups()
+	beg = int(beg.replace(',', '')) - 1 if beg else 0
+	end = int(end.replace(',', '')) if end else (beg + 1 if match.group(2) else 1 << 29)
+	return chrom, max(beg, 0), end
+
+def listRegions(args):
+	"""Reads the regions given in the command line; each argument can be a region or a file with \
+		one region per line.
+
+	Arguments:
+		args {list} -- Regions or paths to files with regions.
+
+	Returns:
+		list -- Parsed regions.
+	"""
+	regions = []
+	for a in args:
+		if os.path.isfile(a):
+			with open(a) as f:
+				regions.extend([parseRegion(l) for l in f if l.strip() and not l.startswith('#')])
+		else: regions.append(parseRegion(a))
+	return regions
+
+def refName(names, chrom):
+	"""Finds the name of the chromosome in the index, with or without the \'chr\' prefix.
+	"""
+	for n in [chrom, 'chr' + chrom, chrom[3:] if chrom.startswith('chr') else None]:
+		if n in names: return n
+	return None
+
+def queryChunks(index, regions):
+	"""Lists the parts of the file (as virtual offsets) that can have records of the regions.
+
+	Arguments:
+		index {dict} -- Tabix index.
+		regions {list} -- Parsed regions.
+
+	Returns:
+		list -- Sorted and merged (begin, end) virtual offsets.
+	"""
+	chunks = []
+	for chrom, beg, end in regions:
+		name = refName(index['names'], chrom)
+		if name is None: continue
+		ref = index['refs'][index['names'].index(name)]
+		linear = ref['linear']
+		w = beg >> LINEAR_SHIFT
+		minOff = linear[w] if w < len(linear) else (linear[-1] if linear else 0)
+		for b in reg2bins(beg, min(end, 1 << 29)):
+			chunks.extend([c for c in ref['bins'].get(b, []) if c[1] > minOff])
+	merged = []
+	for beg, end in sorted(chunks):
+		if merged and beg <= merged[-1][1]: merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+		else: merged.append((beg, end))
+	return merged
+
+def overlaps(line, regions):
+	"""Checks if a VCF record overlaps any of the regions.
+	"""
+	chrom, pos, _, ref = line.split('\t', 4)[:4]
+	beg = int(pos) - 1
+	end = beg + max(len(ref), 1)
+	for c, rbeg, rend in regions:
+		if beg < rend and end > rbeg and (c == chrom or 'chr' + c == chrom or c == 'chr' + chrom): return True
+	return False
+
+def fetch(path, regions):
+	"""Reads the records of a VCF file that overlap the regions, in the order of the file and \
+		without repetitions. For bgzipped files only the blocks given by the tabix index are \
+		decompressed; other files are fully scanned.
+
+	Arguments:
+		path {string} -- Path to the VCF file.
+		regions {list} -- Parsed regions.
+
+	Yields:
+		string -- VCF records.
+	"""
+	if not isBgzf(path):
+		print('>>> {} is not bgzipped, scanning the whole file...'.format(path))
+		with gzip.open(path, 'rt') as f:
+			for line in f:
+				if not line.startswith('#') and overlaps(line, regions): yield line
+		return
+
+	reader = BgzfReader(path)
+	for beg, end in queryChunks(loadIndex(path), regions):
+		reader.seek(beg)
+		while reader.tell() < end:
+			line = reader.readline().decode()
+			if not line: break
+			if not line.startswith('#') and overlaps(line, regions): yield line
+	reader.close()
@@ -13,17 +13,54 @@ import gzip
 import sys
 import codecs
 import pickle
+import numpy as np
 import pandas as pd
 import sys
 import os
 import csv
+import glob
+import hashlib
+import json
+import shutil
+import itertools
+import time
+import multiprocessing
+import operator
+import re
 from operator import itemgetter
 
-
-def main(dataList, samplesFile=None):
-	"""Loads the vcf file and transformes it in a csv.gz file that can be manipulated in pandas. \
-		Also loads this csv.gz file in pandas and performes a filtration and transformation of data, \
-		saving it in a new csv.gz file.
+import vcfIndex
+import genotypeStore
+import profiler
+
+# Genotypes accepted by translateGT; the position in the list is the code given to the genotype
+GT1=['0/0','0/1','1/1','0/2','1/2','2/2','0/3',
+	'1/3','2/3','3/3','0/4','1/4','2/4','3/4',
+	'4/4','0/5','1/5','2/5','3/5','4/5','5/5',
+	'0/6','1/6','2/6','3/6','4/6','5/6','6/6','.','./.']
+GT2=['0/0','1/0','1/1','2/0','2/1','2/2','3/0',
+	'3/1','3/2','3/3','4/0','4/1','4/2','4/3',
+	'4/4','5/0','5/1','5/2','5/3','5/4','5/5',
+	'6/0','6/1','6/2','6/3','6/4','6/5','6/6','.','./.']
+MISSING=-1 # int8 code of missing genotypes
+
+# Types of the INFO keys used in the filters; other keys are read as strings
+INFO_TYPES={'VT': str, 'AF': float, 'AC': float, 'AN': float, 'DP': float, 'NS': float, 
+	'MQ': float, 'QD': float, 'EAS_AF': float, 'EUR_AF': float, 'AFR_AF': float, 
+	'AMR_AF': float, 'SAS_AF': float, 'DB': bool, 'MULTI_ALLELIC': bool}
+OPERATORS={'=': operator.eq, '==': operator.eq, '!=': operator.ne, '>': operator.gt, 
+	'>=': operator.ge, '<': operator.lt, '<=': operator.le}
+CONTROLS_FILTERS=['VT=SNP,INDEL'] #filter by type of variant
+
+
+@profiler.profiled
+def main(dataList, samplesFile=None, verbose=True, debug=False, dosage=False, filters=None, regions=None, \
+		processes=None, shardSize=None, store=False):
+	"""Parses the vcf file, filters and translates the genotypes in a single pass and saves them \
+		in a csv.gz file that can be manipulated in pandas, or in a genotype store.
+
+		In debug mode, the vcf file is first transformed in an intermediate csv.gz file, which is \
+		then loaded in pandas to perform the filtration and transformation of data.
 
 	Arguments:
 		dataList {list} -- List of arguments to be used: the type of data (cases or control); the \
@@ -32,9 +69,22 @@ def main(dataList, samplesFile=None):
 	Keyword Arguments:
 		samplesFile {string} -- A path to a tsv file that provides the samples name to filter. In case\
 		no file is provided, all samples are used.  (default: {None})
+		verbose {bool} -- Prints the line counter and the processed chunks. (default: {True})
+		debug {bool} -- Keeps the intermediate output_{chr}.csv.gz file. (default: {False})
+		dosage {bool} -- Saves the number of alternative alleles instead of the genotype code. (default: {False})
+		filters {list} -- Filters applied to the INFO column, like \'VT=SNP,INDEL\' or \'AF>0.01\'. \
+		(default: {None}, CONTROLS_FILTERS for controls and no filters for cases)
+		regions {list} -- Regions parsed by vcfIndex.listRegions. Only the variants in these regions \
+		are saved, in outputPandas_{chr}_regions.csv.gz. (default: {None}, all variants)
+		processes {int} -- Number of processes used to parse shards of a bgzipped file. (default: {None}, one process)
+		shardSize {int} -- Compressed size of each shard, in bytes. (default: {None}, the file is split \
+		in 4 shards per process)
+		store {bool} -- Saves the genotypes in a genotype store (store_{chr}) instead of the \
+		outputPandas_{chr}.csv.gz file. (default: {False})
 
 	Returns:
-		[string] -- When the arguments provided are not correct, an error message is returned. 
+		[string] -- When the arguments provided are not correct, an error message is returned. \
+		Otherwise, the number of variants saved.
 	"""	
 	# Checking that the first arg in valid
 	name = dataList[0]
@@ -54,26 +104,126 @@ def main(dataList, samplesFile=None):
 	dataList.pop(0)
 	if len(dataList) < 1: return 'ERROR4'
 
+	if filters is None:
+		filters = CONTROLS_FILTERS if name == 'controls' else []
+
+	if regions and debug: return 'ERROR6'
+
 	samples = listSample(samplesFile)
 	print('>>> Loading dataset...')
+	if not debug and not regions and processes and processes > 1 and shardSize != 0:
+		if shardSize is None: shardSize = os.path.getsize(dataList[0]) // (4 * processes) + 1
+		return shardFiles(name, [(chr, dataList[0])], samples, processes, shardSize, dosage, filters, store)[chr]
+	if not debug:
+		return streamFile(samples, dataList[0], name, chr, verbose, dosage, filters, regions, store=store)
+
 	if not os.path.isfile('../../data/vcf/{}/output_{}.csv.gz'.format(name,chr)):
-		readFile(samples, dataList[0], name, chr)
+		readFile(samples, dataList[0], name, chr, verbose)
 
-	header=True
-	for chunk in pd.read_csv('../../data/vcf/{}/output_{}.csv.gz'.format(name,chr), 
+	source = '../../data/vcf/{}/output_{}.csv.gz'.format(name,chr)
+	header = list(pd.read_csv(source, nrows=0, quoting=3, sep='\t').columns)
+	output = openOutput(name, chr, source, ['VAR','REF','ALT'] + header[5:], 
+		{'debug': True, 'filters': filters, 'dosage': dosage}, dosage, store)
+	for chunk in pd.read_csv(source, 
 			dtype={'CHROM': str, 'POS': str, 'REF': str, 'ALT': str, 'INFO': str}, 
 			quoting=3,
 			chunksize=250000,
+			skiprows=range(1, output.lines+1),
 			sep='\t'):
 			
-		if name == 'controls': chunk = filterControls(chunk)
-		else: chunk = filterCases(chunk)
-		chunk = translateGT(chunk)
-		print(chunk)
-		df = chunk.to_csv(header=header, sep='\t', quoting=3, index=False)
-		with gzip.open('../../data/vcf/{}/outputPandas_{}.csv.gz'.format(name,chr), 'at') as f:
-			f.write(df)
-		header=False
+		lines = chunk.shape[0]
+		if name == 'controls': chunk = filterControls(chunk, filters)
+		else: chunk = filterCases(chunk, filters)
+		chunk = translateGT(chunk, dosage)
+		if verbose: print(chunk)
+		if hasattr(output, 'append'):
+			output.append(chunk.iloc[:,:3].values.tolist(), chunk.iloc[:,3:].values)
+		else:
+			output.write(formatChunk(chunk.iloc[:,:3].values.tolist(), chunk.iloc[:,3:].values))
+		output.commit(output.lines + lines, None, output.rows + chunk.shape[0])
+	output.close()
+	return output.rows
+
+@profiler.profiled
+def mainAll(name, pattern, samplesFile=None, processes=None, **kwargs):
+	"""Parses the VCF files of all chromosomes (1 to 22 and X) of a dataset in one call. Bgzipped \
+		files are split in shards of similar size, parsed by a pool of worker processes, so that \
+		the time depends on the total size and not on the biggest chromosome. In debug mode, with \
+		regions or with shardSize=0, one chromosome is scheduled per worker process instead, \
+		starting by the biggest files.
+
+	Arguments:
+		name {string} -- Type of dataset (cases or controls).
+		pattern {string} -- Path to the VCF files where \'{}\' is replaced by the chromosome name. \
+		Wildcards are allowed as long as each chromosome matches only one file.
+
+	Keyword Arguments:
+		samplesFile {string} -- A path to a tsv file that provides the samples name to filter. (default: {None})
+		processes {int} -- Number of worker processes. (default: {None}, one per CPU)
+		kwargs -- Keyword arguments of main used for each chromosome (debug, dosage, filters, regions, \
+		shardSize, store). By default, the shards have 1/4 of the size per process.
+
+	Returns:
+		[string] -- When the arguments provided are not correct, an error message is returned.
+	"""
+	if name not in ['controls', 'cases']: return 'ERROR1'
+	if '{}' not in pattern: return 'ERROR5'
+	if kwargs.get('regions') and kwargs.get('debug'): return 'ERROR6'
+
+	region = [str(i) for i in range(1, 23)]
+	region.extend(['X'])
+	jobs = []
+	for chr in region:
+		files = glob.glob(pattern.format(chr))
+		if len(files) != 1: 
+			print('>>> {} VCF files found for chromosome {}.'.format(len(files), chr))
+			return 'ERROR4'
+		jobs.append((name, chr, files[0], samplesFile, kwargs))
+	jobs.sort(key=lambda job: os.path.getsize(job[2]), reverse=True)
+
+	if not processes: processes = os.cpu_count() or 1
+	total = sum([os.path.getsize(job[2]) for job in jobs])
+	shardSize = kwargs.pop('shardSize', None)
+	if shardSize != 0 and not kwargs.get('debug') and not kwargs.get('regions'):
+		if shardSize is None: shardSize = total // (4 * processes) + 1
+		filters = kwargs.get('filters')
+		if filters is None: filters = CONTROLS_FILTERS if name == 'controls' else []
+		start = time.time()
+		shardFiles(name, [job[1:3] for job in jobs], listSample(samplesFile), processes, shardSize, 
+			kwargs.get('dosage', False), filters, kwargs.get('store', False))
+		elapsed = time.time() - start
+		print('>>> All chromosomes parsed in {:.1f}s ({:.2f} MB/s)'.format(elapsed, total/1e6/max(elapsed, 1e-9)))
+		return
+
+	processes = min(processes, len(jobs))
+	print('>>> Parsing {} chromosomes with {} processes...'.format(len(jobs), processes))
+	start = time.time()
+	total = 0
+	with multiprocessing.Pool(processes) as pool:
+		for i, (chr, flag, size, elapsed) in enumerate(pool.imap_unordered(parseChromosome, jobs)):
+			if isinstance(flag, str):
+				print('>>> Chromosome {} failed with {}'.format(chr, flag))
+				continue
+			total += size
+			print('>>> [{}/{}] Chromosome {}: {} variants in {:.1f}s ({:.0f} variants/s, {:.2f} MB/s)'.format(
+				i+1, len(jobs), chr, flag, elapsed, flag/max(elapsed, 1e-9), size/1e6/max(elapsed, 1e-9)))
+	elapsed = time.time() - start
+	print('>>> All chromosomes parsed in {:.1f}s ({:.2f} MB/s)'.format(elapsed, total/1e6/max(elapsed, 1e-9)))
+
+def parseChromosome(job):
+	"""Worker used by mainAll to parse the VCF file of one chromosome.
+
+	Arguments:
+		job {tuple} -- The type of dataset, the chromosome name, the path to the VCF file, the samples file \
+		and the keyword arguments of main.
+
+	Returns:
+		tuple -- The chromosome name, the result of main, the size of the VCF file and the elapsed time.
+	"""
+	name, chr, path, samplesFile, kwargs = job
+	start = time.time()
+	flag = main([name, chr, path], samplesFile, verbose=False, **kwargs)
+	return chr, flag, os.path.getsize(path), time.time() - start
 
 
 def listSample(tsv):
@@ -94,7 +244,8 @@ def listSample(tsv):
 		samples = None
 	return samples
 
-def readFile(samples, path, name, region):
+@profiler.profiled
+def readFile(samples, path, name, region, verbose=True):
 	"""Parses the VCF file and saves the right rows and columns in a csv.gz file.
 
 	Arguments:
@@ -102,6 +253,9 @@ def readFile(samples, path, name, region):
 		path {string} -- Path to VCF file.
 		name {string} -- Type of dataset (cases or controls).
 		region {string} -- Name of chromosome.
+
+	Keyword Arguments:
+		verbose {bool} -- Prints the line counter. (default: {True})
 	"""	
 	reader = gzip.GzipFile(path,'r')
 	if sys.version > '3':
@@ -121,7 +275,7 @@ def readFile(samples, path, name, region):
 	index = [i for i, val in enumerate(col_names) if val in set(col)]
 
 	#Writes header in csv.gz file
-	csvfile = gzip.open('../../data/vcf/{}/output_{}.csv.gz'.format(name,region), 'at')
+	csvfile = gzip.open('../../data/vcf/{}/output_{}.csv.gz.part'.format(name,region), 'wt')
 	writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL, delimiter='\t')
 	writer.writerow(col)
 
@@ -134,85 +288,642 @@ def readFile(samples, path, name, region):
 	while line != '##' :
 		data = list(itemgetter(*index)(line[0:(len(line)-1)].split()))
 		writer.writerow(data)
-		write('\r')
-		write(str(flag))
-		flush()
+		if verbose:
+			write('\r')
+			write(str(flag))
+			flush()
 		line = next(reader, '##')
 		flag+=1
 	print('Done!')
 	csvfile.close()
+	os.replace('../../data/vcf/{}/output_{}.csv.gz.part'.format(name,region), 
+		'../../data/vcf/{}/output_{}.csv.gz'.format(name,region))
+
+@profiler.profiled
+def streamFile(samples, path, name, region, verbose=True, dosage=False, filters=[], regions=None, chunksize=10000, 
+		store=False):
+	"""Parses the VCF file and saves the filtered and translated genotypes of the samples in a csv.gz \
+		file or in a genotype store, without intermediate files. The output has the same format as the \
+		one created by main in debug mode.
+
+	Arguments:
+		samples {list} -- List of samples to be used, or None in case none was provided.
+		path {string} -- Path to VCF file.
+		name {string} -- Type of dataset (cases or controls).
+		region {string} -- Name of chromosome.
+
+	Keyword Arguments:
+		verbose {bool} -- Prints the line counter. (default: {True})
+		dosage {bool} -- Saves the number of alternative alleles instead of the genotype code. (default: {False})
+		filters {list} -- Filters applied to the INFO column. (default: {[]})
+		regions {list} -- Regions to be read using the tabix index of the file. (default: {None}, all variants)
+		chunksize {int} -- Number of variants filtered and translated at once; each chunk is a \
+		checkpoint from where an interrupted run is resumed. (default: {10000})
+		store {bool} -- Saves the genotypes in a genotype store. (default: {False})
+
+	Returns:
+		int -- Number of variants saved.
+	"""
+	col, index = readHeader(path, samples)
+	if regions: region = region + '_regions'
+	output = openOutput(name, region, path, col, 
+		{'samples': col, 'filters': filters, 'dosage': dosage, 'regions': regions, 'chunksize': chunksize}, dosage, store)
+
+	#Moves to the end of the last completed chunk
+	tell = None
+	if regions:
+		reader = vcfIndex.fetch(path, regions)
+		lines = itertools.islice(reader, output.lines, None)
+	elif vcfIndex.isBgzf(path):
+		reader = vcfIndex.BgzfReader(path)
+		if output.offset: reader.seek(output.offset)
+		lines = (l.decode() for l in reader)
+		tell = reader.tell
+	else:
+		reader = gzip.open(path, 'rt')
+		lines = itertools.islice(reader, output.lines, None)
+
+	rows = parseLines(lines, output, index, filters, dosage, verbose, chunksize, tell)
+	print('Done!')
+	output.close()
+	reader.close()
+	return rows
+
+def openOutput(name, region, source, col, options, dosage, store):
+	"""Opens the output of a chromosome, which can be resumed when it was interrupted: the \
+		outputPandas_{region}.csv.gz file, with its header, or the store_{region} genotype store.
+
+	Arguments:
+		name {string} -- Type of dataset (cases or controls).
+		region {string} -- Name of chromosome.
+		source {string} -- Path to the input file.
+		col {list} -- Header of the csv.gz file.
+		options {dict} -- Options that change the output, compared when resuming.
+		dosage {bool} -- Saves the number of alternative alleles instead of the genotype code.
+		store {bool} -- Saves the genotypes in a genotype store.
+
+	Returns:
+		Checkpoint or genotypeStore.StoreWriter -- The output.
+	"""
+	if store:
+		return genotypeStore.StoreWriter('../../data/vcf/{}/store_{}'.format(name,region), col[3:], dosage=dosage, 
+			key=Checkpoint.inputKey(source, options))
+	output = Checkpoint('../../data/vcf/{}/outputPandas_{}.csv.gz'.format(name,region), source, options)
+	if not output.chunks: output.write('\t'.join(col) + '\n')
+	return output
+
+def readHeader(path, samples):
+	"""Reads the header of the VCF file and selects the columns of the samples, keeping the order of the file.
+
+	Arguments:
+		path {string} -- Path to VCF file.
+		samples {list} -- List of samples to be used, or None in case none was provided.
+
+	Returns:
+		tuple -- The header of the csv.gz file and the index of the samples columns in the VCF file.
+	"""
+	with gzip.open(path, 'rt') as reader:
+		line = next(reader)
+		#Ignores the initial informative line
+		while line.startswith('##'): line = next(reader)
+
+	col_names = line[1:].rstrip('\n').split('\t')
+	samples = set(samples) if samples else set(col_names[9:])
+	index = [i for i, val in enumerate(col_names) if i >= 9 and val in samples]
+	col = ['VAR','REF','ALT']
+	col.extend([col_names[i] for i in index])
+	return col, index
+
+@profiler.profiled
+def parseLines(lines, csvfile, index, filters, dosage, verbose=False, chunksize=10000, tell=None):
+	"""Filters and translates the VCF records in chunks and writes them in the csv.gz file. \
+		When the output is a Checkpoint or a genotype store, each chunk is committed with the position of \
+		the input.
+
+	Arguments:
+		lines {iterable} -- VCF lines; header lines are ignored.
+		csvfile {file, Checkpoint or genotypeStore.StoreWriter} -- Output file.
+		index {list} -- Index of the samples columns.
+		filters {list} -- Filters applied to the INFO column.
+		dosage {bool} -- Saves the number of alternative alleles instead of the genotype code.
+
+	Keyword Arguments:
+		verbose {bool} -- Prints the line counter. (default: {False})
+		chunksize {int} -- Number of variants filtered and translated at once. (default: {10000})
+		tell {function} -- Returns the virtual offset of the next line of a bgzipped input. (default: {None})
+
+	Returns:
+		int -- Number of variants saved, including the ones of a resumed Checkpoint.
+	"""
+	checkpoint = csvfile if hasattr(csvfile, 'commit') else None
+	columns = [i - 9 for i in index]
+	write = sys.stdout.write
+	flush = sys.stdout.flush
+	consumed = checkpoint.lines if checkpoint else 0
+	flag = 0
+	rows = checkpoint.rows if checkpoint else 0
+	variants, infos, genotypes = [], [], []
+	for line in lines:
+		consumed+=1
+		if line.startswith('#'): continue
+		#Only the fixed columns are split, the samples columns are extracted by writeChunk
+		data = line.rstrip('\n').split('\t', 9)
+		flag+=1
+		if verbose:
+			write('\r')
+			write(str(flag))
+			flush()
+		variants.append(('chr' + data[0] + ':' + data[1], data[3], data[4]))
+		infos.append(data[7])
+		genotypes.append(data[9])
+		if len(variants) == chunksize:
+			rows+=writeChunk(csvfile, variants, infos, genotypes, filters, dosage, columns)
+			if checkpoint: checkpoint.commit(consumed, tell() if tell else None, rows)
+			variants, infos, genotypes = [], [], []
+	if variants:
+		rows+=writeChunk(csvfile, variants, infos, genotypes, filters, dosage, columns)
+		if checkpoint: checkpoint.commit(consumed, tell() if tell else None, rows)
+	return rows
+
+@profiler.profiled
+def shardFiles(name, files, samples, processes, shardSize, dosage=False, filters=[], store=False):
+	"""Splits the bgzipped VCF files in shards aligned to BGZF blocks, parses all the shards in \
+		worker processes and joins the outputs of each chromosome in order. Files that are not \
+		bgzipped are parsed as a single shard.
+
+	Arguments:
+		name {string} -- Type of dataset (cases or controls).
+		files {list} -- Chromosome name and path to the VCF file of each chromosome.
+		samples {list} -- List of samples to be used, or None in case none was provided.
+		processes {int} -- Number of worker processes.
+		shardSize {int} -- Compressed size of each shard, in bytes.
+
+	Keyword Arguments:
+		dosage {bool} -- Saves the number of alternative alleles instead of the genotype code. (default: {False})
+		filters {list} -- Filters applied to the INFO column. (default: {[]})
+		store {bool} -- Saves the genotypes in genotype stores. (default: {False})
+
+	Returns:
+		dict -- Number of variants saved per chromosome.
+	"""
+	jobs, pending, rows, outputs = [], {}, {}, {}
+	for chr, path in files:
+		col, index = readHeader(path, samples)
+		shards = vcfIndex.splitBlocks(path, shardSize) if vcfIndex.isBgzf(path) else [None]
+		output = '../../data/vcf/{}/{}'.format(name, 'store_{}' if store else 'outputPandas_{}.csv.gz').format(chr)
+		parts = ['{}.part{}'.format(output, i) for i in range(len(shards))]
+		outputs[chr] = (output, col, parts)
+		pending[chr], rows[chr] = len(shards), 0
+
+		#Keeps the parts of a previous run with the same input and options
+		manifest = {'key': Checkpoint.inputKey(path, {'samples': col, 'filters': filters, 'dosage': dosage, 'store': store}), 
+			'shards': shards, 'rows': {}}
+		try:
+			with open(output + '.manifest.json') as f: previous = json.load(f)
+		except (OSError, ValueError): previous = None
+		if previous and previous['key'] == manifest['key'] and previous['shards'] == [list(s) if s else s for s in shards]:
+			manifest['rows'] = {p: n for p, n in previous['rows'].items() if os.path.exists(p)}
+		genotypeStore.writeJson(manifest, output + '.manifest.json')
+		outputs[chr] += (manifest,)
+
+		for shard, part in zip(shards, parts):
+			if part in manifest['rows']:
+				pending[chr]-=1
+				rows[chr]+=manifest['rows'][part]
+				continue
+			size = shard[1] - shard[0] if shard else os.path.getsize(path)
+			jobs.append((chr, path, shard, part, index, filters, dosage, col[3:] if store else None, size))
+	jobs.sort(key=lambda job: job[-1], reverse=True)
+	for chr in [c for c in pending if not pending[c]]:
+		joinShards(*outputs[chr], store=store)
+	if len(jobs) < sum([len(outputs[c][2]) for c in outputs]):
+		print('>>> Resuming, {} shards were already parsed.'.format(sum([len(outputs[c][2]) for c in outputs]) - len(jobs)))
+	if not jobs: return rows
+
+	print('>>> Parsing {} shards with {} processes...'.format(len(jobs), processes))
+	start = time.time()
+	#Variants, bytes and seconds of the shards parsed in this run, for the throughput of each chromosome
+	parsed = {chr: [0, 0, 0.0] for chr in pending}
+	with multiprocessing.Pool(min(processes, len(jobs))) as pool:
+		for chr, part, n, size, seconds in pool.imap_unordered(parseShard, jobs):
+			pending[chr]-=1
+			rows[chr]+=n
+			parsed[chr] = [parsed[chr][0] + n, parsed[chr][1] + size, parsed[chr][2] + seconds]
+			manifest = outputs[chr][3]
+			manifest['rows'][part] = n
+			genotypeStore.writeJson(manifest, outputs[chr][0] + '.manifest.json')
+			if pending[chr]: continue
+			joinShards(*outputs[chr], store=store)
+			elapsed = time.time() - start
+			n, size, seconds = parsed[chr]
+			print('>>> Chromosome {}: {} variants after {:.1f}s ({:.0f} variants/s, {:.2f} MB/s in {:.1f}s of parsing; {} of {} chromosomes done)'.format(
+				chr, rows[chr], elapsed, n/max(seconds, 1e-9), size/1e6/max(seconds, 1e-9), seconds, 
+				len([c for c in pending if not pending[c]]), len(pending)))
+	return rows
+
+@profiler.profiled
+def parseShard(job):
+	"""Worker used by shardFiles to parse one shard of a VCF file into a part of the csv.gz file.
+
+	Arguments:
+		job {tuple} -- The chromosome name, the path to the VCF file, the shard (or None for the \
+		whole file), the path to the part file, the index of the samples columns, the filters, \
+		the dosage flag, the samples names when the part is a genotype store (or None) and the \
+		size of the shard.
+
+	Returns:
+		tuple -- The chromosome name, the path to the part file, the number of variants saved, \
+		the size of the shard and the time spent parsing it.
+	"""
+	chr, path, shard, part, index, filters, dosage, samples, size = job
+	start = time.time()
+	lines = vcfIndex.readShard(path, *shard) if shard else gzip.open(path, 'rt')
+	if samples is not None:
+		writer = genotypeStore.StoreWriter(part, samples, dosage=dosage)
+		rows = parseLines(lines, writer, index, filters, dosage)
+		writer.close()
+	else:
+		with gzip.open(part + '.tmp', 'wt') as csvfile:
+			rows = parseLines(lines, csvfile, index, filters, dosage)
+		os.replace(part + '.tmp', part)
+	lines.close()
+	return chr, part, rows, size, time.time() - start
+
+@profiler.profiled
+def joinShards(output, col, parts, manifest=None, store=False):
+	"""Joins the parts of a csv.gz file in order. Each part is a complete gzip member, so the \
+		compressed parts are copied without decompressing them. Genotype stores are joined by \
+		moving their chunks.
+
+	Arguments:
+		output {string} -- Path to the csv.gz file.
+		col {list} -- Header of the csv.gz file.
+		parts {list} -- Paths to the parts, in order.
+
+	Keyword Arguments:
+		manifest {dict} -- Manifest of the parts, removed at the end. (default: {None})
+		store {bool} -- The output and the parts are genotype stores. (default: {False})
+	"""
+	if store:
+		genotypeStore.concat(output, parts, samples=col[3:], move=True)
+	else:
+		with open(output + '.part', 'wb') as f:
+			f.write(gzip.compress(('\t'.join(col) + '\n').encode()))
+			for p in parts:
+				with open(p, 'rb') as part:
+					shutil.copyfileobj(part, f)
+		os.replace(output + '.part', output)
+		for p in parts: os.remove(p)
+	if manifest is not None and os.path.isfile(output + '.manifest.json'):
+		os.remove(output + '.manifest.json')
+
+class Checkpoint():
+	"""Writes a csv.gz file chunk by chunk, recording each completed chunk in a manifest \
+		(<output>.manifest.json) with the position of the input and the size of the output. \
+		The data is written in <output>.part and each chunk is a gzip member synced to disk before \
+		the manifest is replaced, so a partial chunk is never recorded. When the file is opened \
+		again with the same input and options, the part file is truncated to the last completed \
+		chunk and the input can be resumed from lines or offset. <output> only appears when close \
+		is called.
+	"""
+
+	def __init__(self, output, source, options):
+		self.output = output
+		self.part = output + '.part'
+		self.manifest = output + '.manifest.json'
+		self.key = Checkpoint.inputKey(source, options)
+		self.chunks = []
+		self.buffer = []
+		try:
+			with open(self.manifest) as f: manifest = json.load(f)
+			if manifest['key'] == self.key and os.path.isfile(self.part): self.chunks = manifest['chunks']
+		except (OSError, ValueError): pass
+		self.handle = open(self.part, 'r+b' if self.chunks else 'wb')
+		self.handle.truncate(self.chunks[-1]['bytes'] if self.chunks else 0)
+		self.handle.seek(0, 2)
+		if self.chunks: print('>>> Resuming after {} chunks ({} variants)...'.format(len(self.chunks), self.rows))
+
+	@staticmethod
+	def inputKey(source, options):
+		"""Identifies the input file (path, size and modification time) and the options used.
+		"""
+		options = hashlib.sha1(json.dumps(options, sort_keys=True, default=str).encode()).hexdigest()
+		return {'input': os.path.abspath(source), 'size': os.path.getsize(source), 
+			'mtime': os.path.getmtime(source), 'options': options}
+
+	@property
+	def lines(self):
+		"""Number of input lines used by the completed chunks."""
+		return self.chunks[-1]['lines'] if self.chunks else 0
+
+	@property
+	def offset(self):
+		"""Virtual offset of the input after the completed chunks, for bgzipped inputs."""
+		return self.chunks[-1]['offset'] if self.chunks else None
+
+	@property
+	def rows(self):
+		"""Number of variants saved in the completed chunks."""
+		return self.chunks[-1]['rows'] if self.chunks else 0
+
+	def write(self, text):
+		self.buffer.append(text)
+
+	def commit(self, lines, offset, rows):
+		"""Writes the current chunk and records it in the manifest.
+
+		Arguments:
+			lines {int} -- Number of input lines used until the end of the chunk.
+			offset {int} -- Virtual offset of the input in the end of the chunk, or None.
+			rows {int} -- Number of variants saved until the end of the chunk.
+		"""
+		self.handle.write(gzip.compress(''.join(self.buffer).encode()))
+		self.handle.flush()
+		os.fsync(self.handle.fileno())
+		self.buffer = []
+		self.chunks.append({'lines': lines, 'offset': offset, 'bytes': self.handle.tell(), 'rows': rows})
+		genotypeStore.writeJson({'key': self.key, 'chunks': self.chunks}, self.manifest)
+
+	def close(self):
+		"""Writes the remaining data and renames the file to its final name.
+		"""
+		if self.buffer: self.commit(self.lines, self.offset, self.rows)
+		self.handle.close()
+		os.replace(self.part, self.output)
+		os.remove(self.manifest)
+
+
+@profiler.profiled
+def writeChunk(csvfile, variants, infos, genotypes, filters, dosage, columns=None):
+	"""Filters a chunk of variants by the INFO column, translates the genotypes and writes them.
+
+	Arguments:
+		csvfile {file or genotypeStore.StoreWriter} -- Output file.
+		variants {list} -- VAR, REF and ALT of each variant.
+		infos {list} -- INFO column of each variant.
+		genotypes {list} -- Genotypes of the selected samples for each variant, or the unsplit \
+		samples columns when columns is given.
+		filters {list} -- Filters applied to the INFO column.
+		dosage {bool} -- Saves the number of alternative alleles instead of the genotype code.
+
+	Keyword Arguments:
+		columns {list} -- Index of the selected samples among the samples columns. (default: {None})
+
+	Returns:
+		int -- Number of variants written.
+	"""
+	if filters:
+		mask = filterInfo(parseInfo(infos, infoKeys(filters)), filters)
+		variants = list(itertools.compress(variants, mask))
+		genotypes = list(itertools.compress(genotypes, mask))
+		if not variants: return 0
+	if columns is None:
+		matrix = translateMatrix(genotypes, dosage)
+	else:
+		char = extractColumns(genotypes, columns)
+		if char is None:
+			#Lines with a different number of samples are split one by one
+			getter = itemgetter(*columns)
+			genotypes = [getter(g.split('\t')) if len(columns) > 1 else (getter(g.split('\t')),) for g in genotypes]
+			matrix = translateMatrix(genotypes, dosage)
+		else:
+			matrix = translateChars(char, dosage)
+	if hasattr(csvfile, 'append'): csvfile.append(variants, matrix)
+	else: csvfile.write(formatChunk(variants, matrix))
+	profiler.count(len(variants))
+	return len(variants)
+
+def extractColumns(fields, columns):
+	"""Extracts the genotypes of the selected samples without splitting the lines. The offsets of \
+		all the tabs of the chunk are found in one pass over its bytes and only the first four \
+		characters of the selected columns are gathered, so no string is created per sample.
+
+	Arguments:
+		fields {list} -- Unsplit samples columns of each variant.
+		columns {list} -- Index of the selected samples among the samples columns, in increasing order.
+
+	Returns:
+		numpy.ndarray -- uint8 array (variants x samples x 4) padded with zeros, or None when the \
+		variants do not have the same number of samples.
+	"""
+	data = '\t'.join(fields).encode()
+	buf = np.frombuffer(data + b'\0\0\0\0', dtype=np.uint8)
+	tabs = np.flatnonzero(buf[:len(data)] == ord('\t'))
+	width = (len(tabs) + 1) // len(fields)
+	if len(tabs) + 1 != width * len(fields) or columns[-1] >= width: return None
+
+	#The last field of each variant must end where its line ends
+	ends = np.append(tabs, len(data))
+	lines = np.cumsum([len(f) + 1 for f in fields]) - 1
+	if not np.array_equal(ends[width-1::width], lines): return None
+
+	starts = np.concatenate(([0], tabs + 1))
+	cols = np.asarray(columns) + (np.arange(len(fields)) * width)[:,None]
+	start, size = starts[cols], ends[cols] - starts[cols]
+	char = buf[start[...,None] + np.arange(4)]
+	char[size[...,None] <= np.arange(4)] = 0
+	return char
+
+def genotypeTable(dosage=False):
+	"""Creates the lookup table used to translate the genotypes. The table is indexed by the first and \
+		the second allele characters, so phased, unphased and swapped genotypes have the same code. \
+		Haploid genotypes are treated as homozygous and missing ones are translated to MISSING.
 
-def filterControls(df):
+	Keyword Arguments:
+		dosage {bool} -- Translates to the number of alternative alleles instead of the position \
+		in GT1. (default: {False})
+
+	Returns:
+		numpy.ndarray -- 256x256 int8 table.
+	"""
+	table = np.full((256, 256), MISSING, dtype=np.int8)
+	for i, g in enumerate(GT1[:-2]):
+		a, b = g[0], g[-1]
+		value = (a != '0') + (b != '0') if dosage else i
+		table[ord(a), ord(b)] = value
+		table[ord(b), ord(a)] = value
+	return table
+
+def translateMatrix(genotypes, dosage=False):
+	"""Translates a matrix of genotypes in one pass using the lookup tables. Only the GT subfield \
+		is used, so the remaining FORMAT subfields can still be present.
+
+	Arguments:
+		genotypes {array-like} -- 2-D list or array of genotype strings (variants x samples).
+
+	Keyword Arguments:
+		dosage {bool} -- Translates to the number of alternative alleles. (default: {False})
+
+	Returns:
+		numpy.ndarray -- int8 matrix where missing or unknown genotypes are MISSING.
+	"""
+	raw = np.ascontiguousarray(genotypes, dtype='S4')
+	return translateChars(raw.view(np.uint8).reshape(raw.shape + (4,)), dosage)
+
+def translateChars(char, dosage=False):
+	"""Translates the first four characters of each genotype using the lookup tables.
+
+	Arguments:
+		char {numpy.ndarray} -- uint8 array (variants x samples x 4) padded with zeros.
+
+	Keyword Arguments:
+		dosage {bool} -- Translates to the number of alternative alleles. (default: {False})
+
+	Returns:
+		numpy.ndarray -- int8 matrix where missing or unknown genotypes are MISSING.
+	"""
+	table = DOSAGES if dosage else CODES
+	haploid = (char[...,1] == 0) | (char[...,1] == ord(':'))
+	diploid = ((char[...,1] == ord('/')) | (char[...,1] == ord('|'))) & \
+		((char[...,3] == 0) | (char[...,3] == ord(':')))
+	matrix = table[char[...,0], np.where(haploid, char[...,0], char[...,2])]
+	matrix[~(haploid | diploid)] = MISSING
+	return matrix
+
+def formatChunk(variants, matrix):
+	"""Formats a chunk of translated genotypes as tab separated lines, where missing values are empty.
+
+	Arguments:
+		variants {list} -- VAR, REF and ALT of each variant.
+		matrix {numpy.ndarray} -- Translated genotypes of each variant.
+
+	Returns:
+		string -- Lines to be written in the csv.gz file.
+	"""
+	text = GT_TEXT[matrix.astype(np.int16) - MISSING].tolist()
+	return ''.join(['\t'.join(v) + '\t' + '\t'.join(g) + '\n' for v, g in zip(variants, text)])
+
+def infoKeys(filters):
+	"""Lists the INFO keys used by the filters.
+
+	Arguments:
+		filters {list} -- Filters applied to the INFO column.
+
+	Returns:
+		list -- INFO keys, without repetitions.
+	"""
+	keys = []
+	for f in filters:
+		key = splitFilter(f)[0]
+		if key not in keys: keys.append(key)
+	return keys
+
+def splitFilter(filter):
+	"""Splits a filter like \'AF>=0.01\' in key, operator and value. A filter with only a key \
+		selects the variants where the key (usually a flag) is present.
+
+	Arguments:
+		filter {string} -- Filter applied to the INFO column.
+
+	Returns:
+		tuple -- The key, the operator and the value (None for presence filters).
+	"""
+	match = re.match(r'^\s*([A-Za-z0-9_.]+)\s*(==|!=|>=|<=|=|>|<)\s*(.+?)\s*$', filter)
+	if match: return match.groups()
+	return filter.strip(), None, None
+
+def parseInfo(info, keys):
+	"""Extracts the selected keys of the INFO column of a whole chunk in one vectorized pass. \
+		The values are converted with INFO_TYPES and, for multi-allelic variants, only the \
+		first value is kept.
+
+	Arguments:
+		info {list or pandas.Series} -- INFO column.
+		keys {list} -- INFO keys to extract.
+
+	Returns:
+		pandas.Dataframe -- One column per key, NaN when the key is not present and True/False for flags.
+	"""
+	info = pd.Series(info, dtype=object).reset_index(drop=True)
+	pattern = '^' + ''.join(['(?:(?=(?:.*;)?{}(=[^;]*|;|$)))?'.format(re.escape(k)) for k in keys])
+	values = info.str.extract(pattern)
+	values.columns = keys
+	for k in keys:
+		kind = INFO_TYPES.get(k, str)
+		if kind is bool: values[k] = values[k].notna()
+		else:
+			values[k] = values[k].str[1:].str.split(',', n=1).str[0]
+			if kind is not str: values[k] = pd.to_numeric(values[k], errors='coerce')
+	return values
+
+def filterInfo(columns, filters):
+	"""Evaluates the filters over the columns extracted by parseInfo.
+
+	Arguments:
+		columns {pandas.Dataframe} -- Columns extracted from the INFO column.
+		filters {list} -- Filters like \'VT=SNP,INDEL\', \'AF>0.01\' or \'DB\'.
+
+	Returns:
+		numpy.ndarray -- Boolean mask of the variants that pass all the filters.
+	"""
+	mask = np.ones(len(columns), dtype=bool)
+	for f in filters:
+		key, op, value = splitFilter(f)
+		col = columns[key]
+		kind = INFO_TYPES.get(key, str)
+		if op is None: 
+			mask &= col.values.astype(bool) if kind is bool else col.notna().values
+		elif op in ['=', '==', '!=']:
+			match = col.isin([v if kind is str else float(v) for v in value.split(',')]).values
+			mask &= ~match if op == '!=' else match
+		else:
+			col = pd.to_numeric(col, errors='coerce')
+			mask &= OPERATORS[op](col, float(value)).values
+	return mask
+
+@profiler.profiled
+def filterControls(df, filters=CONTROLS_FILTERS):
 	"""Filters the controls dataset to standardise the data.
 
 	Arguments:
 		df {pandas.Dataframe} -- Initial controls dataset.
 
+	Keyword Arguments:
+		filters {list} -- Filters applied to the INFO column. (default: {CONTROLS_FILTERS})
+
 	Returns:
 		pandas.Dataframe -- Filtered controls dataset.
 	"""	
-	print('>>> Filtering dataframe...')
-	df.insert(loc=0, column='VAR', value=df[['CHROM', 'POS']].apply(lambda x: ':'.join(x), axis=1))
-	df['VAR']='chr'+df['VAR']
-	col=df.columns
-	for c in col:
-		df[c] = df[c].str.replace('|','/')
-
-	index=[]
-	idx=list(df.index)
-	types=['VT=SNP','VT=INDEL'] #filter by type of variant
-	info=df.loc[:,'INFO'].str.split(';')
-	for i in idx:
-		for j in info[int(i)]:
-			if j in types:
-					index.append(i)
-
-	df = df.loc[index,:]
-	df = df.drop(['CHROM', 'POS', 'INFO'], axis=1)
-	return df
+	return filterCases(df, filters)
 
-def filterCases(df):
-	"""Filters the cases dataset to standardise the data.
+@profiler.profiled
+def filterCases(df, filters=[]):
+	"""Filters the cases dataset to standardise the data. The genotypes are kept as they are, \
+		since translateGT only reads the GT subfield.
 
 	Arguments:
 		df {pandas.Dataframe} -- Initial cases dataset.
 
+	Keyword Arguments:
+		filters {list} -- Filters applied to the INFO column. (default: {[]})
+
 	Returns:
 		pandas.Dataframe -- Filtered cases dataset.
 	"""	
 	print('>>> Filtering dataframe...')
-	df.insert(loc=0, column='VAR', value=df[['CHROM', 'POS']].apply(lambda x: ':'.join(x), axis=1))
-	df['VAR']='chr'+df['VAR']
-
-	for i in range(df.shape[1]-6):
-		df.iloc[:,i+6] = df.iloc[:,i+6].str[0:3] #saves only the genotype info
-	df.iloc[:,6:].replace(to_replace = '.:.', value = '.', inplace = True)
+	df.insert(loc=0, column='VAR', value='chr' + df['CHROM'] + ':' + df['POS'])
+	if filters:
+		df = df.loc[filterInfo(parseInfo(df['INFO'], infoKeys(filters)), filters),:]
 	df = df.drop(['CHROM', 'POS', 'INFO'], axis=1)
 	return df
 
-def translateGT(dataset):
+def translateGT(dataset, dosage=False):
 	"""Translates the genotype information to a number that a ML algorithm can understand.
 
 	Arguments:
 		dataset {pandas.Dataframe} -- Dataset to me translated.
 
+	Keyword Arguments:
+		dosage {bool} -- Translates to the number of alternative alleles. (default: {False})
+
 	Returns:
-		[pandas.Dataframe] -- Translated dataset.
+		[pandas.Dataframe] -- Translated dataset, with int8 genotypes where missing ones are MISSING.
 	"""	
 	print('>>> Starting translation...')
+	matrix = translateMatrix(dataset.iloc[:,3:].values, dosage)
+	matrix = pd.DataFrame(matrix, columns=dataset.columns[3:], index=dataset.index)
+	return pd.concat([dataset.iloc[:,:3], matrix], axis=1)
 
-	gt1=['0/0','0/1','1/1','0/2','1/2','2/2','0/3',
-		'1/3','2/3','3/3','0/4','1/4','2/4','3/4',
-		'4/4','0/5','1/5','2/5','3/5','4/5','5/5',
-		'0/6','1/6','2/6','3/6','4/6','5/6','6/6','.','./.']
-	gt2=['0/0','1/0','1/1','2/0','2/1','2/2','3/0',
-		'3/1','3/2','3/3','4/0','4/1','4/2','4/3',
-		'4/4','5/0','5/1','5/2','5/3','5/4','5/5',
-		'6/0','6/1','6/2','6/3','6/4','6/5','6/6','.','./.']
-	tr=list(range(0,28))
-	tr.append(float('nan'))
-	tr.append(float('nan'))
-
-	dataset.iloc[:,3:].replace(to_replace = gt1, value = tr, inplace = True)
-	dataset.iloc[:,3:].replace(to_replace = gt2, value = tr, inplace = True)
-	return dataset
+CODES = genotypeTable()
+DOSAGES = genotypeTable(dosage=True)
+GT_TEXT = np.array([''] + [str(i) for i in range(len(GT1)-2)], dtype=object)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+'''
+# File: workspace.py
+# Created Date: Sunday October 18th 2026
+# Author: Debora Antunes
+# -----
+# Last Modified: Sunday, October 18th 2026, 5:17:40 pm
+# -----
+'''
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import genotypeStore
+import profiler
+
+'''
+A workspace is a directory with a dataset saved by main.py, used instead of pickles:
+
+	meta.json		columns, index, dtype, the rows that are not numeric and the source of the dataset
+	matrix.npy		numeric values (rows x columns, without the labels), opened as a memory map
+	labels.npy		labels of the numeric rows, when the dataset has a labels column
+	extra.json		rows that are not numeric, like the genes added by geneSelection.addGenes
+
+The header of matrix.npy is padded by numpy to a multiple of 64 bytes, so the matrix is aligned. \
+The matrix is mapped copy-on-write: opening a workspace does not read the data, the pages are \
+shared by all the processes that use it, and changes to the dataset are never written back.
+'''
+
+
+def isWorkspace(path):
+	"""Checks if a path is a workspace.
+
+	Arguments:
+		path {string} -- Path to check.
+
+	Returns:
+		bool -- True when the path is a directory with a matrix.npy file.
+	"""
+	return os.path.isfile(os.path.join(path, 'matrix.npy'))
+
+def sourceKey(source):
+	"""Identifies the version of the file a dataset was read from.
+
+	Arguments:
+		source {string} -- Path to the file or genotype store.
+
+	Returns:
+		list -- Absolute path, size and modification time.
+	"""
+	if genotypeStore.isStore(source): source = os.path.join(source, 'meta.json')
+	stat = os.stat(source)
+	return [os.path.abspath(source), stat.st_size, stat.st_mtime_ns]
+
+def isCurrent(path, source):
+	"""Checks if a workspace was saved from the current version of a file.
+
+	Arguments:
+		path {string} -- Path to the workspace.
+		source {string} -- Path to the file or genotype store.
+
+	Returns:
+		bool -- True when the workspace exists and the file did not change since it was saved.
+	"""
+	try:
+		with open(os.path.join(path, 'meta.json')) as f: meta = json.load(f)
+		return meta.get('source') == sourceKey(source)
+	except (OSError, ValueError):
+		return False
+
+@profiler.profiled
+def save(data, path, source=None, chunksize=1000):
+	"""Saves a dataset as a workspace. The numeric rows are copied to matrix.npy by blocks, so only \
+		one block is converted at a time; rows with other values (only in object datasets) are \
+		saved in extra.json.
+
+	Arguments:
+		data {pandas.Dataframe} -- Dataset, with the labels in a column called labels, if any.
+		path {string} -- Path to the workspace.
+
+	Keyword Arguments:
+		source {string} -- File the dataset was read from, to be checked by isCurrent. (default: {None})
+		chunksize {int} -- Number of rows copied at once. (default: {1000})
+	"""
+	columns = [c for c in data.columns if c != 'labels']
+	values = data.loc[:, data.columns != 'labels']
+	numeric = all([pd.api.types.is_numeric_dtype(t) for t in values.dtypes])
+	if numeric:
+		rows = np.arange(len(data))
+		dtype = np.result_type(*values.dtypes) if columns else np.float64
+	else:
+		converted = values.apply(pd.to_numeric, errors='coerce')
+		rows = np.flatnonzero(~(converted.isna() & values.notna()).any(axis=1).values)
+		values, dtype = converted, np.float64
+	extra = np.setdiff1d(np.arange(len(data)), rows)
+
+	part = path + '.part'
+	if os.path.isdir(part): shutil.rmtree(part)
+	os.makedirs(part)
+	matrix = np.lib.format.open_memmap(os.path.join(part, 'matrix.npy'), mode='w+', dtype=dtype, shape=(len(rows), len(columns)))
+	for start in range(0, len(rows), chunksize):
+		matrix[start:start+chunksize] = values.iloc[rows[start:start+chunksize]].to_numpy(dtype)
+	matrix.flush()
+	del matrix
+
+	if 'labels' in data:
+		labels = data['labels'].iloc[rows]
+		try: labels = pd.to_numeric(labels)
+		except (ValueError, TypeError): labels = labels.astype(str)
+		np.save(os.path.join(part, 'labels.npy'), labels.to_numpy(), allow_pickle=labels.dtype.kind == 'O')
+	if len(extra):
+		with open(os.path.join(part, 'extra.json'), 'w') as f:
+			json.dump({'rows': extra.tolist(), 'values': data.iloc[extra].values.tolist()}, f, default=str)
+
+	index = None if isinstance(data.index, pd.RangeIndex) and data.index.start == 0 and data.index.step == 1 \
+		else [str(i) for i in data.index]
+	meta = {'columns': [str(c) for c in data.columns], 'index': index, 'dtype': np.dtype(dtype).name,
+		'labels': 'labels' in data, 'rows': len(data), 'extra': len(extra),
+		'source': sourceKey(source) if source else None}
+	genotypeStore.writeJson(meta, os.path.join(part, 'meta.json'))
+	if os.path.isdir(path): shutil.rmtree(path)
+	elif os.path.exists(path): os.remove(path)
+	os.replace(part, path)
+
+@profiler.profiled
+def load(path):
+	"""Opens a workspace. Numeric datasets are built over the memory-mapped matrix without reading it; \
+		datasets with extra rows are rebuilt as object datasets, like the ones that were saved.
+
+	Arguments:
+		path {string} -- Path to the workspace.
+
+	Returns:
+		pandas.Dataframe -- Dataset.
+	"""
+	with open(os.path.join(path, 'meta.json')) as f: meta = json.load(f)
+	matrix = np.load(os.path.join(path, 'matrix.npy'), mmap_mode='c')
+	columns = [c for c in meta['columns'] if c != 'labels']
+	labels = np.load(os.path.join(path, 'labels.npy'), allow_pickle=True) if meta['labels'] else None
+
+	if not meta['extra']:
+		data = pd.DataFrame(matrix, columns=columns, copy=False)
+		if labels is not None: data.insert(meta['columns'].index('labels'), 'labels', labels)
+	else:
+		with open(os.path.join(path, 'extra.json')) as f: extra = json.load(f)
+		#The columns are placed by position, since variants of multi-allelic sites repeat their names
+		position = [i for i, c in enumerate(meta['columns']) if c != 'labels']
+		values = np.empty((meta['rows'], len(meta['columns'])), dtype=object)
+		rows = np.setdiff1d(np.arange(meta['rows']), extra['rows'])
+		values[np.ix_(rows, position)] = matrix
+		if labels is not None: values[rows, meta['columns'].index('labels')] = labels
+		values[extra['rows']] = extra['values']
+		data = pd.DataFrame(values, columns=meta['columns'])
+	if meta['index'] is not None: data.index = meta['index']
+	return data